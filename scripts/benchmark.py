@@ -0,0 +1,473 @@
+"""Reproducible performance benchmarks for the calculator microservice.
+
+Measures, and writes as JSON:
+
+* ``routes``: throughput and p50/p99 latency of every API route;
+* ``components``: the isolated per-call cost of the request path stages
+  (pydantic validation, the handler's success log, the calculator call
+  and response serialization);
+* ``scaling``: throughput and latency of ``/add`` at increasing
+  concurrency;
+* ``reductions``: elements per second summed by ``/reduce/sum`` (JSON and
+  float64 frame bodies) against one ``/add`` request per element.
+
+Requests go either straight to the ASGI app in this process (default,
+no network or server noise) or over HTTP to a locally spawned
+``python -m calculator`` server:
+
+    poetry run python scripts/benchmark.py --output baseline.json
+    poetry run python scripts/benchmark.py --target spawn --workers 4
+
+With ``--compare BASELINE`` the run is checked against a stored result and
+the script exits with status 1 when any route's p50 latency grew, or its
+throughput dropped, by more than ``--threshold`` (default 10%).
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Ensure the src directory is importable
+sys.path.insert(0, str(ROOT / "src"))
+
+SEED = 20260218
+
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32, 64)
+
+REDUCTION_ELEMENTS = 100_000
+
+
+def _route_cases() -> dict[str, tuple[str, bytes, str]]:
+    """Return ``name -> (path, body, content type)`` for every route."""
+    rng = random.Random(SEED)
+    binary = {"a": 7.5, "b": 2.5}
+    unary = {"a": 2.5}
+    cases: dict[str, tuple[str, object]] = {
+        "add": ("/add", binary),
+        "subtract": ("/subtract", binary),
+        "multiply": ("/multiply", binary),
+        "divide": ("/divide", binary),
+        "power": ("/power", binary),
+        "nth_root": ("/nth_root", {"a": 27.0, "b": 3.0}),
+        "modulo": ("/modulo", binary),
+        "floor_divide": ("/floor_divide", binary),
+        "sqrt": ("/sqrt", unary),
+        "absolute": ("/absolute", {"a": -2.5}),
+        "round": ("/round", {"a": 2.567, "decimals": 2}),
+        "floor": ("/floor", unary),
+        "ceil": ("/ceil", unary),
+        "log10": ("/log10", unary),
+        "ln": ("/ln", unary),
+        "exp": ("/exp", unary),
+        "evaluate": (
+            "/evaluate",
+            {"expression": "round(sqrt(a*a + b*b), 2)", "variables": {"a": 3, "b": 4}},
+        ),
+        "batch": (
+            "/batch",
+            {
+                "operations": [
+                    {"op": "add", "a": rng.uniform(-1e3, 1e3), "b": rng.uniform(1, 1e3)}
+                    for _ in range(100)
+                ]
+            },
+        ),
+        # Integer operands take the fast path; decimal strings do not.
+        "precise_int": ("/precise/add", {"a": 7, "b": 2}),
+        "precise_decimal": ("/precise/add", {"a": "7.5", "b": "2.5"}),
+        "vector": (
+            "/vector/sqrt",
+            {"a": [rng.uniform(0, 1e6) for _ in range(1000)]},
+        ),
+        "reduce_sum": (
+            "/reduce/sum",
+            {"a": [rng.uniform(-1e3, 1e3) for _ in range(1000)]},
+        ),
+        "reduce_cumsum": (
+            "/reduce/cumsum",
+            {"a": [rng.uniform(-1e3, 1e3) for _ in range(1000)]},
+        ),
+        "tabulate": ("/tabulate/log10", {"start": 1, "stop": 1e6, "count": 1000}),
+    }
+    encoded = {
+        name: (path, json.dumps(body).encode(), "application/json")
+        for name, (path, body) in cases.items()
+    }
+    lines = [
+        json.dumps({"op": "multiply", "a": rng.uniform(-10, 10), "b": 2.0})
+        for _ in range(100)
+    ]
+    encoded["stream"] = (
+        "/stream",
+        ("\n".join(lines) + "\n").encode(),
+        "application/x-ndjson",
+    )
+    return encoded
+
+
+def _summary(latencies: list[float], elapsed: float) -> dict:
+    """Summarize per-request latencies (seconds) and total elapsed time."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(ordered[count // 2] * 1000, 4),
+        "p99_ms": round(ordered[min(count - 1, int(count * 0.99))] * 1000, 4),
+    }
+
+
+class AsgiDriver:
+    """Sends requests straight to an ASGI app in this process."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def request(self, path: str, body: bytes, content_type: str) -> int:
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        status = 0
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("127.0.0.1", 8000),
+        }
+        await self.app(scope, receive, send)
+        return status
+
+    async def close(self) -> None:
+        pass
+
+
+class HttpDriver:
+    """Sends requests over HTTP with a pooled ``httpx`` client."""
+
+    def __init__(self, base_url: str, max_connections: int) -> None:
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=max_connections),
+            timeout=30,
+        )
+
+    async def request(self, path: str, body: bytes, content_type: str) -> int:
+        response = await self.client.post(
+            path, content=body, headers={"Content-Type": content_type}
+        )
+        return response.status_code
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+async def _run_load(driver, case, requests: int, concurrency: int) -> dict:
+    """Send *requests* copies of *case* with *concurrency* in flight."""
+    path, body, content_type = case
+    latencies: list[float] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status = await driver.request(path, body, content_type)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"{path} returned HTTP {status}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, time.perf_counter() - start)
+
+
+async def bench_routes(driver, requests: int, warmup: int) -> dict:
+    results = {}
+    for name, case in _route_cases().items():
+        await _run_load(driver, case, warmup, 1)
+        results[name] = await _run_load(driver, case, requests, 1)
+    return results
+
+
+async def bench_scaling(driver, requests: int, levels) -> list[dict]:
+    case = _route_cases()["add"]
+    await _run_load(driver, case, requests // 10 or 1, 1)
+    results = []
+    for concurrency in levels:
+        result = await _run_load(driver, case, requests, concurrency)
+        results.append({"concurrency": concurrency, **result})
+    return results
+
+
+async def bench_reductions(driver, requests: int, add: dict) -> dict:
+    """Compare summing with ``/reduce/sum`` to one ``/add`` per element."""
+    from calculator.transport import encode_frame
+
+    rng = random.Random(SEED)
+    values = [rng.uniform(-1e3, 1e3) for _ in range(REDUCTION_ELEMENTS)]
+    cases = {
+        "sum_json": (
+            "/reduce/sum",
+            json.dumps({"a": values}).encode(),
+            "application/json",
+        ),
+        "sum_frame": (
+            "/reduce/sum",
+            encode_frame("sum", values),
+            "application/octet-stream",
+        ),
+    }
+    results = {"add": {"elements_per_s": add["rps"]}}
+    count = max(requests // 20, 1)
+    for name, case in cases.items():
+        await _run_load(driver, case, 1, 1)
+        result = await _run_load(driver, case, count, 1)
+        elements_per_s = round(result["rps"] * REDUCTION_ELEMENTS, 1)
+        results[name] = {
+            **result,
+            "elements": REDUCTION_ELEMENTS,
+            "elements_per_s": elements_per_s,
+            "speedup": round(elements_per_s / add["rps"], 1),
+        }
+    return results
+
+
+def bench_components(number: int) -> dict:
+    """Time the request path stages in isolation, in ns per call."""
+    from calculator.models import OperationRequest
+    from calculator.runtime import calc
+    from calculator.transport import ResultResponse
+
+    body = b'{"a": 7.5, "b": 2.5}'
+    logger = logging.getLogger("calculator.benchmark")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+        )
+        logger.addHandler(handler)
+        stages = {
+            "validation": lambda: OperationRequest.model_validate_json(body),
+            "logging": lambda: logger.info(
+                "add(%s, %s) = %s", 7.5, 2.5, 10.0, extra={"op": "add"}
+            ),
+            "compute": lambda: calc.add(7.5, 2.5),
+            "serialization": lambda: ResultResponse(10.0),
+        }
+        results = {}
+        for name, stage in stages.items():
+            best = min(timeit.repeat(stage, number=number, repeat=5))
+            results[name] = {"ns_per_call": round(best / number * 1e9, 1)}
+        logger.removeHandler(handler)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _spawn_server(workers: int) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "calculator",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+
+def _metadata(args) -> dict:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        commit = None
+    else:
+        commit = completed.stdout.strip() if completed.returncode == 0 else None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "target": args.target,
+        "workers": args.workers if args.target == "spawn" else None,
+        "requests": args.requests,
+    }
+
+
+async def run(args) -> dict:
+    if args.target == "spawn":
+        process, base_url = _spawn_server(args.workers)
+        driver = HttpDriver(base_url, max(args.concurrency))
+    else:
+        from calculator.api import create_app
+
+        process = None
+        driver = AsgiDriver(create_app(configure_logging=args.logging))
+    gc.collect()
+    try:
+        results = {"meta": _metadata(args)}
+        results["routes"] = await bench_routes(driver, args.requests, args.warmup)
+        results["components"] = bench_components(args.requests * 10)
+        results["scaling"] = await bench_scaling(
+            driver, args.requests, args.concurrency
+        )
+        results["reductions"] = await bench_reductions(
+            driver, args.requests, results["routes"]["add"]
+        )
+    finally:
+        await driver.close()
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a description of every route that regressed past *threshold*."""
+    regressions = []
+    for name, base in baseline.get("routes", {}).items():
+        now = current["routes"].get(name)
+        if now is None:
+            continue
+        if now["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p50 {base['p50_ms']:.4f} ms -> {now['p50_ms']:.4f} ms"
+            )
+        if now["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {base['rps']:.0f} -> {now['rps']:.0f} req/s")
+    return regressions
+
+
+def _print_table(results: dict) -> None:
+    print(f"{'route':<14}{'req/s':>12}{'p50 ms':>12}{'p99 ms':>12}", file=sys.stderr)
+    for name, route in results["routes"].items():
+        print(
+            f"{name:<14}{route['rps']:>12.0f}"
+            f"{route['p50_ms']:>12.4f}{route['p99_ms']:>12.4f}",
+            file=sys.stderr,
+        )
+    for name, stage in results["components"].items():
+        print(f"{name:<14}{stage['ns_per_call']:>12.1f} ns/call", file=sys.stderr)
+    for level in results["scaling"]:
+        print(
+            f"c={level['concurrency']:<12}{level['rps']:>12.0f}"
+            f"{level['p50_ms']:>12.4f}{level['p99_ms']:>12.4f}",
+            file=sys.stderr,
+        )
+    for name, reduction in results["reductions"].items():
+        print(
+            f"{name:<14}{reduction['elements_per_s']:>12.0f} elements/s",
+            file=sys.stderr,
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", choices=("inprocess", "spawn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="spawned server workers")
+    parser.add_argument("--requests", type=int, default=2000, help="per measurement")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: tuple(int(level) for level in value.split(",")),
+        default=CONCURRENCY_LEVELS,
+        help="comma-separated concurrency levels for the scaling curve",
+    )
+    parser.add_argument(
+        "--logging",
+        action="store_true",
+        help="apply config.yaml logging in-process (off by default)",
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline results to check")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    _print_table(results)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,19 +9,18 @@
 import sys
 from pathlib import Path
 
-import yaml
-
 # Ensure the src directory is importable
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
 
-from calculator.api import app  # noqa: E402
+from calculator.api import create_app  # noqa: E402
+from calculator.spec import render_yaml  # noqa: E402
 
 OUTPUT = Path(__file__).resolve().parent.parent / "openapi.yaml"
 
 
 def main():
-    schema = app.openapi()
-    yaml_content = yaml.dump(schema, sort_keys=False, allow_unicode=True)
+    schema = create_app(configure_logging=False).openapi()
+    yaml_content = render_yaml(schema)
     OUTPUT.write_text(yaml_content)
     print(f"OpenAPI spec (v{schema['info']['version']}) written to {OUTPUT}")
 
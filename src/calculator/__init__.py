@@ -1,8 +1,37 @@
-"""Calculator-ms: Python calculator microservice REST API package."""
+"""Calculator-ms: Python calculator microservice REST API package.
 
-from calculator_lib import Calculator
+Attributes are imported on first access, so ``from calculator import
+Calculator`` does not load the web stack and importing the package has
+no configuration side effects.
+"""
 
-from .api import app
-from .config import get_server_config
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["Calculator", "app", "get_server_config"]
+if TYPE_CHECKING:
+    from calculator_lib import Calculator
+
+    from .api import app, create_app
+    from .config import get_server_config
+
+__all__ = ["Calculator", "app", "create_app", "get_server_config"]
+
+_LAZY_ATTRIBUTES = {
+    "Calculator": "calculator_lib",
+    "app": "calculator.api",
+    "create_app": "calculator.api",
+    "get_server_config": "calculator.config",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
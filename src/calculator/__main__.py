@@ -0,0 +1,86 @@
+"""Production launcher: ``python -m calculator`` or ``calculator-ms``.
+
+Starts uvicorn with the settings of the ``server:`` section of
+config.yaml.  With more than one worker, that many processes share the
+listening socket, each serving requests on its own core.  With
+``preload`` (the default) the app is built once and the workers are
+forked from it (:mod:`calculator.prefork`); otherwise uvicorn starts
+each worker as a fresh interpreter importing ``calculator.api:app``.
+"""
+
+import argparse
+import os
+from typing import Sequence
+
+import uvicorn
+
+from .config import get_server_config, load_config
+
+APP = "calculator.api:app"
+
+_UVICORN_OPTIONS = (
+    "host",
+    "port",
+    "loop",
+    "http",
+    "backlog",
+    "timeout_keep_alive",
+    "limit_concurrency",
+    "limit_max_requests",
+    "timeout_graceful_shutdown",
+    "access_log",
+)
+
+
+def uvicorn_options(server: dict) -> dict:
+    """Translate a server configuration section into ``uvicorn.run`` options.
+
+    Args:
+        server: The server section, as returned by
+            :func:`calculator.config.get_server_config`.
+
+    Returns:
+        Keyword arguments for :func:`uvicorn.run`, with ``workers``
+        resolved to the number of CPU cores when it is not set.
+    """
+    options = {name: server[name] for name in _UVICORN_OPTIONS}
+    options["workers"] = server["workers"] or os.cpu_count() or 1
+    return options
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Parse command-line overrides and run the server."""
+    load_config()
+    server = get_server_config()
+    parser = argparse.ArgumentParser(
+        prog="calculator-ms", description="Run the calculator microservice."
+    )
+    parser.add_argument("--host", default=server["host"])
+    parser.add_argument("--port", type=int, default=server["port"])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=server["workers"],
+        help="worker processes (default: one per CPU core)",
+    )
+    parser.add_argument(
+        "--preload",
+        action=argparse.BooleanOptionalAction,
+        default=server["preload"],
+        help="build the app once and fork the workers from it",
+    )
+    args = parser.parse_args(argv)
+    server = {**server, **vars(args)}
+    options = uvicorn_options(server)
+    if server["preload"] and options["workers"] > 1:
+        from . import prefork  # pylint: disable=import-outside-toplevel
+
+        if prefork.supported():
+            workers = options.pop("workers")
+            prefork.serve(prefork.preload(**options), workers)
+            return
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Admission control: load shedding in front of the application.
+
+:class:`AdmissionMiddleware` decides, before a request reaches FastAPI,
+whether the service has room for it:
+
+* a per-client :class:`~calculator.ratelimit.TokenBucket` rejects
+  clients that exceed their rate with ``429 Too Many Requests``;
+* a concurrency limit rejects requests beyond the number currently in
+  flight with ``503 Service Unavailable``.  The limit is either fixed or
+  adapted by :class:`AdaptiveLimit` from observed latency.
+
+Both responses carry ``Retry-After`` and are sent without touching the
+application, so shedding load stays cheap while the service is
+overloaded.  All state is updated on the event loop thread and needs no
+locks.
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from .ratelimit import TokenBucket
+
+
+class AdaptiveLimit:
+    """Concurrency limit adjusted by additive increase, multiplicative decrease.
+
+    Every request that completes within *target_latency* grows the limit
+    by ``1 / limit``, i.e. by about one per window of *limit* requests.
+    A slower request shrinks it by *backoff*, at most once per
+    *target_latency* so that one burst of slow requests counts as a
+    single congestion signal.
+
+    Args:
+        initial: Starting limit.
+        min_limit: Floor of the limit.
+        max_limit: Ceiling of the limit.
+        target_latency: Latency, in seconds, above which the service is
+            considered congested.
+        backoff: Factor applied to the limit on congestion.
+        clock: Monotonic time source, replaceable in tests.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        target_latency: float,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self._clock = clock
+        self._last_decrease = -math.inf
+
+    def observe(self, latency: float) -> None:
+        """Update the limit from the latency of one completed request."""
+        if latency <= self.target_latency:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            return
+        now = self._clock()
+        if now - self._last_decrease >= self.target_latency:
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+
+
+class AdmissionController:  # pylint: disable=too-many-instance-attributes
+    """Per-client rate limits and a global concurrency limit.
+
+    Args:
+        max_in_flight: Hard cap on concurrent requests, or ``None``.
+        client_rate: Requests per second allowed per client, or ``None``
+            to disable per-client rate limiting.
+        client_burst: Requests a client may send in a burst above
+            *client_rate*.
+        max_clients: Client buckets kept before the least recently seen
+            one is dropped.
+        adaptive: Optional latency-driven limit applied below
+            *max_in_flight*.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        client_rate: float | None = None,
+        client_burst: float = 100,
+        max_clients: int = 10000,
+        adaptive: AdaptiveLimit | None = None,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    @property
+    def limit(self) -> float:
+        """The concurrency limit currently in force."""
+        limit = math.inf if self.max_in_flight is None else self.max_in_flight
+        if self.adaptive is not None:
+            limit = min(limit, self.adaptive.limit)
+        return limit
+
+    def check_rate(self, client: str) -> float | None:
+        """Take a token for *client*, returning a retry delay when out."""
+        if self.client_rate is None:
+            return None
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        if bucket.try_acquire():
+            return None
+        self.rate_limited += 1
+        return bucket.retry_after()
+
+    def try_enter(self) -> bool:
+        """Admit a request if the concurrency limit allows it."""
+        if self.in_flight >= self.limit:
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def leave(self, latency: float) -> None:
+        """Release a request slot and feed its latency to the limit."""
+        self.in_flight -= 1
+        if self.adaptive is not None:
+            self.adaptive.observe(latency)
+
+    def stats(self) -> dict:
+        """Return the current limits and counters."""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+            "clients": len(self._buckets),
+        }
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (
+                    b"retry-after",
+                    str(max(1, math.ceil(min(retry_after, 3600)))).encode(),
+                ),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware enforcing an :class:`AdmissionController`.
+
+    Requests to *exempt_paths* (such as ``/metrics``) bypass admission so
+    the service stays observable while it sheds load.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        exempt_paths: tuple[str, ...] = (),
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        controller = self.controller
+        client = scope.get("client")
+        retry_after = controller.check_rate(client[0] if client else "")
+        if retry_after is not None:
+            await _reject(send, 429, "Rate limit exceeded", retry_after)
+            return
+        if not controller.try_enter():
+            await _reject(send, 503, "Server is overloaded, retry later", 1)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.leave(time.perf_counter() - start)
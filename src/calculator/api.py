@@ -3,261 +3,812 @@
 Each endpoint accepts a POST request with a JSON body, delegates to
 :class:`calculator_lib.Calculator`, and returns a JSON response
 containing the result.
+
+Scalar operations run inline on the event loop; bulk endpoints and the
+operations listed under ``offload.operations`` in config.yaml run on the
+:class:`~calculator.offload.OffloadPool`.  Operation sets too large for
+one request are submitted as background jobs (:mod:`calculator.jobs`).
 """
 
+import hmac
+import json
 import logging
+import math
+from contextlib import asynccontextmanager
+from functools import partial
 from importlib.metadata import version
 
-import yaml
-from calculator_lib import Calculator
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import RedirectResponse, Response
-from pydantic import BaseModel
-
-from .config import load_config, setup_logging
+from fastapi import APIRouter, FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import (
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from . import job_routes, memory, operation_routes, spec
+from .admission import AdaptiveLimit, AdmissionController, AdmissionMiddleware
+from .cache import ResultCache
+from .config import (
+    DEFAULT_CONFIG_PATH,
+    get_admission_config,
+    get_cache_config,
+    get_jobs_config,
+    get_memory_config,
+    get_metrics_config,
+    get_offload_config,
+    get_precision_config,
+    get_profiling_config,
+    get_websocket_config,
+    load_config,
+    setup_logging,
+)
+from .expression import compile_expression
+from .jobs import JobStore
+from .metrics import (
+    CONTENT_TYPE,
+    MetricsMiddleware,
+    MetricsRegistry,
+    render_counters,
+)
+from .models import (
+    BatchOperation,
+    BatchRequest,
+    BatchResponse,
+    BatchResult,
+    CumulativeResponse,
+    ExpressionRequest,
+    OperationName,
+    OperationResponse,
+    PreciseRequest,
+    PreciseResponse,
+    ProfilingSettings,
+    ReductionName,
+    ReductionRequest,
+    SessionOperation,
+    SessionResult,
+    TabulateRequest,
+    TabulateResult,
+    VectorRequest,
+    VectorResponse,
+    validation_detail,
+)
+from .offload import OffloadPool, PoolSaturated
+from .operations import (
+    BINARY_OPERATIONS,
+    OPERATION_ERRORS,
+    OUT_OF_RANGE,
+    error_detail,
+)
+from .precision import PreciseCalculator
+from .profiling import Profiler, ProfilingMiddleware
+from .runtime import Runtime, compute, dispatch, get_runtime, timed_async
+from .singleflight import SingleFlight
+from .spec import openapi_document
+from .streaming import NDJSON, LineTooLong, NDJSONStreamingResponse, iter_lines
+from .transport import FRAME, NegotiatedRoute, ResultResponse, media_type
+from .websocket import CalculationSession, message_id
 
-load_config()
-setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Calculator Microservice",
-    version=version("calculator-ms"),
-    description="A calculator with core arithmetic operations and some "
-    "advanced operations like power, root, modulo, floor, absolute, round, "
-    "ceil, log, ln, and exponential.",
-    openapi_url="/docs",
-)
-calc = Calculator()
+router = APIRouter(route_class=NegotiatedRoute)
+
+OPENAPI_URL = "/docs"
+
+# Errors reported per item by the bulk and session endpoints.
+_ITEM_ERRORS = OPERATION_ERRORS + (PoolSaturated,)
 
 
-@app.get("/", include_in_schema=False)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    """Reject work that does not fit in the offload pool with a 503."""
+    logger.warning("Offload pool saturated on %s", request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def overflow_handler(request: Request, exc: OverflowError):
+    """Reject operations whose float result is out of range with a 400.
+
+    ``exp`` and ``power`` raise :class:`OverflowError` instead of
+    returning an infinity.
+    """
+    logger.warning("Validation error on %s: %s", request.url.path, exc)
+    return JSONResponse(status_code=400, content={"detail": OUT_OF_RANGE})
+
+
+@router.get("/", include_in_schema=False)
 def root():
     """Redirect the landing page to Swagger UI."""
     return RedirectResponse(url="/docs")
 
 
-@app.get("/openapi.yaml", include_in_schema=False)
-def openapi_yaml():
-    """Return the OpenAPI 3.1 spec as YAML."""
-    openapi_schema = app.openapi()
-    yaml_content = yaml.dump(openapi_schema, sort_keys=False, allow_unicode=True)
-    return Response(
-        content=yaml_content, media_type="application/vnd.oai.openapi;version=3.1"
-    )
+@router.get("/cache/stats", include_in_schema=False)
+def cache_stats(request: Request):
+    """Return the result cache counters."""
+    result_cache = get_runtime(request).result_cache
+    if result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **result_cache.stats()}
 
 
-class OperationRequest(BaseModel):
-    """Request body for two-operand operations."""
+@router.get("/memory", include_in_schema=False)
+def memory_stats(request: Request):
+    """Return the unique and shared memory of the server processes.
 
-    a: float
-    b: float
+    Reports this worker and, under the pre-fork launcher, its sibling
+    workers and their supervisor.  Returns an HTTP 404 Not Found error
+    when disabled or where process memory cannot be read.
+    """
+    if not get_runtime(request).memory_enabled:
+        raise HTTPException(status_code=404, detail="Memory statistics are disabled")
+    if not memory.available():
+        raise HTTPException(status_code=404, detail="Memory statistics are unavailable")
+    return memory.report()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Return request metrics in the Prometheus text format."""
+    runtime = get_runtime(request)
+    if runtime.metrics_registry is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body = runtime.metrics_registry.render()
+    if runtime.result_cache is not None:
+        body += render_counters(
+            "calculator_cache", runtime.result_cache.stats(), "Result cache counter."
+        )
+    if runtime.admission is not None:
+        body += render_counters(
+            "calculator_admission",
+            runtime.admission.stats(),
+            "Admission control counter.",
+        )
+    body += render_counters(
+        "calculator_offload", runtime.offload_pool.stats(), "Offload pool counter."
+    )
+    if runtime.coalescer is not None:
+        body += render_counters(
+            "calculator_singleflight",
+            runtime.coalescer.stats(),
+            "Coalesced offloaded operation counter.",
+        )
+    if runtime.job_store is not None:
+        body += render_counters(
+            "calculator_jobs", runtime.job_store.stats(), "Background job counter."
+        )
+    return Response(content=body, media_type=CONTENT_TYPE)
+
+
+def _require_admin(request: Request) -> Profiler:
+    """Return the profiler if the request carries the admin bearer token."""
+    runtime = get_runtime(request)
+    profiler, admin_token = runtime.profiler, runtime.admin_token
+    if profiler is None or not admin_token:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), admin_token.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return profiler
+
+
+@router.get("/admin/profiling", include_in_schema=False)
+def profiling_summary(request: Request):
+    """Return the profiling settings and per-route phase breakdown."""
+    return _require_admin(request).summary()
+
+
+@router.put("/admin/profiling", include_in_schema=False)
+def update_profiling(request: Request, settings: ProfilingSettings):
+    """Enable or disable profiling, or change its sample rate."""
+    active = _require_admin(request)
+    if settings.enabled is not None:
+        active.enabled = settings.enabled
+    if settings.sample_rate is not None:
+        active.sample_rate = settings.sample_rate
+    logger.info(
+        "Profiling %s at sample rate %s",
+        "enabled" if active.enabled else "disabled",
+        active.sample_rate,
+    )
+    return active.summary()
 
 
-class SingleOperandRequest(BaseModel):
-    """Request body for single-operand operations."""
+@router.delete("/admin/profiling", include_in_schema=False)
+def reset_profiling(request: Request):
+    """Discard the collected profiles."""
+    active = _require_admin(request)
+    active.reset()
+    return active.summary()
 
-    a: float
 
+@router.get("/admin/profiling/pstats", include_in_schema=False)
+def profiling_pstats(request: Request):
+    """Download the merged profile in the ``pstats`` file format."""
+    return Response(
+        content=_require_admin(request).dump_pstats(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="calculator.prof"'},
+    )
 
-class RoundRequest(BaseModel):
-    """Request body for the rounding operation."""
 
-    a: float
-    decimals: int = 0
+@router.get("/admin/profiling/collapsed", include_in_schema=False)
+def profiling_collapsed(request: Request):
+    """Download the merged profile as flame graph collapsed stacks."""
+    return Response(
+        content=_require_admin(request).collapsed(), media_type="text/plain"
+    )
 
 
-class OperationResponse(BaseModel):
-    """Standard response body containing a single float result."""
+# Registered on the router, ahead of the route FastAPI adds for
+# ``openapi_url``, so the schema JSON is also served pre-rendered.
+@router.get(OPENAPI_URL, include_in_schema=False)
+def openapi_json(request: Request):
+    """Return the OpenAPI 3.1 spec as JSON, rendered once per app."""
+    return openapi_document(request, spec.JSON).response(request)
 
-    result: float
 
+@router.get("/openapi.yaml", include_in_schema=False)
+def openapi_yaml(request: Request):
+    """Return the OpenAPI 3.1 spec as YAML, rendered once per app."""
+    return openapi_document(request, spec.YAML).response(request)
 
-# Core Arithmetic
 
+# Single Operations
 
-@app.post("/add", response_model=OperationResponse)
-def add(req: OperationRequest):
-    """Return the sum of two numbers."""
-    logger.debug("POST /add: a=%s, b=%s", req.a, req.b)
-    result = calc.add(req.a, req.b)
-    logger.info("add(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
+# The routes themselves are added, rather than the router with
+# include_router(), so they are matched like the others and keep
+# their place in the schema.
+router.routes.extend(operation_routes.router.routes)
 
 
-@app.post("/subtract", response_model=OperationResponse)
-def subtract(req: OperationRequest):
-    """Return the difference of two numbers."""
-    logger.debug("POST /subtract: a=%s, b=%s", req.a, req.b)
-    result = calc.subtract(req.a, req.b)
-    logger.info("subtract(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
+# Bulk
 
 
-@app.post("/multiply", response_model=OperationResponse)
-def multiply(req: OperationRequest):
-    """Return the product of two numbers."""
-    logger.debug("POST /multiply: a=%s, b=%s", req.a, req.b)
-    result = calc.multiply(req.a, req.b)
-    logger.info("multiply(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
+def _batch_results(
+    operations: list[BatchOperation], cache: ResultCache | None
+) -> tuple[list[dict], int]:
+    """Evaluate batch items, returning their results and the failure count."""
+    results: list[dict] = []
+    failed = 0
+    for item in operations:
+        try:
+            method, args = dispatch.bind(item.op, item.a, item.b, item.decimals)
+            value = compute(cache, item.op, method, *args)
+        except OPERATION_ERRORS as e:
+            failed += 1
+            results.append({"detail": error_detail(e)})
+        else:
+            results.append({"result": value})
+    return results, failed
 
 
-@app.post("/divide", response_model=OperationResponse)
-def divide(req: OperationRequest):
-    """Return the quotient of two numbers.
+@router.post("/batch", response_model=BatchResponse)
+async def batch(request: Request, req: BatchRequest):
+    """Evaluate a list of operations in order on the offload pool.
 
-    Returns an HTTP 400 Bad Request error on division by zero.
+    Invalid inputs (e.g. division by zero) are reported in the ``detail``
+    of the corresponding result instead of failing the whole request.
+    Returns an HTTP 503 Service Unavailable error when the pool is full.
     """
-    logger.debug("POST /divide: a=%s, b=%s", req.a, req.b)
-    try:
-        result = calc.divide(req.a, req.b)
-    except ValueError as e:
-        logger.warning("Validation error on /divide: %s", e)
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    logger.info("divide(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
+    logger.debug("POST /batch: %d operations", len(req.operations))
+    runtime = get_runtime(request)
+    results, failed = await timed_async(
+        runtime.offload_pool.run, _batch_results, req.operations, runtime.result_cache
+    )
+    logger.info(
+        "batch(%d operations) = %d failed", len(results), failed, extra={"op": "batch"}
+    )
+    return {"results": results}
 
 
-# Power & Roots
+async def _stream_result(runtime: Runtime, line: bytes) -> tuple[bytes, bool]:
+    """Evaluate one NDJSON operation line and encode its result line."""
+    try:
+        item = BatchOperation.model_validate_json(line)
+        method, args = dispatch.bind(item.op, item.a, item.b, item.decimals)
+        result = BatchResult(result=await runtime.run(item.op, method, *args))
+    except ValidationError as e:
+        result = BatchResult(detail=validation_detail(e))
+    except _ITEM_ERRORS as e:
+        result = BatchResult(detail=error_detail(e))
+    return result.model_dump_json().encode() + b"\n", result.detail is not None
+
+
+async def _stream_results(request: Request):
+    """Yield result lines for the operation lines of the request body."""
+    runtime = get_runtime(request)
+    count = failed = 0
+    async for line in iter_lines(request.stream()):
+        if isinstance(line, LineTooLong):
+            encoded = (
+                BatchResult(
+                    detail=f"Line of {line.length} bytes exceeds the maximum length"
+                )
+                .model_dump_json()
+                .encode()
+                + b"\n"
+            )
+            is_error = True
+        else:
+            encoded, is_error = await _stream_result(runtime, line)
+        count += 1
+        failed += is_error
+        yield encoded
+    logger.info(
+        "stream(%d operations) = %d failed", count, failed, extra={"op": "stream"}
+    )
 
 
-@app.post("/power", response_model=OperationResponse)
-def power(req: OperationRequest):
-    """Return a raised to the power b."""
-    logger.debug("POST /power: a=%s, b=%s", req.a, req.b)
-    result = calc.power(req.a, req.b)
-    logger.info("power(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
+@router.post(
+    "/stream",
+    response_class=NDJSONStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON: {"schema": {"$ref": "#/components/schemas/BatchOperation"}}
+            },
+        }
+    },
+)
+async def stream(request: Request):
+    """Evaluate a stream of newline-delimited JSON operations.
+
+    Each request line holds one operation in the ``/batch`` item shape;
+    one ``{"result": , "detail": }`` line is streamed back per operation,
+    in order, as soon as it is evaluated.  Invalid lines and inputs are
+    reported inline without ending the stream.
+    """
+    logger.debug("POST /stream")
+    return NDJSONStreamingResponse(_stream_results(request))
 
 
-@app.post("/sqrt", response_model=OperationResponse)
-def sqrt(req: SingleOperandRequest):
-    """Return the square root. Returns an HTTP 400 Bad Request error on negative input."""
-    logger.debug("POST /sqrt: a=%s", req.a)
+async def _session_reply(runtime: Runtime, message: str | bytes) -> str:
+    """Evaluate one WebSocket operation message and encode its reply."""
     try:
-        result = calc.sqrt(req.a)
-    except ValueError as e:
-        logger.warning("Validation error on /sqrt: %s", e)
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    logger.info("sqrt(%s) = %s", req.a, result)
-    return OperationResponse(result=result)
+        item = SessionOperation.model_validate_json(message)
+    except ValidationError as e:
+        return _session_reject(message_id(message), validation_detail(e))
+    try:
+        method, args = dispatch.bind(item.op, item.a, item.b, item.decimals)
+        result = SessionResult(
+            id=item.id, result=await runtime.run(item.op, method, *args)
+        )
+    except _ITEM_ERRORS as e:
+        result = SessionResult(id=item.id, detail=error_detail(e))
+    return result.model_dump_json()
 
 
-@app.post("/nth_root", response_model=OperationResponse)
-def nth_root(req: OperationRequest):
-    """Return the b-th root of a. Returns an HTTP 400 Bad Request error on invalid input."""
-    logger.debug("POST /nth_root: a=%s, b=%s", req.a, req.b)
-    try:
-        result = calc.nth_root(req.a, req.b)
-    except ValueError as e:
-        logger.warning("Validation error on /nth_root: %s", e)
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    logger.info("nth_root(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
+def _session_reject(message_id_: object, detail: str) -> str:
+    """Encode an error reply for a message that was not evaluated."""
+    if not isinstance(message_id_, (int, str)):
+        message_id_ = None
+    return SessionResult(id=message_id_, detail=detail).model_dump_json()
 
 
-# Modulo & Integer Math
+@router.websocket("/ws")
+async def websocket_session(websocket: WebSocket):
+    """Serve pipelined operation messages over a persistent connection.
 
+    Each message is a ``/batch`` item with an optional ``id``; replies are
+    ``{"id": , "result": , "detail": }`` and may arrive out of order.
+    """
+    ws_config = get_websocket_config()
+    session = CalculationSession(
+        websocket,
+        partial(_session_reply, get_runtime(websocket)),
+        _session_reject,
+        rate=ws_config["rate"],
+        burst=ws_config["burst"],
+        idle_timeout=ws_config["idle_timeout"],
+        max_in_flight=ws_config["max_in_flight"],
+    )
+    await session.run()
+
+
+def _vector_result(op: str, req: VectorRequest) -> tuple[dict, int]:
+    """Evaluate a columnar request, returning its response and failure count."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    from . import vector  # pylint: disable=import-outside-toplevel
+
+    a = np.asarray(req.a, dtype=np.float64)
+    b = None if req.b is None else np.asarray(req.b, dtype=np.float64)
+    result, errors = vector.evaluate(op, a, b, req.decimals)
+    values = result.tolist()
+    for indices in errors.values():
+        for i in indices.tolist():
+            values[i] = None
+    response = {
+        "result": values,
+        "errors": [
+            {"detail": detail, "indices": indices.tolist()}
+            for detail, indices in errors.items()
+        ],
+    }
+    return response, sum(len(indices) for indices in errors.values())
+
+
+@router.post("/vector/{op}", response_model=VectorResponse)
+async def vector_operation(request: Request, op: OperationName, req: VectorRequest):
+    """Apply an operation element-wise to whole operand columns.
+
+    Invalid elements (e.g. non-positive input to log10) are reported in
+    ``errors`` by index instead of failing the whole request.  Runs on
+    the offload pool; returns an HTTP 503 Service Unavailable error when
+    the pool is full.
+    """
+    logger.debug("POST /vector/%s: %d elements", op, len(req.a))
+    if op in BINARY_OPERATIONS and req.b is None:
+        raise HTTPException(
+            status_code=422, detail=f"Operation '{op}' requires operand 'b'"
+        )
+    response, failed = await timed_async(
+        get_runtime(request).offload_pool.run, _vector_result, op, req
+    )
+    logger.info(
+        "vector %s(%d elements) = %d failed",
+        op,
+        len(response["result"]),
+        failed,
+        extra={"op": "vector"},
+    )
+    return response
 
-@app.post("/modulo", response_model=OperationResponse)
-def modulo(req: OperationRequest):
-    """Return a mod b. Returns an HTTP 400 Bad Request error on modulo by zero."""
-    logger.debug("POST /modulo: a=%s, b=%s", req.a, req.b)
-    try:
-        result = calc.modulo(req.a, req.b)
-    except ValueError as e:
-        logger.warning("Validation error on /modulo: %s", e)
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    logger.info("modulo(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
 
+# Tabulation
 
-@app.post("/floor_divide", response_model=OperationResponse)
-def floor_divide(req: OperationRequest):
-    """Return the floor division of a by b. Returns an HTTP 400 Bad Request error on division by zero."""
-    logger.debug("POST /floor_divide: a=%s, b=%s", req.a, req.b)
+
+@router.post(
+    "/tabulate/{op}",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                NDJSON: {"schema": TabulateResult.model_json_schema()},
+                FRAME: {"schema": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+)
+def tabulate_operation(request: Request, op: OperationName, req: TabulateRequest):
+    """Stream an operation over a range of one operand.
+
+    One ``/stream`` result line, with the point added as ``x``, is
+    streamed per point, or with ``Accept: application/octet-stream`` a
+    sequence of frames with point, result and error code columns, the
+    codes indexing the JSON list in the ``X-Error-Details`` header.
+    Points are generated and evaluated lazily, one chunk at a time.
+    Points outside the operation's domain are reported individually;
+    returns an HTTP 400 Bad Request error when the whole range is
+    outside it, and an HTTP 422 error for an empty or oversized range.
+    """
+    from . import tabulate, vector  # pylint: disable=import-outside-toplevel
+
+    logger.debug(
+        "POST /tabulate/%s: %s=[%s, %s) step=%s count=%s value=%s",
+        op,
+        req.operand,
+        req.start,
+        req.stop,
+        req.step,
+        req.count,
+        req.value,
+    )
+    try:
+        tabulate.validate(op, req.operand, req.value)
+        grid = tabulate.Grid.from_range(req.start, req.stop, req.step, req.count)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
     try:
-        result = calc.floor_divide(req.a, req.b)
+        tabulate.check_range(op, grid, req.operand, req.value)
     except ValueError as e:
-        logger.warning("Validation error on /floor_divide: %s", e)
+        logger.warning("Validation error on /tabulate/%s: %s", op, e)
         raise HTTPException(status_code=400, detail=str(e)) from e
-    logger.info("floor_divide(%s, %s) = %s", req.a, req.b, result)
-    return OperationResponse(result=result)
+    chunks = tabulate.evaluate(op, grid, req.operand, req.value, req.decimals)
+    logger.info("tabulate %s(%d points)", op, grid.count, extra={"op": "tabulate"})
+    if any(
+        media_type(candidate) == FRAME
+        for candidate in request.headers.get("accept", "").split(",")
+    ):
+        return StreamingResponse(
+            tabulate.frame_chunks(op, chunks),
+            media_type=FRAME,
+            headers={"X-Error-Details": json.dumps(vector.error_messages(op))},
+        )
+    return StreamingResponse(tabulate.ndjson_chunks(chunks), media_type=NDJSON)
 
 
-# Absolute & Rounding
+# Reductions
 
 
-@app.post("/absolute", response_model=OperationResponse)
-def absolute(req: SingleOperandRequest):
-    """Return the absolute value."""
-    logger.debug("POST /absolute: a=%s", req.a)
-    result = calc.absolute(req.a)
-    logger.info("absolute(%s) = %s", req.a, result)
-    return OperationResponse(result=result)
+def _reduction_result(op: str, req: ReductionRequest) -> float:
+    """Reduce a request's operand columns."""
+    from . import reductions  # pylint: disable=import-outside-toplevel
 
+    return reductions.reduce(op, req.a, req.b)
 
-@app.post("/round", response_model=OperationResponse)
-def round_number(req: RoundRequest):
-    """Return a rounded to the given number of decimal places."""
-    logger.debug("POST /round: a=%s, decimals=%s", req.a, req.decimals)
-    result = calc.round_number(req.a, req.decimals)
-    logger.info("round(%s, %s) = %s", req.a, req.decimals, result)
-    return OperationResponse(result=result)
 
+def _cumulative_result(req: ReductionRequest) -> dict:
+    """Compute the running totals of a request's ``a`` column."""
+    from . import reductions  # pylint: disable=import-outside-toplevel
 
-@app.post("/floor", response_model=OperationResponse)
-def floor(req: SingleOperandRequest):
-    """Return the floor of a."""
-    logger.debug("POST /floor: a=%s", req.a)
-    result = calc.floor(req.a)
-    logger.info("floor(%s) = %s", req.a, result)
-    return OperationResponse(result=result)
+    return {"result": reductions.cumsum(req.a).tolist()}
 
 
-@app.post("/ceil", response_model=OperationResponse)
-def ceil(req: SingleOperandRequest):
-    """Return the ceiling of a."""
-    logger.debug("POST /ceil: a=%s", req.a)
-    result = calc.ceil(req.a)
-    logger.info("ceil(%s) = %s", req.a, result)
-    return OperationResponse(result=result)
+# Registered ahead of /reduce/{op}, whose path it also matches.
+@router.post("/reduce/cumsum", response_model=CumulativeResponse)
+async def cumulative_sum(request: Request, req: ReductionRequest):
+    """Return the compensated running totals of ``a``.
 
+    Runs on the offload pool; returns an HTTP 503 Service Unavailable
+    error when the pool is full.
+    """
+    logger.debug("POST /reduce/cumsum: %d elements", len(req.a))
+    response = await timed_async(
+        get_runtime(request).offload_pool.run, _cumulative_result, req
+    )
+    logger.info("reduce cumsum(%d elements)", len(req.a), extra={"op": "reduce"})
+    return response
 
-# Logarithmic & Exponential
 
+@router.post("/reduce/{op}", response_model=OperationResponse)
+async def reduce_operation(request: Request, op: ReductionName, req: ReductionRequest):
+    """Reduce a whole operand column to a single value.
 
-@app.post("/log10", response_model=OperationResponse)
-def log10(req: SingleOperandRequest):
-    """Return the base-10 logarithm. Returns an HTTP 400 Bad Request error on non-positive input."""
-    logger.debug("POST /log10: a=%s", req.a)
+    ``sum``, ``mean`` and ``dot`` compensate rounding errors, and
+    ``product`` only fails when the final result is out of range.  Runs
+    on the offload pool.  Returns an HTTP 400 Bad Request error on an
+    empty input to ``mean``, ``min`` or ``max`` or an out-of-range
+    product, and an HTTP 503 Service Unavailable error when the pool is
+    full.
+    """
+    logger.debug("POST /reduce/%s: %d elements", op, len(req.a))
+    if op == "dot" and req.b is None:
+        raise HTTPException(
+            status_code=422, detail="Operation 'dot' requires operand 'b'"
+        )
     try:
-        result = calc.log10(req.a)
+        result = await timed_async(
+            get_runtime(request).offload_pool.run, _reduction_result, op, req
+        )
     except ValueError as e:
-        logger.warning("Validation error on /log10: %s", e)
+        logger.warning("Validation error on /reduce/%s: %s", op, e)
         raise HTTPException(status_code=400, detail=str(e)) from e
-    logger.info("log10(%s) = %s", req.a, result)
-    return OperationResponse(result=result)
+    logger.info(
+        "reduce %s(%d elements) = %s", op, len(req.a), result, extra={"op": "reduce"}
+    )
+    return ResultResponse(result)
 
 
-@app.post("/ln", response_model=OperationResponse)
-def ln(req: SingleOperandRequest):
-    """Return the natural logarithm. Returns an HTTP 400 Bad Request error on non-positive input."""
-    logger.debug("POST /ln: a=%s", req.a)
+# Arbitrary Precision
+
+
+@router.post("/precise/{op}", response_model=PreciseResponse)
+async def precise_operation(request: Request, op: OperationName, req: PreciseRequest):
+    """Evaluate an operation in decimal or exact rational arithmetic.
+
+    Operands may be numbers or strings (e.g. ``"0.1"``, or ``"1/3"`` in
+    ``fraction`` mode) and the result is a string.  Evaluated on the
+    offload pool.  Returns an HTTP 400 Bad Request error on invalid
+    input, a missing operand, a result too large to compute, or an
+    irrational result in ``fraction`` mode.
+    """
+    runtime = get_runtime(request)
+    mode = req.mode or runtime.precision_mode
+    logger.debug("POST /precise/%s: a=%s, b=%s, mode=%s", op, req.a, req.b, mode)
     try:
-        result = calc.ln(req.a)
-    except ValueError as e:
-        logger.warning("Validation error on /ln: %s", e)
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    logger.info("ln(%s) = %s", req.a, result)
-    return OperationResponse(result=result)
+        result = await timed_async(
+            runtime.offload_pool.run,
+            runtime.precise_calc.evaluate,
+            op,
+            req.a,
+            req.b,
+            req.decimals,
+            mode,
+            req.digits,
+        )
+    except OPERATION_ERRORS as e:
+        logger.warning("Validation error on /precise/%s: %s", op, e)
+        raise HTTPException(status_code=400, detail=error_detail(e)) from e
+    logger.info(
+        "precise %s(%s, %s) = %s", op, req.a, req.b, result, extra={"op": "precise"}
+    )
+    return PreciseResponse(result=result, mode=mode)
+
+
+# Expressions
+
 
+def _evaluate_expression(expression: str, variables: dict[str, float]) -> float:
+    """Compile (or reuse) the plan for *expression* and evaluate it."""
+    return compile_expression(expression)(variables)
 
-@app.post("/exp", response_model=OperationResponse)
-def exp(req: SingleOperandRequest):
-    """Return e raised to the power a."""
-    logger.debug("POST /exp: a=%s", req.a)
-    result = calc.exp(req.a)
-    logger.info("exp(%s) = %s", req.a, result)
-    return OperationResponse(result=result)
+
+@router.post("/evaluate", response_model=OperationResponse)
+async def evaluate(request: Request, req: ExpressionRequest):
+    """Evaluate an arithmetic expression over the calculator operations.
+
+    Runs on the offload pool.  Returns an HTTP 400 Bad Request error on a
+    malformed expression, an undefined variable, or invalid input to any
+    operation, and an HTTP 503 Service Unavailable error when the pool is
+    full.
+    """
+    logger.debug(
+        "POST /evaluate: expression=%s, variables=%s", req.expression, req.variables
+    )
+    try:
+        result = await timed_async(
+            get_runtime(request).offload_pool.run,
+            _evaluate_expression,
+            req.expression,
+            req.variables,
+        )
+    except OPERATION_ERRORS as e:
+        logger.warning("Validation error on /evaluate: %s", e)
+        raise HTTPException(status_code=400, detail=error_detail(e)) from e
+    logger.info("evaluate(%s) = %s", req.expression, result, extra={"op": "evaluate"})
+    return ResultResponse(result)
+
+
+# Background Jobs
+
+router.routes.extend(job_routes.router.routes)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    runtime: Runtime = app.state.runtime
+    # Fail the jobs a previous server left unfinished.
+    if runtime.job_store is not None:
+        await run_in_threadpool(runtime.job_store.remove_expired)
+    yield
+    # Stop the workers of this app so that the process can exit.
+    runtime.shutdown()
+
+
+def create_app(
+    config_path: str = DEFAULT_CONFIG_PATH, configure_logging: bool = True
+) -> FastAPI:
+    """Load the configuration and build the application.
+
+    Reads *config_path*, optionally applies its logging section, sets up
+    the result cache, offload pool, admission control and metrics from
+    it, and returns a new :class:`~fastapi.FastAPI` app serving
+    :data:`router`.  They are kept on the app's
+    :class:`~calculator.runtime.Runtime`, ``app.state.runtime``, which
+    the handlers read, and the pool and job workers are stopped by the
+    app's lifespan; apps created in the same process are independent.
+
+    Args:
+        config_path: Filesystem path to the YAML configuration file.
+        configure_logging: Whether to apply the logging configuration;
+            tools that only need the schema pass ``False``.
+
+    Returns:
+        The configured application.
+
+    Raises:
+        ValueError: If the result cache is enabled with a process
+            offload pool.
+    """
+    load_config(config_path)
+    if configure_logging:
+        setup_logging()
+
+    app = FastAPI(
+        title="Calculator Microservice",
+        version=version("calculator-ms"),
+        description="A calculator with core arithmetic operations and some "
+        "advanced operations like power, root, modulo, floor, absolute, round, "
+        "ceil, log, ln, and exponential.",
+        openapi_url=OPENAPI_URL,
+        routes=router.routes,
+        lifespan=_lifespan,
+        exception_handlers={
+            PoolSaturated: pool_saturated_handler,
+            OverflowError: overflow_handler,
+        },
+    )
+
+    cache_config = get_cache_config()
+    offload_config = get_offload_config()
+    if cache_config["enabled"] and offload_config["kind"] == "process":
+        # Each pool process would fill a cache of its own.
+        raise ValueError("The result cache cannot be combined with a process pool")
+    precision_config = get_precision_config()
+    runtime = Runtime(
+        offload_pool=OffloadPool(
+            offload_config["kind"],
+            offload_config["max_workers"],
+            offload_config["max_queue"],
+        ),
+        result_cache=(
+            ResultCache(cache_config["max_size"], cache_config["ttl_seconds"])
+            if cache_config["enabled"]
+            else None
+        ),
+        offloaded_operations=frozenset(offload_config["operations"]),
+        coalescer=SingleFlight() if offload_config["coalesce"] else None,
+        precise_calc=PreciseCalculator(
+            precision_config["digits"], precision_config["rounding"]
+        ),
+        precision_mode=precision_config["mode"],
+    )
+    app.state.runtime = runtime
+
+    jobs_config = get_jobs_config()
+    if jobs_config["enabled"]:
+        runtime.job_store = JobStore(
+            jobs_config["directory"],
+            job_routes.job_result,
+            kind=jobs_config["kind"],
+            workers=jobs_config["workers"],
+            max_pending=jobs_config["max_pending"],
+            max_input_bytes=jobs_config["max_input_bytes"],
+            retention_seconds=jobs_config["retention_seconds"],
+        )
+
+    # Innermost middleware, so profiles exclude admission and metrics.
+    profiling_config = get_profiling_config()
+    runtime.admin_token = profiling_config["admin_token"]
+    if profiling_config["enabled"] or runtime.admin_token:
+        runtime.profiler = Profiler(
+            profiling_config["sample_rate"], profiling_config["enabled"]
+        )
+        app.add_middleware(
+            ProfilingMiddleware,
+            profiler=runtime.profiler,
+            exempt_prefixes=("/admin/",),
+        )
+
+    admission_config = get_admission_config()
+    if admission_config["enabled"]:
+        adaptive = None
+        if admission_config["adaptive"]:
+            adaptive = AdaptiveLimit(
+                admission_config["adaptive_initial"],
+                admission_config["adaptive_min"],
+                admission_config["max_in_flight"] or math.inf,
+                admission_config["target_latency_ms"] / 1000,
+            )
+        runtime.admission = AdmissionController(
+            max_in_flight=admission_config["max_in_flight"],
+            client_rate=admission_config["client_rate"],
+            client_burst=admission_config["client_burst"],
+            max_clients=admission_config["max_clients"],
+            adaptive=adaptive,
+        )
+        app.add_middleware(
+            AdmissionMiddleware,
+            controller=runtime.admission,
+            exempt_paths=tuple(admission_config["exempt_paths"]),
+        )
+
+    # Added after admission control so that shed requests are counted too.
+    if get_metrics_config()["enabled"]:
+        runtime.metrics_registry = MetricsRegistry()
+        app.add_middleware(MetricsMiddleware, registry=runtime.metrics_registry)
+    runtime.memory_enabled = get_memory_config()["enabled"]
+    return app
+
+
+def __getattr__(name: str):
+    # ``app`` is created on first access (``uvicorn calculator.api:app``),
+    # so importing this module has no configuration side effects.
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,131 @@
+"""Bounded result cache for the pure calculator operations.
+
+Every operation is a pure function of its operands, so results can be
+memoized by ``(operation, operands)``.  The cache is size-bounded with
+LRU eviction and an optional time-to-live, remembers ``ValueError``
+outcomes as negative entries, and keeps hit/miss/eviction counters so it
+can be sized from production traffic.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from .operations import OPERATION_ERRORS
+
+# Stands in for -0.0 in keys: -0.0 == 0.0 and both hash alike, yet
+# operations such as divide or power can tell them apart.
+_NEGATIVE_ZERO = object()
+
+
+def make_key(op: str, args: tuple) -> tuple | None:
+    """Build the cache key for *op* applied to *args*.
+
+    Returns:
+        The key, or ``None`` when the call must bypass the cache because
+        an operand is NaN (NaN never compares equal to itself).
+    """
+    key: list = [op]
+    for arg in args:
+        if isinstance(arg, float) and math.isnan(arg):
+            return None
+        if arg == 0 and math.copysign(1.0, arg) < 0:
+            arg = _NEGATIVE_ZERO
+        key.append(arg)
+    return tuple(key)
+
+
+class ResultCache:  # pylint: disable=too-many-instance-attributes
+    """Thread-safe LRU/TTL cache of operation results.
+
+    Args:
+        max_size: Maximum number of entries before the least recently
+            used one is evicted.
+        ttl_seconds: Lifetime of an entry in seconds, or ``None`` for
+            entries that only expire through eviction.
+        clock: Monotonic time source, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds or None
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypasses = 0
+
+    def call(self, op: str, fn: Callable[..., float], *args) -> float:
+        """Return ``fn(*args)``, served from the cache when possible.
+
+        Raises:
+            ValueError: Re-raised from *fn*, or replayed from a negative
+                entry with the same message.
+        """
+        key = make_key(op, args)
+        if key is None:
+            with self._lock:
+                self.bypasses += 1
+            return fn(*args)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, error = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if error is not None:
+                        raise error[0](error[1])
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        try:
+            value = fn(*args)
+        except OPERATION_ERRORS as e:
+            self._store(key, None, (type(e), str(e)))
+            raise
+        self._store(key, value, None)
+        return value
+
+    def _store(self, key: tuple, value: float | None, error: tuple | None) -> None:
+        """Insert an entry, evicting the least recently used ones."""
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = self._clock() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value, error)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return the cache counters and current size."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bypasses": self.bypasses,
+        }
@@ -0,0 +1,412 @@
+"""Python client for the calculator service.
+
+:class:`Client` and :class:`AsyncClient` have the method surface of
+:class:`calculator_lib.Calculator` (``add``, ``nth_root``,
+``round_number``, ...), generated from the operation registry, so either
+can replace a local calculator::
+
+    with Client("http://localhost:8000") as calc:
+        calc.divide(7, 2)  # 3.5
+        calc.divide(1, 0)  # ValueError: Cannot divide by zero
+        calc.call("log10", {"a": 100})  # 2.0, by the operation's REST name
+
+An HTTP 400 response is raised as the exception the local calculator
+raises: :class:`OverflowError` for a result out of range and
+:class:`ValueError` with the response ``detail`` otherwise.  Other error
+responses (e.g. 503 when the service is saturated) raise
+:class:`httpx.HTTPStatusError`.
+
+Requests share one pool of keep-alive connections, so concurrent calls
+(from threads, or tasks of an :class:`AsyncClient`) are pipelined over
+open connections instead of paying a connection setup each.  With a
+``batch_window``, calls made within that many seconds of each other are
+collected into a single ``POST /batch`` request, and each caller gets its
+own result or exception back.  A batch the service rejects as a whole
+(one call's arguments failing validation) is resent as individual
+requests, so that only that caller sees the error.
+
+Requires the ``httpx`` package (the ``client`` extra).
+"""
+
+import abc
+import asyncio
+import inspect
+import json
+import threading
+from typing import Any, Callable, cast
+
+from calculator_lib import Calculator
+
+try:
+    import httpx
+except ImportError as e:
+    raise ImportError(
+        "calculator.client requires httpx: pip install 'calculator-ms[client]'"
+    ) from e
+
+from .operations import OPERATIONS, OUT_OF_RANGE, Operation
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+# Calls per /batch request; the service accepts up to 10,000.
+MAX_BATCH_SIZE = 1000
+
+_JSON = {"Content-Type": "application/json"}
+
+# Statuses for inputs the service rejects, raised as ValueError.
+_REJECTED = (400, 422)
+
+
+def _encode(body: Any) -> bytes:
+    # httpx rejects NaN and infinities; the service reads them as JSON
+    # extensions, as Python's json module writes them.
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def _decode(value: float | str) -> float:
+    """Decode a result, including the strings ``"Infinity"`` and ``"NaN"``."""
+    return float(value)
+
+
+def _operation_error(detail: str) -> Exception:
+    """Return the exception the local calculator raises for *detail*."""
+    if detail == OUT_OF_RANGE:
+        return OverflowError(detail)
+    return ValueError(detail)
+
+
+def _result(response: httpx.Response) -> float:
+    """Return the result of a single operation response.
+
+    Raises:
+        ValueError: For a rejected input or request.
+        OverflowError: For a result out of range.
+        httpx.HTTPStatusError: For any other error response.
+    """
+    if response.status_code in _REJECTED:
+        detail = response.json()["detail"]
+        if isinstance(detail, list):
+            detail = "; ".join(error["msg"] for error in detail)
+        raise _operation_error(detail)
+    response.raise_for_status()
+    return _decode(response.json()["result"])
+
+
+def _split(item: dict) -> tuple[str, dict]:
+    """Split a batch item into its operation and operands."""
+    operands = dict(item)
+    return operands.pop("op"), operands
+
+
+def _batch_outcomes(response: httpx.Response) -> list[float | Exception]:
+    """Return the result or exception of every call in a batch response."""
+    response.raise_for_status()
+    return [
+        (
+            _operation_error(item["detail"])
+            if item.get("detail") is not None
+            else _decode(item["result"])
+        )
+        for item in response.json()["results"]
+    ]
+
+
+class _Batch:
+    """Calls collected for one ``/batch`` request.
+
+    Once :attr:`done` is set, ``outcomes[i]`` is the result or exception
+    of ``items[i]``.
+    """
+
+    __slots__ = ("items", "outcomes", "closed", "done")
+
+    def __init__(self) -> None:
+        self.items: list[dict] = []
+        self.outcomes: list[float | Exception] = []
+        self.closed = False
+        self.done = threading.Event()
+
+
+def _operation_method(op: Operation) -> Callable:
+    """Build the client method for *op* with its calculator signature."""
+    calculator_method = getattr(Calculator, op.method)
+    signature = inspect.signature(calculator_method)
+    name, operands = op.name, op.operands
+
+    def method(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        return self.call(name, dict(zip(operands, bound.args[1:])))
+
+    method.__name__ = method.__qualname__ = op.method
+    method.__doc__ = calculator_method.__doc__
+    cast(Any, method).__signature__ = signature
+    return method
+
+
+class _Operations(abc.ABC):
+    """The calculator methods, each sending its operation to :meth:`call`."""
+
+    @abc.abstractmethod
+    def call(self, op: str, operands: dict) -> float:
+        """Evaluate *op* on *operands* in the service."""
+
+
+class _AsyncOperations(abc.ABC):
+    """The calculator coroutines, each awaiting :meth:`call`."""
+
+    @abc.abstractmethod
+    async def call(self, op: str, operands: dict) -> float:
+        """Evaluate *op* on *operands* in the service."""
+
+
+for _op in OPERATIONS:
+    _method = _operation_method(_op)
+    setattr(_Operations, _op.method, _method)
+    setattr(_AsyncOperations, _op.method, _method)
+
+
+class Client(_Operations):
+    """Synchronous calculator client; safe to share between threads.
+
+    Args:
+        base_url: URL of the calculator service.
+        batch_window: Seconds to collect concurrent calls into one
+            ``/batch`` request, or ``None`` to send every call on its
+            own.  The first call of a batch waits this long for others.
+        max_batch_size: Calls after which a batch is sent without
+            waiting for the rest of the window.
+        http: Existing :class:`httpx.Client` to send requests with,
+            instead of one created from *base_url* and *options*; it is
+            not closed by :meth:`close`.
+        **options: Further :class:`httpx.Client` arguments, such as
+            ``timeout`` or ``limits``.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        *,
+        batch_window: float | None = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        http: httpx.Client | None = None,
+        **options: Any,
+    ) -> None:
+        self._owns_http = http is None
+        self._http = http or httpx.Client(base_url=base_url, **options)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._batch_ready = threading.Condition(self._lock)
+        self._open: _Batch | None = None
+
+    def call(self, op: str, operands: dict) -> float:
+        """Evaluate *op* on *operands* in the service.
+
+        Raises:
+            ValueError: For a rejected input or request.
+            OverflowError: For a result out of range.
+            httpx.HTTPStatusError: For any other error response.
+        """
+        if self.batch_window is None:
+            return self._single(op, operands)
+        return self._batched({"op": op, **operands})
+
+    def _single(self, op: str, operands: dict) -> float:
+        response = self._http.post(f"/{op}", content=_encode(operands), headers=_JSON)
+        return _result(response)
+
+    def _outcome(self, item: dict) -> float | Exception:
+        """Send one batch item on its own and return its outcome."""
+        try:
+            return self._single(*_split(item))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return e
+
+    def _batched(self, item: dict) -> float:
+        """Add *item* to the open batch, sending it if this call opened it."""
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if batch is None:
+                batch = self._open = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                self._close(batch)
+            if leader:
+                self._batch_ready.wait_for(lambda: batch.closed, self.batch_window)
+                self._close(batch)
+        if leader:
+            self._send(batch)
+        else:
+            batch.done.wait()
+        outcome = batch.outcomes[index]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def _close(self, batch: _Batch) -> None:
+        """Stop adding calls to *batch*; called with the lock held."""
+        if self._open is batch:
+            self._open = None
+        batch.closed = True
+        self._batch_ready.notify_all()
+
+    def _send(self, batch: _Batch) -> None:
+        """Send *batch* and hand every call its outcome.
+
+        If the service rejects the whole batch, the calls are sent one
+        by one instead, so that each gets its own error.
+        """
+        try:
+            body = {"operations": batch.items}
+            response = self._http.post("/batch", content=_encode(body), headers=_JSON)
+            if response.status_code in _REJECTED:
+                outcomes = [self._outcome(item) for item in batch.items]
+            else:
+                outcomes = _batch_outcomes(response)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            outcomes = [e] * len(batch.items)
+        batch.outcomes = outcomes
+        batch.done.set()
+
+    def close(self) -> None:
+        """Close the connection pool, unless it was passed in."""
+        if self._owns_http:
+            self._http.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncClient(_AsyncOperations):
+    """Asynchronous calculator client, for use from one event loop.
+
+    The calculator methods are coroutines: ``await calc.add(1, 2)``.
+
+    Args:
+        base_url: URL of the calculator service.
+        batch_window: Seconds to collect concurrent calls into one
+            ``/batch`` request, or ``None`` to send every call on its
+            own.
+        max_batch_size: Calls after which a batch is sent without
+            waiting for the rest of the window.
+        http: Existing :class:`httpx.AsyncClient` to send requests with,
+            instead of one created from *base_url* and *options*; it is
+            not closed by :meth:`aclose`.
+        **options: Further :class:`httpx.AsyncClient` arguments, such
+            as ``timeout`` or ``limits``.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        *,
+        batch_window: float | None = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        http: httpx.AsyncClient | None = None,
+        **options: Any,
+    ) -> None:
+        self._owns_http = http is None
+        self._http = http or httpx.AsyncClient(base_url=base_url, **options)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._open: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def call(self, op: str, operands: dict) -> float:
+        """Evaluate *op* on *operands* in the service.
+
+        Raises:
+            ValueError: For a rejected input or request.
+            OverflowError: For a result out of range.
+            httpx.HTTPStatusError: For any other error response.
+        """
+        window = self.batch_window
+        if window is None:
+            return await self._single(op, operands)
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue({"op": op, **operands}, future, window)
+        return await future
+
+    async def _single(self, op: str, operands: dict) -> float:
+        response = await self._http.post(
+            f"/{op}", content=_encode(operands), headers=_JSON
+        )
+        return _result(response)
+
+    async def _outcome(self, item: dict) -> float | Exception:
+        """Send one batch item on its own and return its outcome."""
+        try:
+            return await self._single(*_split(item))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return e
+
+    def _enqueue(self, item: dict, future: asyncio.Future, window: float) -> None:
+        """Add *item* to the open batch, opening one for *window* if needed."""
+        if not self._open:
+            self._timer = asyncio.get_running_loop().call_later(window, self._flush)
+        self._open.append((item, future))
+        if len(self._open) >= self.max_batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Send the open batch in its own task.
+
+        The batch does not belong to any one caller, so a caller that is
+        cancelled does not cancel it for the others.
+        """
+        calls, self._open = self._open, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self._send(calls))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, calls: list[tuple[dict, asyncio.Future]]) -> None:
+        """Send a batch and resolve every caller's future.
+
+        If the service rejects the whole batch, the calls are sent
+        concurrently one by one instead, so that each gets its own error.
+        """
+        try:
+            body = {"operations": [item for item, _ in calls]}
+            response = await self._http.post(
+                "/batch", content=_encode(body), headers=_JSON
+            )
+            if response.status_code in _REJECTED:
+                outcomes = await asyncio.gather(
+                    *(self._outcome(item) for item, _ in calls)
+                )
+            else:
+                outcomes = _batch_outcomes(response)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            outcomes = [e] * len(calls)
+        for (_, future), outcome in zip(calls, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    async def aclose(self) -> None:
+        """Send any open batch and close the pool, unless it was passed in."""
+        if self._open:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
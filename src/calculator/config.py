@@ -1,21 +1,27 @@
 """Application configuration loader.
 
-Reads config.yaml and provides access to the server and logging
+Reads config.yaml and provides access to the server, admission, cache,
+metrics, memory, precision, profiling, offload, jobs, WebSocket and logging
 configuration sections.
 """
 
+import atexit
 import logging.config
+import logging.handlers
 import os
+import queue
 from pathlib import Path
 
-import yaml
+from .log_pipeline import NonBlockingQueueHandler, SamplingFilter
 
-_DEFAULT_CONFIG_PATH = "config.yaml"
+DEFAULT_CONFIG_PATH = "config.yaml"
 
 _config: dict = {}
 
+_listener: logging.handlers.QueueListener | None = None
 
-def load_config(config_path: str = _DEFAULT_CONFIG_PATH) -> dict:
+
+def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> dict:
     """Load application configuration from a YAML file.
 
     Reads the YAML file at *config_path*, parses it, and stores the
@@ -28,25 +34,206 @@ def load_config(config_path: str = _DEFAULT_CONFIG_PATH) -> dict:
     Returns:
         The parsed configuration dictionary.
     """
+    import yaml  # pylint: disable=import-outside-toplevel
+
     _config.clear()
     config_file = Path(config_path)
     if config_file.exists():
         with open(config_file, "r", encoding="utf-8") as f:
-            _config.update(yaml.safe_load(f) or {})
+            # libyaml's loader, when available, parses several times faster.
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            _config.update(yaml.load(f, Loader=loader) or {})
     else:
         logging.warning("Config file %s not found, using defaults", config_path)
     return _config
 
 
+_SERVER_DEFAULTS = {
+    "host": "0.0.0.0",
+    "port": 8000,
+    "workers": None,
+    "loop": "auto",
+    "http": "auto",
+    "backlog": 2048,
+    "timeout_keep_alive": 5,
+    "limit_concurrency": None,
+    "limit_max_requests": None,
+    "timeout_graceful_shutdown": 30,
+    "access_log": True,
+    "preload": True,
+}
+
+
 def get_server_config() -> dict:
     """Return the server configuration section.
 
     Returns:
-        A dict with ``host`` and ``port`` keys.  Falls back to
-        ``{"host": "0.0.0.0", "port": 8000}`` when no server section
-        is present.
+        A dict with ``host``, ``port``, ``workers``, ``loop``, ``http``,
+        ``backlog``, ``timeout_keep_alive``, ``limit_concurrency``,
+        ``limit_max_requests``, ``timeout_graceful_shutdown``,
+        ``access_log`` and ``preload`` keys.  Missing keys fall back to
+        ``0.0.0.0:8000`` with one pre-forked worker per CPU core
+        (``workers: None``, ``preload: True``) and uvicorn's own
+        defaults otherwise.
+    """
+    return {**_SERVER_DEFAULTS, **_config.get("server", {})}
+
+
+def get_admission_config() -> dict:
+    """Return the admission control configuration section.
+
+    Returns:
+        A dict with ``enabled``, ``max_in_flight``, ``client_rate``,
+        ``client_burst``, ``max_clients``, ``adaptive``,
+        ``adaptive_initial``, ``adaptive_min``, ``target_latency_ms`` and
+        ``exempt_paths`` keys.  Missing keys fall back to disabled
+        admission control with a 1000 request concurrency cap, no
+        per-client rate limit and no adaptive limit.
+    """
+    defaults = {
+        "enabled": False,
+        "max_in_flight": 1000,
+        "client_rate": None,
+        "client_burst": 100,
+        "max_clients": 10000,
+        "adaptive": False,
+        "adaptive_initial": 100,
+        "adaptive_min": 10,
+        "target_latency_ms": 50,
+        "exempt_paths": ["/metrics", "/stream"],
+    }
+    return {**defaults, **_config.get("admission", {})}
+
+
+def get_cache_config() -> dict:
+    """Return the result cache configuration section.
+
+    Returns:
+        A dict with ``enabled``, ``max_size`` and ``ttl_seconds`` keys.
+        Missing keys fall back to a disabled cache of 10000 entries
+        without a time-to-live.
+    """
+    defaults = {"enabled": False, "max_size": 10000, "ttl_seconds": None}
+    return {**defaults, **_config.get("cache", {})}
+
+
+def get_metrics_config() -> dict:
+    """Return the metrics configuration section.
+
+    Returns:
+        A dict with an ``enabled`` key, ``False`` unless configured.
+    """
+    return {"enabled": False, **_config.get("metrics", {})}
+
+
+def get_memory_config() -> dict:
+    """Return the process memory report (``/memory``) configuration section.
+
+    Returns:
+        A dict with an ``enabled`` key, ``False`` unless configured.
+    """
+    return {"enabled": False, **_config.get("memory", {})}
+
+
+def get_offload_config() -> dict:
+    """Return the offload pool configuration section.
+
+    Returns:
+        A dict with ``kind`` (``"thread"`` or ``"process"``),
+        ``max_workers``, ``max_queue``, ``operations`` and ``coalesce``
+        keys.  Missing keys fall back to a thread pool with one worker
+        per CPU core, 64 queued tasks, no offloaded scalar operations,
+        and coalescing of identical concurrent offloaded operations.
+    """
+    defaults: dict = {
+        "kind": "thread",
+        "max_workers": None,
+        "max_queue": 64,
+        "operations": [],
+        "coalesce": True,
+    }
+    return {**defaults, **_config.get("offload", {})}
+
+
+def get_jobs_config() -> dict:
+    """Return the background job (``/jobs``) configuration section.
+
+    Returns:
+        A dict with ``enabled``, ``directory``, ``kind`` (``"thread"``
+        or ``"process"``), ``workers``, ``max_pending``,
+        ``max_input_bytes`` and ``retention_seconds`` keys.  Missing keys
+        fall back to disabled jobs stored under ``jobs/``, evaluated one
+        at a time per server process on a process pool, with 16 pending
+        jobs, 2 GiB inputs and finished jobs kept for a day.
+    """
+    defaults = {
+        "enabled": False,
+        "directory": "jobs",
+        "kind": "process",
+        "workers": 1,
+        "max_pending": 16,
+        "max_input_bytes": 2**31,
+        "retention_seconds": 86400,
+    }
+    return {**defaults, **_config.get("jobs", {})}
+
+
+def get_precision_config() -> dict:
+    """Return the arbitrary-precision (``/precise``) configuration section.
+
+    Returns:
+        A dict with ``mode`` (``decimal`` or ``fraction``), ``digits``
+        and ``rounding`` keys, defaulting to decimal arithmetic with 28
+        significant digits and ``ROUND_HALF_EVEN`` rounding.
     """
-    return _config.get("server", {"host": "0.0.0.0", "port": 8000})
+    defaults = {"mode": "decimal", "digits": 28, "rounding": "ROUND_HALF_EVEN"}
+    return {**defaults, **_config.get("precision", {})}
+
+
+def get_profiling_config() -> dict:
+    """Return the request profiling configuration section.
+
+    The admin token may also be supplied through the
+    ``CALCULATOR_ADMIN_TOKEN`` environment variable, which takes
+    precedence over the file.
+
+    Returns:
+        A dict with ``enabled``, ``sample_rate`` and ``admin_token``
+        keys.  Missing keys fall back to disabled profiling of 1% of
+        requests and no admin endpoints.
+    """
+    defaults = {"enabled": False, "sample_rate": 0.01, "admin_token": None}
+    profiling = {**defaults, **_config.get("profiling", {})}
+    token = os.environ.get("CALCULATOR_ADMIN_TOKEN")
+    if token:
+        profiling["admin_token"] = token
+    return profiling
+
+
+def get_websocket_config() -> dict:
+    """Return the WebSocket session configuration section.
+
+    Returns:
+        A dict with ``rate``, ``burst``, ``idle_timeout`` and
+        ``max_in_flight`` keys, defaulting to 1000 messages per second
+        with bursts of 200, a 60 second idle timeout and 64 in-flight
+        messages per connection.
+    """
+    defaults = {"rate": 1000, "burst": 200, "idle_timeout": 60, "max_in_flight": 64}
+    return {**defaults, **_config.get("websocket", {})}
+
+
+def get_log_pipeline_config() -> dict:
+    """Return the log pipeline configuration section.
+
+    Returns:
+        A dict with ``queue``, ``queue_size`` and ``sampling`` keys.
+        Missing keys fall back to logging every record through a queue:
+        scalar operations are handled on the event loop, which should
+        not wait for the log handlers.
+    """
+    defaults = {"queue": True, "queue_size": 10000, "sampling": {}}
+    return {**defaults, **_config.get("log_pipeline", {})}
 
 
 def setup_logging() -> None:
@@ -54,8 +241,11 @@ def setup_logging() -> None:
 
     Creates any log directories referenced by file handlers before
     applying the configuration.  Falls back to ``basicConfig`` at INFO
-    level when no logging section is present.
+    level when no logging section is present.  The ``log_pipeline``
+    section then optionally installs success-log sampling and moves the
+    root handlers behind a queue drained by a background thread.
     """
+    _stop_queue_listener()
     log_config = _config.get("logging")
     if log_config:
         # Ensure the log directory exists for file handlers
@@ -66,3 +256,41 @@ def setup_logging() -> None:
         logging.config.dictConfig(log_config)
     else:
         logging.basicConfig(level=logging.INFO)
+
+    pipeline = get_log_pipeline_config()
+    api_logger = logging.getLogger("calculator.api")
+    for existing in [f for f in api_logger.filters if isinstance(f, SamplingFilter)]:
+        api_logger.removeFilter(existing)
+    sampling = pipeline["sampling"]
+    if sampling.get("default", 1) > 1 or sampling.get("operations"):
+        api_logger.addFilter(
+            SamplingFilter(sampling.get("default", 1), sampling.get("operations"))
+        )
+    if pipeline["queue"]:
+        _start_queue_listener(pipeline["queue_size"])
+
+
+def _start_queue_listener(queue_size: int) -> None:
+    """Replace the root handlers with a queue drained by a listener thread."""
+    global _listener  # pylint: disable=global-statement
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def _stop_queue_listener() -> None:
+    """Flush and stop the background listener, if one is running."""
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_queue_listener)
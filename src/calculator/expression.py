@@ -0,0 +1,165 @@
+"""Arithmetic expression compiler used by the ``/evaluate`` endpoint.
+
+An expression such as ``round(sqrt(a*a + b*b), 2)`` is parsed once with
+:mod:`ast` into a tree of closures (a *plan*) that calls the
+:class:`calculator_lib.Calculator` methods directly.  Plans are kept in a
+bounded LRU keyed by the expression text, so repeated formulas are only
+parsed and validated on first use and afterwards cost one call per
+operator.
+"""
+
+import ast
+from functools import lru_cache
+from typing import Callable, Mapping
+
+from calculator_lib import Calculator
+
+from .operations import OPERATIONS, ROUND_OPERATION
+
+PLAN_CACHE_SIZE = 256
+
+Node = Callable[[Mapping[str, float]], float]
+
+_calc = Calculator()
+
+_OPERATORS: dict[type[ast.operator], str] = {
+    ast.Add: "add",
+    ast.Sub: "subtract",
+    ast.Mult: "multiply",
+    ast.Div: "divide",
+    ast.Pow: "power",
+    ast.Mod: "modulo",
+    ast.FloorDiv: "floor_divide",
+}
+
+
+# Callable names: every operation in the registry plus ``abs``; ``round``
+# is compiled separately for its optional second argument.
+_FUNCTIONS: dict[str, tuple[Callable[..., float], int]] = {
+    **{
+        op.name: (op.bind(_calc), len(op.operands))
+        for op in OPERATIONS
+        if op.name != ROUND_OPERATION
+    },
+    "abs": (_calc.absolute, 1),
+}
+
+
+class Plan:
+    """A compiled expression that can be evaluated with different variables.
+
+    Attributes:
+        expression: The source text the plan was compiled from.
+        variables: Names of the variables the expression refers to.
+    """
+
+    __slots__ = ("expression", "variables", "_root")
+
+    def __init__(self, expression: str, variables: frozenset[str], root: Node):
+        self.expression = expression
+        self.variables = variables
+        self._root = root
+
+    def __call__(self, variables: Mapping[str, float]) -> float:
+        """Evaluate the plan.
+
+        Raises:
+            ValueError: If a variable is undefined or an operation
+                rejects its input.
+        """
+        return float(self._root(variables))
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_expression(expression: str) -> Plan:
+    """Parse and validate *expression* into a reusable :class:`Plan`.
+
+    Only numeric literals, variable names, ``+ - * / ** % //``, unary
+    ``+``/``-`` and calls to the calculator operations are accepted.
+
+    Raises:
+        ValueError: If the expression is malformed or uses an
+            unsupported construct.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}") from e
+    names: set[str] = set()
+    root = _compile(tree.body, names)
+    return Plan(expression, frozenset(names), root)
+
+
+def _compile(node: ast.AST, names: set[str]) -> Node:
+    """Recursively turn an AST node into a closure."""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported literal: {node.value!r}")
+        value = float(node.value)
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        names.add(name)
+
+        def load(env: Mapping[str, float]) -> float:
+            try:
+                return env[name]
+            except KeyError:
+                raise ValueError(f"Undefined variable: {name}") from None
+
+        return load
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _compile(node.operand, names)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        return lambda env: -operand(env)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        method = _FUNCTIONS[_OPERATORS[type(node.op)]][0]
+        left = _compile(node.left, names)
+        right = _compile(node.right, names)
+        return lambda env: method(left(env), right(env))
+
+    if isinstance(node, ast.Call):
+        return _compile_call(node, names)
+
+    raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
+def _compile_call(node: ast.Call, names: set[str]) -> Node:
+    """Compile a call to one of the calculator operations."""
+    if not isinstance(node.func, ast.Name):
+        raise ValueError("Only calculator operations can be called")
+    name = node.func.id
+    if node.keywords:
+        raise ValueError(f"Keyword arguments are not supported: {name}")
+    if name != "round" and name not in _FUNCTIONS:
+        raise ValueError(f"Unknown function: {name}")
+    args = [_compile(arg, names) for arg in node.args]
+
+    if name == "round":
+        if len(args) not in (1, 2):
+            raise ValueError("round() takes 1 or 2 arguments")
+        number = args[0]
+        if len(args) == 1:
+            return lambda env: _calc.round_number(number(env))
+        digits = args[1]
+        return lambda env: _calc.round_number(number(env), _as_int(digits(env)))
+
+    method, arity = _FUNCTIONS[name]
+    if len(args) != arity:
+        raise ValueError(f"{name}() takes {arity} argument(s)")
+    if arity == 1:
+        (arg,) = args
+        return lambda env: method(arg(env))
+    first, second = args
+    return lambda env: method(first(env), second(env))
+
+
+def _as_int(value: float) -> int:
+    """Convert a round() digit count, which must be integral."""
+    if value != int(value):
+        raise ValueError("round() decimals must be an integer")
+    return int(value)
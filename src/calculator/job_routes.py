@@ -0,0 +1,175 @@
+"""Routes of the background jobs (:mod:`calculator.jobs`).
+
+The job store is the one on the app's :class:`~calculator.runtime.Runtime`;
+every route fails with an HTTP 404 Not Found error when jobs are
+disabled.
+"""
+
+import logging
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Path, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import NonNegativeInt, ValidationError
+
+from .jobs import (
+    RECORDS,
+    InputTooLarge,
+    JobFinished,
+    JobNotFinished,
+    JobNotFound,
+    JobStore,
+)
+from .models import BatchOperation, JobStatus, validation_detail
+from .runtime import dispatch, get_runtime
+from .streaming import NDJSON
+from .transport import NegotiatedRoute, media_type
+
+# Logged under the API's name, which log sampling keys on.
+logger = logging.getLogger("calculator.api")
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+# Job ids are UUID4 hex strings; anything else cannot name a job directory.
+JobId = Annotated[str, Path(pattern="^[0-9a-f]{32}$")]
+
+
+def job_result(line: bytes) -> float:
+    """Evaluate one job input line holding a ``/batch`` item.
+
+    Module-level, so that process pool workers can unpickle it.
+    """
+    try:
+        item = BatchOperation.model_validate_json(line)
+    except ValidationError as e:
+        raise ValueError(validation_detail(e)) from None
+    method, args = dispatch.bind(item.op, item.a, item.b, item.decimals)
+    return method(*args)
+
+
+def _require_jobs(request: Request) -> JobStore:
+    """Return the job store, or fail with a 404 when jobs are disabled."""
+    store = get_runtime(request).job_store
+    if store is None:
+        raise HTTPException(status_code=404, detail="Jobs are disabled")
+    return store
+
+
+def _job_status(store: JobStore, job_id: str) -> dict:
+    """Return the status of a job, or fail with a 404."""
+    try:
+        return store.status(job_id)
+    except JobNotFound as e:
+        raise HTTPException(status_code=404, detail="Job not found") from e
+
+
+@router.post(
+    "/jobs",
+    status_code=202,
+    response_model=JobStatus,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON: {"schema": {"$ref": "#/components/schemas/BatchOperation"}}
+            },
+        }
+    },
+)
+async def submit_job(request: Request):
+    """Submit a newline-delimited JSON operation set as a background job.
+
+    Each line holds one operation in the ``/batch`` item shape, as for
+    ``/stream``; the body is spooled to disk while it is received, so it
+    may be uploaded straight from a file.  Returns the job status with a
+    ``Location`` header, an HTTP 413 error when the body is too large,
+    and an HTTP 503 error when too many jobs are pending.
+    """
+    store = _require_jobs(request)
+    try:
+        status = await store.submit(request.stream())
+    except InputTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    logger.info("Job %s submitted (%d bytes)", status["id"], status["input_bytes"])
+    return JSONResponse(
+        status_code=202,
+        content=status,
+        headers={"Location": f"/jobs/{status['id']}"},
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def job_status(request: Request, job_id: JobId):
+    """Return the state and progress of a background job."""
+    return _job_status(_require_jobs(request), job_id)
+
+
+@router.get(
+    "/jobs/{job_id}/results",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                NDJSON: {"schema": {"$ref": "#/components/schemas/BatchResult"}},
+                RECORDS: {"schema": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+)
+def job_results(
+    request: Request,
+    job_id: JobId,
+    start: NonNegativeInt = 0,
+    count: NonNegativeInt | None = None,
+):
+    """Stream the results of a background job, from index ``start``.
+
+    Results are the ``/stream`` lines of the operations evaluated so far,
+    in input order, at most ``count`` of them.  With ``Accept:
+    application/octet-stream`` they are the raw 12-byte records instead:
+    a little-endian float64 result and a uint32 error code indexing the
+    job status ``errors``.
+    """
+    store = _require_jobs(request)
+    raw = any(
+        media_type(candidate) == RECORDS
+        for candidate in request.headers.get("accept", "").split(",")
+    )
+    try:
+        chunks = store.results(job_id, start, count, raw)
+    except JobNotFound as e:
+        raise HTTPException(status_code=404, detail="Job not found") from e
+    return StreamingResponse(chunks, media_type=RECORDS if raw else NDJSON)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobStatus)
+def cancel_job(request: Request, job_id: JobId):
+    """Cancel a queued or running job, keeping the results evaluated so far.
+
+    A running job stops after its current chunk of operations.  Returns
+    an HTTP 409 Conflict error when the job has already finished.
+    """
+    store = _require_jobs(request)
+    try:
+        status = store.cancel(job_id)
+    except JobNotFound as e:
+        raise HTTPException(status_code=404, detail="Job not found") from e
+    except JobFinished as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    logger.info("Job %s cancelled", job_id)
+    return status
+
+
+@router.delete("/jobs/{job_id}", status_code=204)
+def delete_job(request: Request, job_id: JobId):
+    """Remove a finished job and its results.
+
+    Returns an HTTP 409 Conflict error while the job is queued or running.
+    """
+    store = _require_jobs(request)
+    _job_status(store, job_id)
+    try:
+        store.delete(job_id)
+    except JobNotFinished as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return Response(status_code=204)
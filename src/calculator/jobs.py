@@ -0,0 +1,538 @@
+"""Background jobs for operation sets too large for one HTTP request.
+
+A job is submitted as a newline-delimited JSON (NDJSON) body of
+operations, which is spooled to disk as it is received.  A worker pool
+then evaluates it line by line and appends one fixed-size record per
+operation to a results file, so neither the input nor the results are
+held in memory and the results can be read by index while the job is
+still running.  Everything lives under one local directory, one
+subdirectory per job:
+
+``input.ndjson``
+    The submitted operations, one per line; blank lines are skipped.
+
+``results.bin``
+    One 12-byte little-endian record per operation, in input order: the
+    float64 result (NaN when the operation failed) and a uint32 error
+    code, 0 on success and otherwise the 1-based index of the detail
+    message in the job status ``errors`` list.
+
+``status.json``
+    The job state and progress, replaced atomically as the job runs.
+
+``cancel``
+    Present once cancellation was requested.
+
+``owner``
+    The pid of the server process that queued the job.
+
+Workers communicate only through these files, so a job submitted to one
+server process can be inspected, read and cancelled from any process
+sharing the directory, and a process pool works as well as a thread
+pool.  Jobs interrupted by a server restart are not resumed: once their
+owner process is gone, :meth:`JobStore.remove_expired` marks them
+failed, so that they can be deleted and expire like other finished jobs.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import struct
+import time
+import typing
+import uuid
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from pathlib import Path
+from typing import AsyncIterable, Callable, Iterator, Literal
+
+from starlette.concurrency import run_in_threadpool
+
+from .offload import POOL_KINDS, PoolSaturated
+from .operations import OPERATION_ERRORS, error_detail
+from .transport import encode_result
+
+logger = logging.getLogger(__name__)
+
+JobState = Literal["queued", "running", "completed", "cancelled", "failed"]
+FINISHED_STATES = frozenset({"completed", "cancelled", "failed"})
+
+INPUT_FILE = "input.ndjson"
+RESULTS_FILE = "results.bin"
+STATUS_FILE = "status.json"
+CANCEL_FILE = "cancel"
+OWNER_FILE = "owner"
+
+# Media type of the results served as raw records.
+RECORDS = "application/octet-stream"
+
+# float64 result, uint32 error code
+RECORD = struct.Struct("<dI")
+
+# Operations evaluated between flushes of the results and status files,
+# which is also how often cancellation is checked.
+CHUNK_SIZE = 16384
+
+MAX_LINE_LENGTH = 64 * 1024
+
+# Distinct error details recorded per job; later ones share a code.
+MAX_ERROR_MESSAGES = 1000
+_OTHER_ERROR = "Other error (too many distinct error details)"
+
+# Errors reading a status file that is missing, partly written or corrupt.
+_UNREADABLE = (OSError, ValueError)
+
+_INTERRUPTED = "Interrupted by a server restart"
+
+
+class JobNotFound(Exception):
+    """Raised when no job with the requested id exists."""
+
+
+class JobNotFinished(Exception):
+    """Raised when an operation requires a finished job."""
+
+
+class JobFinished(Exception):
+    """Raised when an operation requires a queued or running job."""
+
+
+class InputTooLarge(Exception):
+    """Raised when a submitted job body exceeds the configured size.
+
+    Attributes:
+        max_bytes: The size limit in bytes.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Job input exceeds the maximum of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+def _read_json(path: Path) -> dict:
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """Replace *path* atomically, so readers never see a partial file."""
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def _process_exists(pid: int) -> bool:
+    """Whether process *pid* is running.
+
+    Only known on POSIX systems; elsewhere every process is assumed to
+    be running, so jobs are never failed for a missing owner.
+    """
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def run_job(  # pylint: disable=too-many-locals,too-many-statements
+    directory: str,
+    evaluate: Callable[[bytes], float],
+    chunk_size: int = CHUNK_SIZE,
+    max_line_length: int = MAX_LINE_LENGTH,
+) -> str:
+    """Evaluate the input of the job in *directory* and spool its results.
+
+    Runs in a worker thread or process.  Each non-blank input line is
+    passed to *evaluate*; the :data:`~calculator.operations.OPERATION_ERRORS`
+    it raises are recorded as the error of that operation.  Every
+    *chunk_size* operations the records are flushed, the status is
+    updated, and the job stops if it was cancelled.
+
+    Returns:
+        The final job state.
+    """
+    job = Path(directory)
+    status_path = job / STATUS_FILE
+    cancel_path = job / CANCEL_FILE
+    status = _read_json(status_path)
+    if cancel_path.exists():
+        status.update(state="cancelled", finished=time.time())
+        _write_json(status_path, status)
+        return "cancelled"
+    status.update(state="running", started=time.time())
+    _write_json(status_path, status)
+
+    codes: dict[str, int] = {}
+    records = bytearray()
+    operations = failed = consumed = pending = 0
+
+    def error_code(detail: str) -> int:
+        code = codes.get(detail)
+        if code is None:
+            if len(codes) == MAX_ERROR_MESSAGES:
+                return error_code(_OTHER_ERROR)
+            code = codes[detail] = len(codes) + 1
+        return code
+
+    def flush(sink) -> None:
+        sink.write(records)
+        sink.flush()
+        records.clear()
+        status.update(
+            operations=operations,
+            failed=failed,
+            processed_bytes=consumed,
+            errors=list(codes),
+        )
+        _write_json(status_path, status)
+
+    state = "completed"
+    try:
+        with (
+            open(job / INPUT_FILE, "rb") as source,
+            open(job / RESULTS_FILE, "wb") as sink,
+        ):
+            for line in source:
+                consumed += len(line)
+                if len(line) > max_line_length:
+                    detail = (
+                        f"Line exceeds the maximum length of {max_line_length} bytes"
+                    )
+                    value, code = math.nan, error_code(detail)
+                elif not line.strip():
+                    continue
+                else:
+                    try:
+                        value, code = evaluate(line), 0
+                    except OPERATION_ERRORS as e:
+                        value, code = math.nan, error_code(error_detail(e))
+                records += RECORD.pack(value, code)
+                operations += 1
+                failed += code != 0
+                pending += 1
+                if pending == chunk_size:
+                    pending = 0
+                    flush(sink)
+                    if cancel_path.exists():
+                        state = "cancelled"
+                        break
+            flush(sink)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.exception("Job %s failed", job.name)
+        state = "failed"
+        status["detail"] = str(e)
+    status.update(state=state, finished=time.time())
+    _write_json(status_path, status)
+    logger.info(
+        "job %s(%d operations) = %s, %d failed",
+        job.name,
+        operations,
+        state,
+        failed,
+        extra={"op": "job"},
+    )
+    return state
+
+
+def encode_records(data: bytes, errors: list[str]) -> bytes:
+    """Encode results records as NDJSON lines in the ``/stream`` shape."""
+    details = [
+        b'{"result":null,"detail":' + json.dumps(detail).encode() + b"}\n"
+        for detail in errors
+    ]
+    lines = []
+    for value, code in RECORD.iter_unpack(data):
+        if code:
+            lines.append(details[code - 1])
+        else:
+            lines.append(encode_result(value)[:-1] + b',"detail":null}\n')
+    return b"".join(lines)
+
+
+class JobStore:  # pylint: disable=too-many-instance-attributes
+    """Local directory of jobs and the pool that evaluates them.
+
+    Args:
+        directory: Directory holding one subdirectory per job; created
+            on first use.
+        evaluate: Picklable callable evaluating one input line, passed
+            to :func:`run_job`.
+        kind: ``"thread"`` or ``"process"`` worker pool.
+        workers: Jobs evaluated at the same time by this store.
+        max_pending: Jobs queued or running in this store before new
+            submissions are rejected with
+            :class:`~calculator.offload.PoolSaturated`.
+        max_input_bytes: Largest accepted job body.
+        retention_seconds: Age after which finished jobs are removed,
+            or ``None`` to keep them until deleted.
+
+    Raises:
+        ValueError: If *kind* is not a known pool kind.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        directory: str,
+        evaluate: Callable[[bytes], float],
+        kind: str = "thread",
+        workers: int = 1,
+        max_pending: int = 16,
+        max_input_bytes: int = 2**31,
+        retention_seconds: float | None = 86400,
+    ) -> None:
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.directory = Path(directory)
+        self.evaluate = evaluate
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_input_bytes = max_input_bytes
+        self.retention_seconds = retention_seconds
+        self.submitted = 0
+        self.rejected = 0
+        self._futures: dict[str, Future] = {}
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="calculator-job"
+                )
+        return self._executor
+
+    def _path(self, job_id: str) -> Path:
+        path = self.directory / job_id
+        if not (path / STATUS_FILE).exists():
+            raise JobNotFound(job_id)
+        return path
+
+    async def submit(self, chunks: AsyncIterable[bytes]) -> dict:
+        """Spool a job body to disk and queue the job.
+
+        Returns:
+            The status of the new job.
+
+        Raises:
+            PoolSaturated: If :attr:`max_pending` jobs are already queued
+                or running.
+            InputTooLarge: If the body exceeds :attr:`max_input_bytes`.
+        """
+        if len(self._futures) >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturated()
+        # File system work runs in threads, off the event loop.
+        await run_in_threadpool(self.remove_expired)
+        job_id = uuid.uuid4().hex
+        path = self.directory / job_id
+        f = await run_in_threadpool(self._create, path)
+        size = 0
+        try:
+            with f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_input_bytes:
+                        raise InputTooLarge(self.max_input_bytes)
+                    await run_in_threadpool(f.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+            raise
+        status = {
+            "id": job_id,
+            "state": "queued",
+            "operations": 0,
+            "failed": 0,
+            "input_bytes": size,
+            "processed_bytes": 0,
+            "errors": [],
+            "detail": None,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+        }
+        await run_in_threadpool(_write_json, path / STATUS_FILE, status)
+        future = self._get_executor().submit(run_job, str(path), self.evaluate)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+        self.submitted += 1
+        return status
+
+    @staticmethod
+    def _create(path: Path) -> typing.BinaryIO:
+        """Create the directory of a new job and open its input file."""
+        path.mkdir(parents=True)
+        (path / OWNER_FILE).write_text(str(os.getpid()), encoding="ascii")
+        return open(path / INPUT_FILE, "wb")  # pylint: disable=consider-using-with
+
+    def status(self, job_id: str) -> dict:
+        """Return the status of a job.
+
+        Raises:
+            JobNotFound: If there is no such job.
+        """
+        return _read_json(self._path(job_id) / STATUS_FILE)
+
+    def cancel(self, job_id: str) -> dict:
+        """Request cancellation of a job and return its status.
+
+        A queued job of this store is cancelled at once; a running one
+        stops after its current chunk, keeping the results evaluated so
+        far.
+
+        Raises:
+            JobNotFound: If there is no such job.
+            JobFinished: If the job has already finished.
+        """
+        path = self._path(job_id)
+        status = _read_json(path / STATUS_FILE)
+        if status["state"] in FINISHED_STATES:
+            raise JobFinished(f"Job {job_id} has already finished")
+        (path / CANCEL_FILE).touch()
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            status.update(state="cancelled", finished=time.time())
+            _write_json(path / STATUS_FILE, status)
+        return status
+
+    def delete(self, job_id: str) -> None:
+        """Remove a finished job and its files.
+
+        Raises:
+            JobNotFound: If there is no such job.
+            JobNotFinished: If the job is still queued or running.
+        """
+        path = self._path(job_id)
+        if _read_json(path / STATUS_FILE)["state"] not in FINISHED_STATES:
+            raise JobNotFinished(f"Job {job_id} has not finished")
+        shutil.rmtree(path, ignore_errors=True)
+
+    def results(
+        self,
+        job_id: str,
+        start: int = 0,
+        count: int | None = None,
+        raw: bool = False,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Return the results of a job from index *start*.
+
+        Only operations already evaluated are returned, so a running job
+        yields a prefix of its results.  The results file is memory
+        mapped and read *chunk_size* records at a time.
+
+        Args:
+            job_id: The job id.
+            start: Index of the first operation.
+            count: Maximum number of operations, or ``None`` for all.
+            raw: Yield the binary records instead of NDJSON lines.
+            chunk_size: Records per yielded chunk.
+
+        Raises:
+            JobNotFound: If there is no such job.
+        """
+        path = self._path(job_id)
+        status = _read_json(path / STATUS_FILE)
+        stop = status["operations"]
+        if count is not None:
+            stop = min(stop, start + count)
+        return self._read_records(
+            path / RESULTS_FILE,
+            start,
+            stop,
+            None if raw else status["errors"],
+            chunk_size,
+        )
+
+    @staticmethod
+    def _read_records(
+        path: Path, start: int, stop: int, errors: list[str] | None, chunk_size: int
+    ) -> Iterator[bytes]:
+        if start >= stop:
+            return
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), stop * RECORD.size, access=mmap.ACCESS_READ) as data,
+        ):
+            step = chunk_size * RECORD.size
+            for offset in range(start * RECORD.size, stop * RECORD.size, step):
+                chunk = data[offset : min(offset + step, stop * RECORD.size)]
+                yield chunk if errors is None else encode_records(chunk, errors)
+
+    def _orphaned(self, path: Path) -> bool:
+        """Whether the unfinished job in *path* has lost its owner process."""
+        if path.name in self._futures:
+            return False
+        try:
+            pid = int((path / OWNER_FILE).read_text(encoding="ascii"))
+        except _UNREADABLE:
+            return True
+        return pid != os.getpid() and not _process_exists(pid)
+
+    def remove_expired(self) -> int:
+        """Remove finished jobs older than :attr:`retention_seconds`.
+
+        Queued or running jobs whose owner process no longer runs, left
+        behind by a crash or restart, are marked failed first; they then
+        expire like any other finished job.
+
+        Returns:
+            The number of jobs removed.
+        """
+        if not self.directory.is_dir():
+            return 0
+        now = time.time()
+        removed = 0
+        for path in self.directory.iterdir():
+            try:
+                status = _read_json(path / STATUS_FILE)
+            except _UNREADABLE:
+                continue
+            if status.get("state") not in FINISHED_STATES:
+                if self._orphaned(path):
+                    logger.warning(
+                        "Job %s was interrupted, marking it failed", path.name
+                    )
+                    status.update(state="failed", detail=_INTERRUPTED, finished=now)
+                    _write_json(path / STATUS_FILE, status)
+                continue
+            if self.retention_seconds is None:
+                continue
+            if (status.get("finished") or 0) < now - self.retention_seconds:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def shutdown(self) -> None:
+        """Cancel the jobs of this store and stop its workers."""
+        for job_id in list(self._futures):
+            try:
+                self.cancel(job_id)
+            except (JobNotFound, JobFinished):
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Return the store counters."""
+        return {
+            "pending": len(self._futures),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+        }
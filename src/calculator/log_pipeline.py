@@ -0,0 +1,87 @@
+"""Logging building blocks for keeping log I/O off the request path.
+
+Provides a queue handler that never blocks the caller, a per-operation
+sampling filter for success logs, and a compact JSON-lines formatter.
+:func:`calculator.config.setup_logging` wires them together from the
+``log_pipeline`` section of ``config.yaml``.
+"""
+
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that hands records to a background listener.
+
+    Unlike :class:`logging.handlers.QueueHandler` the record is not
+    formatted on the calling thread: the handlers behind the listener
+    format it on the writer thread instead.  When the queue is full the
+    record is dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in *N* success records per operation.
+
+    Records at WARNING level or above always pass, as do records that do
+    not carry an ``op`` attribute (passed through ``extra``).
+
+    Args:
+        default: Sampling rate applied to operations without an
+            explicit entry; 1 keeps every record.
+        operations: Mapping of operation name to sampling rate.
+    """
+
+    def __init__(self, default: int = 1, operations: dict | None = None) -> None:
+        super().__init__()
+        self.default = max(1, int(default))
+        self.rates = {op: max(1, int(n)) for op, n in (operations or {}).items()}
+        self._counters: dict[str, itertools.count] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        op = getattr(record, "op", None)
+        if op is None:
+            return True
+        rate = self.rates.get(op, self.default)
+        if rate == 1:
+            return True
+        counter = self._counters.get(op)
+        if counter is None:
+            counter = self._counters.setdefault(op, itertools.count())
+        return next(counter) % rate == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as compact single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        op = getattr(record, "op", None)
+        if op is not None:
+            entry["op"] = op
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), default=str)
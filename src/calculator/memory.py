@@ -0,0 +1,96 @@
+"""Unique and shared memory of the server processes.
+
+Reads ``/proc/<pid>/smaps_rollup`` (Linux 4.14+), which sums the memory
+mappings of a process by how they are shared:
+
+* ``uss`` (unique set size): private pages, freed if the process exits;
+  the real cost of one more worker;
+* ``shared``: pages also mapped by other processes, such as the heap a
+  pre-forked worker inherits from its supervisor until either writes it;
+* ``pss`` (proportional set size): private pages plus each shared page
+  divided by the number of processes sharing it, so the PSS of all
+  processes adds up to their total footprint;
+* ``rss``: every resident page, shared or not.
+
+:data:`supervisor_pid` is set by the pre-fork launcher, so that every
+worker can report its siblings as well as itself.
+"""
+
+import gc
+import os
+from pathlib import Path
+
+# Pid of the pre-fork supervisor of this worker, if any.
+supervisor_pid: int | None = None
+
+_PROC = Path("/proc")
+
+_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "uss",
+    "Private_Dirty": "uss",
+    "Swap": "swap",
+}
+
+
+def available() -> bool:
+    """Whether the memory of this process can be read."""
+    return (_PROC / "self" / "smaps_rollup").exists()
+
+
+def process_memory(pid: int | str = "self") -> dict[str, int]:
+    """Return the ``rss``, ``pss``, ``uss``, ``shared`` and ``swap`` of *pid*.
+
+    All sizes are in bytes.
+
+    Raises:
+        OSError: If the process does not exist or cannot be read.
+    """
+    memory = dict.fromkeys(("rss", "pss", "uss", "shared", "swap"), 0)
+    with open(_PROC / str(pid) / "smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            field = _FIELDS.get(name)
+            if field is not None:
+                memory[field] += int(value.split()[0]) * 1024
+    return memory
+
+
+def worker_pids() -> list[int]:
+    """Return the pids of this worker and its pre-forked siblings."""
+    if supervisor_pid is None:
+        return [os.getpid()]
+    children = _PROC / str(supervisor_pid) / "task" / str(supervisor_pid) / "children"
+    try:
+        return sorted(int(pid) for pid in children.read_text().split())
+    except OSError:
+        return [os.getpid()]
+
+
+def report() -> dict:
+    """Return the memory of this process, its siblings and their supervisor.
+
+    Processes that exit while being read are left out.
+    """
+    workers = []
+    for pid in worker_pids():
+        try:
+            workers.append({"pid": pid, **process_memory(pid)})
+        except OSError:
+            continue
+    supervisor = None
+    if supervisor_pid is not None:
+        try:
+            supervisor = {"pid": supervisor_pid, **process_memory(supervisor_pid)}
+        except OSError:
+            pass
+    return {
+        "pid": os.getpid(),
+        "preloaded": supervisor_pid is not None,
+        "gc_frozen": gc.get_freeze_count(),
+        "supervisor": supervisor,
+        "workers": workers,
+    }
@@ -0,0 +1,257 @@
+"""In-process request metrics in the Prometheus text exposition format.
+
+:class:`MetricsMiddleware` counts requests per route and status, tracks
+in-flight requests and records latency histograms.  Handlers report how
+the latency splits into request validation (body parsing and pydantic)
+and calculator compute time through :func:`current_timing`.
+
+All histogram and counter updates happen in the middleware, on the event
+loop thread, so the recording path needs no locks: it is a dict lookup,
+a :func:`bisect.bisect_left` over the bucket bounds and a few integer
+increments per request.
+"""
+
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+OTHER_ROUTE = "other"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestTiming:
+    """Per-request timestamps shared between the middleware and handlers.
+
+    Attributes:
+        start: ``perf_counter`` value when the request entered the app.
+        validation: Seconds spent before the handler first computed,
+            i.e. body parsing and request model validation.
+        compute: Seconds spent in calculator calls.
+    """
+
+    __slots__ = ("start", "validation", "compute")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.validation = 0.0
+        self.compute = 0.0
+
+
+_timing: ContextVar[RequestTiming | None] = ContextVar("_timing", default=None)
+
+
+def current_timing() -> RequestTiming | None:
+    """Return the timing record of the request being handled, if any."""
+    return _timing.get()
+
+
+class Histogram:
+    """Cumulative-bucket histogram with fixed upper bounds."""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        """Return the exposition lines for this histogram."""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RouteMetrics:
+    """Counters and histograms for a single route."""
+
+    __slots__ = ("statuses", "in_flight", "latency", "validation", "compute")
+
+    def __init__(self) -> None:
+        self.statuses: dict[int, int] = {}
+        self.in_flight = 0
+        self.latency = Histogram()
+        self.validation = Histogram()
+        self.compute = Histogram()
+
+
+class MetricsRegistry:
+    """Holds the metrics of every route and renders them as text."""
+
+    def __init__(self) -> None:
+        self.routes: dict[str, RouteMetrics] = {}
+
+    def route(self, label: str) -> RouteMetrics:
+        """Return the metrics for *label*, creating them on first use."""
+        metrics = self.routes.get(label)
+        if metrics is None:
+            metrics = self.routes.setdefault(label, RouteMetrics())
+        return metrics
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        routes = sorted(self.routes.items())
+        lines = [
+            "# HELP calculator_requests_total Requests handled, by route and status.",
+            "# TYPE calculator_requests_total counter",
+        ]
+        for label, metrics in routes:
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(
+                    f'calculator_requests_total{{route="{label}",status="{status}"}}'
+                    f" {count}"
+                )
+        lines += [
+            "# HELP calculator_requests_in_flight Requests currently being handled.",
+            "# TYPE calculator_requests_in_flight gauge",
+        ]
+        for label, metrics in routes:
+            lines.append(
+                f'calculator_requests_in_flight{{route="{label}"}} {metrics.in_flight}'
+            )
+        for name, attr, help_text in (
+            ("request_duration_seconds", "latency", "Total request latency."),
+            (
+                "request_validation_seconds",
+                "validation",
+                "Time spent parsing and validating the request body.",
+            ),
+            (
+                "request_compute_seconds",
+                "compute",
+                "Time spent in calculator operations.",
+            ),
+        ):
+            lines += [
+                f"# HELP calculator_{name} {help_text}",
+                f"# TYPE calculator_{name} histogram",
+            ]
+            for label, metrics in routes:
+                histogram = getattr(metrics, attr)
+                if histogram.count:
+                    lines += histogram.render(f"calculator_{name}", f'route="{label}"')
+        return "\n".join(lines) + "\n"
+
+
+def render_counters(prefix: str, counters: dict, help_text: str) -> str:
+    """Render the numeric entries of a flat counters dict as gauges."""
+    lines = []
+    for key, value in counters.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# HELP {prefix}_{key} {help_text}")
+            lines.append(f"# TYPE {prefix}_{key} gauge")
+            lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class RouteLabeler:
+    """Maps request paths to bounded route labels.
+
+    Static paths map to themselves and templated paths (such as
+    ``/vector/{op}``) to their template; anything else is ``other``.
+    The routes are indexed on first use, from *app*, the app wrapped by
+    the middleware using the labeler, or else from the app serving the
+    request.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self._static: dict[str, str] | None = None
+        self._templated: list[tuple[re.Pattern, str]] = []
+
+    def _index(self, routes) -> dict[str, str]:
+        static = {}
+        for route in routes:
+            path = getattr(route, "path", None)
+            if path is None:
+                continue
+            if getattr(route, "param_convertors", None):
+                self._templated.append((route.path_regex, path))
+            else:
+                static[path] = path
+        return static
+
+    def __call__(self, scope) -> str:
+        """Return the route label of the request in *scope*."""
+        if self._static is None:
+            routes = getattr(self.app, "routes", None) or scope["app"].routes
+            self._static = self._index(routes)
+        path = scope["path"]
+        label = self._static.get(path)
+        if label is not None:
+            return label
+        for regex, template in self._templated:
+            if regex.match(path):
+                return template
+        return OTHER_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request metrics into a registry."""
+
+    def __init__(self, app, registry: MetricsRegistry) -> None:
+        self.app = app
+        self.registry = registry
+        self._labeler = RouteLabeler(app)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics = self.registry.route(self._labeler(scope))
+        timing = RequestTiming(time.perf_counter())
+        token = _timing.set(timing)
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            _timing.reset(token)
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.latency.observe(time.perf_counter() - timing.start)
+            if timing.validation:
+                metrics.validation.observe(timing.validation)
+                metrics.compute.observe(timing.compute)
@@ -0,0 +1,307 @@
+"""Request and response models of the REST endpoints.
+
+Non-finite results are serialized as the strings ``"Infinity"``,
+``"-Infinity"`` and ``"NaN"``, which strict JSON has no literal for.
+"""
+
+from typing import Annotated, Literal
+
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    ConfigDict,
+    Field,
+    StrictFloat,
+    StrictInt,
+    ValidationError,
+    WithJsonSchema,
+    model_validator,
+)
+
+from .jobs import JobState
+from .operations import OPERATIONS_BY_NAME
+from .precision import (
+    MAX_DECIMALS,
+    MAX_DIGITS,
+    MAX_OPERAND_LENGTH,
+    PrecisionMode,
+)
+
+MAX_BATCH_SIZE = 10_000
+MAX_VECTOR_LENGTH = 1_000_000
+
+
+class ProfilingSettings(BaseModel):
+    """Request body for changing the profiling settings at runtime."""
+
+    enabled: bool | None = None
+    sample_rate: float | None = Field(default=None, ge=0, le=1)
+
+
+class OperationRequest(BaseModel):
+    """Request body for two-operand operations."""
+
+    a: float
+    b: float
+
+
+class SingleOperandRequest(BaseModel):
+    """Request body for single-operand operations."""
+
+    a: float
+
+
+class RoundRequest(BaseModel):
+    """Request body for the rounding operation."""
+
+    a: float
+    decimals: int = 0
+
+
+# Strict JSON has no literal for non-finite floats; they are encoded as
+# "Infinity", "-Infinity" and "NaN" (see calculator.transport).
+NON_FINITE_AS_STRINGS = ConfigDict(ser_json_inf_nan="strings")
+
+# A result float, documented with its non-finite string encodings.
+ResultFloat = Annotated[
+    float,
+    WithJsonSchema(
+        {
+            "anyOf": [
+                {"type": "number"},
+                {"type": "string", "enum": ["Infinity", "-Infinity", "NaN"]},
+            ]
+        }
+    ),
+]
+
+
+def _check_operation_name(name: str) -> str:
+    if name not in OPERATIONS_BY_NAME:
+        raise ValueError(f"Unknown operation: {name}")
+    return name
+
+
+# The name of a registry operation, documented as an enum of the names.
+OperationName = Annotated[
+    str,
+    AfterValidator(_check_operation_name),
+    WithJsonSchema({"type": "string", "enum": list(OPERATIONS_BY_NAME)}),
+]
+
+
+class OperationResponse(BaseModel):
+    """Standard response body containing a single float result.
+
+    The operation endpoints return it pre-encoded as a
+    :class:`~calculator.transport.ResultResponse`.
+    """
+
+    model_config = NON_FINITE_AS_STRINGS
+
+    result: ResultFloat
+
+
+class BatchOperation(BaseModel):
+    """A single named operation inside a batch request.
+
+    The operands are optional here: an operation missing one it requires
+    is reported in the ``detail`` of its own result.
+    """
+
+    op: OperationName
+    a: float | None = None
+    b: float | None = None
+    decimals: int = 0
+
+
+class BatchRequest(BaseModel):
+    """Request body for the batch endpoint."""
+
+    operations: list[BatchOperation] = Field(max_length=MAX_BATCH_SIZE)
+
+
+class BatchResult(BaseModel):
+    """Outcome of one batch operation: either a result or an error detail."""
+
+    model_config = NON_FINITE_AS_STRINGS
+
+    result: ResultFloat | None = None
+    detail: str | None = None
+
+
+class BatchResponse(BaseModel):
+    """Response body for the batch endpoint, in request order."""
+
+    results: list[BatchResult]
+
+
+class SessionOperation(BatchOperation):
+    """A tagged operation message sent over the WebSocket endpoint."""
+
+    id: int | str | None = None
+
+
+class SessionResult(BatchResult):
+    """Reply to a WebSocket operation message, tagged with its ``id``."""
+
+    id: int | str | None = None
+
+
+class ExpressionRequest(BaseModel):
+    """Request body for the expression endpoint."""
+
+    expression: str = Field(max_length=1000)
+    variables: dict[str, float] = {}
+
+
+# Strings carry operands of any precision; JSON numbers are read as
+# the literal the client wrote (see calculator.precision).
+PreciseOperand = (
+    StrictInt | StrictFloat | Annotated[str, Field(max_length=MAX_OPERAND_LENGTH)]
+)
+
+
+class PreciseRequest(BaseModel):
+    """Request body for the arbitrary-precision endpoints.
+
+    ``mode`` and ``digits`` default to the ``precision`` configuration.
+    """
+
+    a: PreciseOperand
+    b: PreciseOperand | None = None
+    decimals: int = Field(default=0, ge=-MAX_DECIMALS, le=MAX_DECIMALS)
+    mode: PrecisionMode | None = None
+    digits: int | None = Field(default=None, ge=1, le=MAX_DIGITS)
+
+
+class PreciseResponse(BaseModel):
+    """Exact or decimal result, as a string, and the mode it was computed in."""
+
+    result: str
+    mode: PrecisionMode
+
+
+class VectorRequest(BaseModel):
+    """Request body for the columnar endpoints.
+
+    ``b`` is required by two-operand operations and must have the same
+    length as ``a``.
+    """
+
+    a: list[float] = Field(max_length=MAX_VECTOR_LENGTH)
+    b: list[float] | None = Field(default=None, max_length=MAX_VECTOR_LENGTH)
+    decimals: int = 0
+
+    @model_validator(mode="after")
+    def _check_lengths(self):
+        if self.b is not None and len(self.b) != len(self.a):
+            raise ValueError("Operands 'a' and 'b' must have the same length")
+        return self
+
+
+class VectorError(BaseModel):
+    """Indices of the elements rejected with the same error detail."""
+
+    detail: str
+    indices: list[int]
+
+
+class VectorResponse(BaseModel):
+    """Response body for the columnar endpoints.
+
+    Elements listed in ``errors`` have a ``null`` result.
+    """
+
+    model_config = NON_FINITE_AS_STRINGS
+
+    result: list[ResultFloat | None]
+    errors: list[VectorError]
+
+
+class TabulateRequest(BaseModel):
+    """Request body for the tabulation endpoints.
+
+    Operand ``operand`` runs over the range given by ``start``, ``stop``
+    and either ``step`` (``stop`` excluded) or ``count`` (``stop``
+    included); two-operand operations hold the other one at ``value``.
+    """
+
+    start: float
+    stop: float
+    step: float | None = None
+    count: int | None = Field(default=None, ge=1)
+    operand: Literal["a", "b"] = "a"
+    value: float | None = None
+    decimals: int = 0
+
+    @model_validator(mode="after")
+    def _check_range(self):
+        if (self.step is None) == (self.count is None):
+            raise ValueError("Exactly one of 'step' and 'count' is required")
+        return self
+
+
+class TabulateResult(BaseModel):
+    """One line of a tabulation: a point and either a result or an error detail."""
+
+    model_config = NON_FINITE_AS_STRINGS
+
+    x: ResultFloat
+    result: ResultFloat | None = None
+    detail: str | None = None
+
+
+ReductionName = Literal["sum", "product", "mean", "min", "max", "dot"]
+
+
+class ReductionRequest(BaseModel):
+    """Request body for the reduction endpoints.
+
+    ``b`` is required by ``dot`` and must have the same length as ``a``.
+    """
+
+    a: list[float] = Field(max_length=MAX_VECTOR_LENGTH)
+    b: list[float] | None = Field(default=None, max_length=MAX_VECTOR_LENGTH)
+
+    @model_validator(mode="after")
+    def _check_lengths(self):
+        if self.b is not None and len(self.b) != len(self.a):
+            raise ValueError("Operands 'a' and 'b' must have the same length")
+        return self
+
+
+class CumulativeResponse(BaseModel):
+    """Response body of the cumulative sum: the running totals of ``a``."""
+
+    model_config = NON_FINITE_AS_STRINGS
+
+    result: list[ResultFloat]
+
+
+class JobStatus(BaseModel):
+    """State and progress of a background job.
+
+    ``operations`` counts the operations evaluated so far, ``failed``
+    those that failed, and error code *n* of the binary results is the
+    detail ``errors[n - 1]``.  Times are Unix timestamps.
+    """
+
+    id: str
+    state: JobState
+    operations: int
+    failed: int
+    input_bytes: int
+    processed_bytes: int
+    errors: list[str]
+    detail: str | None = None
+    created: float
+    started: float | None = None
+    finished: float | None = None
+
+
+def validation_detail(error: ValidationError) -> str:
+    """Summarize the first validation error as a single detail message."""
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
@@ -0,0 +1,113 @@
+"""Bounded executor pool for bulk and expensive work.
+
+Cheap scalar operations run inline on the event loop.  Work that can take
+long enough to stall it (bulk endpoints and any operation listed in the
+``offload:`` configuration) is submitted to an :class:`OffloadPool`
+instead.  The pool admits at most ``max_workers + max_queue`` tasks at a
+time and rejects the rest immediately with :class:`PoolSaturated`, which
+the API turns into a 503, so a burst of heavy requests fails fast
+instead of queueing without bound.
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+POOL_KINDS = ("thread", "process")
+
+
+class PoolSaturated(Exception):
+    """Raised when an :class:`OffloadPool` has no room for another task.
+
+    Attributes:
+        retry_after: Suggested seconds before retrying.
+    """
+
+    def __init__(self, retry_after: int = 1) -> None:
+        super().__init__("Server is busy, retry later")
+        self.retry_after = retry_after
+
+
+class OffloadPool:
+    """Thread or process pool with a bound on admitted tasks.
+
+    Args:
+        kind: ``"thread"`` or ``"process"``.  Process pools require the
+            submitted callables and their arguments to be picklable.
+        max_workers: Pool size, or ``None`` for one worker per CPU core.
+        max_queue: Tasks allowed to wait for a free worker before new
+            submissions are rejected.
+
+    Raises:
+        ValueError: If *kind* is not a known pool kind.
+    """
+
+    def __init__(
+        self, kind: str = "thread", max_workers: int | None = None, max_queue: int = 64
+    ) -> None:
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor: Executor | None = None
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of tasks admitted at once."""
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="calculator-offload"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run ``fn(*args)`` in the pool and return its result.
+
+        Must be called from the event loop thread.  A task counts as
+        pending until it finishes in the pool, even if the caller is
+        cancelled first, since cancellation cannot stop a running task.
+
+        Raises:
+            PoolSaturated: If the pool already holds :attr:`capacity`
+                tasks.
+        """
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturated()
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(fn, *args)
+        self.pending += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._task_done))
+        return await asyncio.wrap_future(future)
+
+    def _task_done(self) -> None:
+        self.pending -= 1
+        self.completed += 1
+
+    def shutdown(self) -> None:
+        """Stop the workers, waiting for running tasks to finish."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Return the pool configuration and counters."""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,90 @@
+"""Routes of the scalar operations, generated from the registry.
+
+One ``POST /{name}`` route is added to :data:`router` per entry of
+:data:`~calculator.operations.OPERATIONS`; :mod:`calculator.api` includes
+them ahead of the bulk endpoints.
+"""
+
+import inspect
+import logging
+from operator import attrgetter
+from typing import Any, Awaitable, Callable, cast
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel
+
+from .models import (
+    OperationRequest,
+    OperationResponse,
+    RoundRequest,
+    SingleOperandRequest,
+)
+from .operations import BINARY, OPERATIONS, ROUNDING, UNARY, Operation
+from .runtime import calc, get_runtime
+from .transport import NegotiatedRoute, ResultResponse
+
+# Logged under the API's name, which log sampling and the metrics
+# middleware key on.
+logger = logging.getLogger("calculator.api")
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+
+def _operation_endpoint(
+    operation: Operation, model: type[BaseModel]
+) -> Callable[..., Awaitable[Response]]:
+    """Build the route handler of a registry operation.
+
+    Everything an operation needs is resolved here, once: the bound
+    calculator method, an operand getter and the log formats.
+    """
+    name = operation.name
+    method = operation.bind(calc)
+    getter = attrgetter(*operation.operands)
+    unpack = getter if len(operation.operands) > 1 else lambda req: (getter(req),)
+    debug_format = f"POST /{name}: " + ", ".join(
+        f"{field}=%s" for field in operation.operands
+    )
+    info_format = f"{name}({', '.join('%s' for _ in operation.operands)}) = %s"
+    extra = {"op": name}
+
+    async def endpoint(request, req):
+        args = unpack(req)
+        logger.debug(debug_format, *args)
+        try:
+            result = await get_runtime(request).run(name, method, *args)
+        except ValueError as e:
+            logger.warning("Validation error on /%s: %s", name, e)
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        logger.info(info_format, *args, result, extra=extra)
+        return ResultResponse(result)
+
+    endpoint.__name__ = endpoint.__qualname__ = operation.endpoint or name
+    endpoint.__doc__ = operation.description
+    # FastAPI reads the parameters of the route from the signature.
+    cast(Any, endpoint).__signature__ = inspect.Signature(
+        [
+            inspect.Parameter(
+                "request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request
+            ),
+            inspect.Parameter(
+                "req", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=model
+            ),
+        ]
+    )
+    return endpoint
+
+
+_REQUEST_MODELS: dict[tuple[str, ...], type[BaseModel]] = {
+    BINARY: OperationRequest,
+    UNARY: SingleOperandRequest,
+    ROUNDING: RoundRequest,
+}
+
+for _operation in OPERATIONS:
+    router.add_api_route(
+        f"/{_operation.name}",
+        _operation_endpoint(_operation, _REQUEST_MODELS[_operation.operands]),
+        methods=["POST"],
+        response_model=OperationResponse,
+    )
@@ -0,0 +1,256 @@
+"""Declarative registry of the calculator operations.
+
+:data:`OPERATIONS` describes every operation exposed by the REST API:
+its name, the :class:`calculator_lib.Calculator` method implementing it,
+its operands, the domain checks the calculator itself does not make,
+and its documentation.  The per-operation REST routes, the bulk
+dispatcher used by ``/batch``, ``/stream`` and ``/ws``, the expression
+functions and the OpenAPI descriptions are all generated from it, so
+adding an operation is a matter of adding an entry here.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Callable
+
+from calculator_lib import Calculator
+
+# Operand field names of each operation shape.
+BINARY = ("a", "b")
+UNARY = ("a",)
+ROUNDING = ("a", "decimals")
+
+
+def _check_power(a: float, b: float) -> None:
+    if a == 0 and b < 0:
+        raise ValueError("0.0 cannot be raised to a negative power")
+    if a < 0 and not float(b).is_integer():
+        raise ValueError("Result is not a real number")
+
+
+# The calculator raises OverflowError for these, as for a result out of
+# range, although it is the input that has no integral value.
+def _check_floor(a: float) -> None:
+    if math.isinf(a):
+        raise ValueError("Cannot take floor of an infinite number")
+
+
+def _check_ceil(a: float) -> None:
+    if math.isinf(a):
+        raise ValueError("Cannot take ceiling of an infinite number")
+
+
+@dataclass(frozen=True)
+class Operation:
+    """Description of one calculator operation.
+
+    Attributes:
+        name: Operation name, also its route path and ``op`` value.
+        method: Name of the :class:`Calculator` method implementing it.
+        operands: Operand field names, one of :data:`BINARY`,
+            :data:`UNARY` and :data:`ROUNDING`.
+        summary: One-sentence description of the result.
+        rejects: The inputs rejected with an HTTP 400 error, if any, as
+            completed by "Returns an HTTP 400 Bad Request error on ...".
+        check: Domain check run on the operands before the method,
+            raising ValueError for inputs the calculator would not
+            reject itself.
+        endpoint: Name of the generated route handler, which determines
+            the route's OpenAPI ``operationId`` and summary; defaults to
+            *name*.
+    """
+
+    name: str
+    method: str
+    operands: tuple[str, ...]
+    summary: str
+    rejects: str | None = None
+    check: Callable[..., None] | None = None
+    endpoint: str | None = None
+
+    @property
+    def description(self) -> str:
+        """The route description: the summary and the rejected inputs."""
+        if self.rejects is None:
+            return self.summary
+        return (
+            f"{self.summary} Returns an HTTP 400 Bad Request error on {self.rejects}."
+        )
+
+    def bind(self, calc: Calculator) -> Callable[..., float]:
+        """Return the method of *calc* implementing this operation.
+
+        The result can be pickled, so it can run on a process pool.
+        """
+        method = getattr(calc, self.method)
+        if self.check is None:
+            return method
+        return _Checked(method, self.check)
+
+
+class _Checked:
+    """Calculator method preceded by its domain check.
+
+    A module-level class rather than a closure so that it pickles.
+    """
+
+    __slots__ = ("method", "check")
+
+    def __init__(
+        self, method: Callable[..., float], check: Callable[..., None]
+    ) -> None:
+        self.method = method
+        self.check = check
+
+    def __call__(self, *args) -> float:
+        self.check(*args)
+        return self.method(*args)
+
+
+OPERATIONS: tuple[Operation, ...] = (
+    # Core Arithmetic
+    Operation("add", "add", BINARY, "Return the sum of two numbers."),
+    Operation("subtract", "subtract", BINARY, "Return the difference of two numbers."),
+    Operation("multiply", "multiply", BINARY, "Return the product of two numbers."),
+    Operation(
+        "divide",
+        "divide",
+        BINARY,
+        "Return the quotient of two numbers.",
+        rejects="division by zero",
+    ),
+    # Power & Roots
+    Operation(
+        "power",
+        "power",
+        BINARY,
+        "Return a raised to the power b.",
+        rejects="a zero base with a negative exponent or a non-real result",
+        check=_check_power,
+    ),
+    Operation(
+        "sqrt", "sqrt", UNARY, "Return the square root.", rejects="negative input"
+    ),
+    Operation(
+        "nth_root",
+        "nth_root",
+        BINARY,
+        "Return the b-th root of a.",
+        rejects="invalid input",
+    ),
+    # Modulo & Integer Math
+    Operation("modulo", "modulo", BINARY, "Return a mod b.", rejects="modulo by zero"),
+    Operation(
+        "floor_divide",
+        "floor_divide",
+        BINARY,
+        "Return the floor division of a by b.",
+        rejects="division by zero",
+    ),
+    # Absolute & Rounding
+    Operation("absolute", "absolute", UNARY, "Return the absolute value."),
+    Operation(
+        "round",
+        "round_number",
+        ROUNDING,
+        "Return a rounded to the given number of decimal places.",
+        endpoint="round_number",
+    ),
+    Operation(
+        "floor",
+        "floor",
+        UNARY,
+        "Return the floor of a.",
+        rejects="an infinite input",
+        check=_check_floor,
+    ),
+    Operation(
+        "ceil",
+        "ceil",
+        UNARY,
+        "Return the ceiling of a.",
+        rejects="an infinite input",
+        check=_check_ceil,
+    ),
+    # Logarithmic & Exponential
+    Operation(
+        "log10",
+        "log10",
+        UNARY,
+        "Return the base-10 logarithm.",
+        rejects="non-positive input",
+    ),
+    Operation(
+        "ln", "ln", UNARY, "Return the natural logarithm.", rejects="non-positive input"
+    ),
+    Operation("exp", "exp", UNARY, "Return e raised to the power a."),
+)
+
+OPERATIONS_BY_NAME: dict[str, Operation] = {op.name: op for op in OPERATIONS}
+
+BINARY_OPERATIONS = tuple(op.name for op in OPERATIONS if op.operands == BINARY)
+UNARY_OPERATIONS = tuple(op.name for op in OPERATIONS if op.operands == UNARY)
+ROUND_OPERATION = "round"
+
+# Errors reported back to the caller instead of failing the request.
+OPERATION_ERRORS = (ValueError, OverflowError)
+
+# Detail reported for an OverflowError, whose own message depends on the
+# operation that raised it.
+OUT_OF_RANGE = "Numerical result out of range"
+
+
+def error_detail(error: Exception) -> str:
+    """Return the detail message reported for an operation error."""
+    if isinstance(error, OverflowError):
+        return OUT_OF_RANGE
+    return str(error)
+
+
+class Dispatcher:
+    """Evaluate operations by name against a :class:`Calculator`.
+
+    The bound (and domain-checked) methods are looked up once at
+    construction time so that evaluating an operation costs a single
+    dict lookup and call.
+    """
+
+    def __init__(self, calc: Calculator) -> None:
+        self._methods: dict[str, tuple[Callable[..., float], tuple[str, ...]]] = {
+            op.name: (op.bind(calc), op.operands) for op in OPERATIONS
+        }
+
+    def bind(
+        self, op: str, a: float | None, b: float | None = None, decimals: int = 0
+    ) -> tuple[Callable[..., float], tuple]:
+        """Resolve *op* to its calculator method and positional arguments.
+
+        Raises:
+            ValueError: If *op* is unknown or a required operand is
+                missing.
+        """
+        entry = self._methods.get(op)
+        if entry is None:
+            raise ValueError(f"Unknown operation: {op}")
+        method, operands = entry
+        if a is None:
+            raise ValueError(f"Operation '{op}' requires operand 'a'")
+        if operands == UNARY:
+            return method, (a,)
+        if operands == BINARY:
+            if b is None:
+                raise ValueError(f"Operation '{op}' requires operand 'b'")
+            return method, (a, b)
+        return method, (a, decimals)
+
+    def __call__(
+        self, op: str, a: float | None, b: float | None = None, decimals: int = 0
+    ) -> float:
+        """Evaluate *op* on the given operands.
+
+        Raises:
+            ValueError: If *op* is unknown, a required operand is
+                missing, or the underlying calculator rejects the input.
+        """
+        method, args = self.bind(op, a, b, decimals)
+        return method(*args)
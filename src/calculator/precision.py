@@ -0,0 +1,434 @@
+"""Arbitrary-precision evaluation of the calculator operations.
+
+:class:`PreciseCalculator` evaluates every operation either in
+:class:`~decimal.Decimal` arithmetic with a configurable number of
+significant digits, or exactly in :class:`~fractions.Fraction`
+arithmetic.  Operands may be given as strings, so no precision is lost
+in transit; JSON numbers are read through their shortest ``repr``, which
+recovers the literal the client wrote (``0.1`` is taken as one tenth,
+not as the nearest binary float).  Results are returned as strings.
+
+Integer operands take a fast path: operations whose result is an
+integer that fits the precision are computed with plain ``int``
+arithmetic, which gives the same result as the slow path without
+constructing any ``Decimal`` or ``Fraction``.
+"""
+
+import decimal
+import math
+from decimal import Decimal
+from fractions import Fraction
+from typing import Callable, Literal
+
+from .operations import BINARY_OPERATIONS
+
+PrecisionMode = Literal["decimal", "fraction"]
+
+MAX_DIGITS = 1000
+MAX_OPERAND_LENGTH = 1000
+# Bound on rounding places: exact rounding computes ``10 ** decimals``.
+MAX_DECIMALS = 1000
+# Bound on the size of exact results, so that e.g. ``10 ** 10**9`` is
+# rejected instead of exhausting memory.  It keeps results well within
+# CPython's default limit of 4300 digits on int to str conversion.
+MAX_EXACT_BITS = 1 << 13
+
+# Integer operands are held to the digits allowed in a string operand.
+_INT_OPERAND_LIMIT = 10**MAX_OPERAND_LENGTH
+
+# Errors of Fraction() on a malformed or zero-denominator ratio.
+_INVALID_FRACTION = (ValueError, ZeroDivisionError)
+
+_TRAPS = [decimal.InvalidOperation, decimal.DivisionByZero, decimal.Overflow]
+
+
+def _no_exact_result(op: str) -> ValueError:
+    return ValueError(f"Operation '{op}' has no exact rational result")
+
+
+def _iroot(x: int, n: int) -> int:
+    """Return the integer part of the *n*-th root of ``x >= 0``."""
+    if x < 2:
+        return x
+    guess = 1 << -(-x.bit_length() // n)
+    while True:
+        smaller = ((n - 1) * guess + x // guess ** (n - 1)) // n
+        if smaller >= guess:
+            return guess
+        guess = smaller
+
+
+def _exact_root(a: Fraction, n: int, op: str) -> Fraction:
+    """Return the *n*-th root of ``a >= 0`` if it is rational."""
+    numerator = _iroot(a.numerator, n)
+    denominator = _iroot(a.denominator, n)
+    if numerator**n != a.numerator or denominator**n != a.denominator:
+        raise _no_exact_result(op)
+    return Fraction(numerator, denominator)
+
+
+def _floor_divmod(
+    context: decimal.Context, a: Decimal, b: Decimal
+) -> tuple[Decimal, Decimal]:
+    """Return the floored quotient and remainder of ``a / b``.
+
+    The integer quotient is computed with as many digits as it needs, up
+    to :data:`MAX_DIGITS` more than *context* has, so that the remainder
+    is exact.  Decimal remainders take the sign of the dividend; like the
+    float operations, the result takes the sign of the divisor.
+    """
+    wide = context.copy()
+    wide.prec = max(context.prec, a.adjusted() - b.adjusted() + 2)
+    if wide.prec > context.prec + MAX_DIGITS:
+        raise ValueError("Quotient is too large for integer division")
+    quotient, remainder = wide.divmod(a, b)
+    if not remainder:
+        return quotient, remainder.copy_abs()
+    if remainder.is_signed() != b.is_signed():
+        quotient = wide.subtract(quotient, 1)
+        remainder = wide.add(remainder, b)
+    return quotient, remainder
+
+
+def _exact_str(value: int | Fraction) -> str:
+    """Return an exact result as a string, if it is small enough to print."""
+    if isinstance(value, Fraction):
+        size = max(value.numerator.bit_length(), value.denominator.bit_length())
+    else:
+        size = value.bit_length()
+    if size > MAX_EXACT_BITS:
+        raise OverflowError("Result is too large for exact evaluation")
+    return str(value)
+
+
+def _int_operand(value: int | float | str) -> int | None:
+    """Return *value* as an ``int`` if it is written as one."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        digits = value[1:] if value[:1] in "+-" else value
+        if digits.isascii() and digits.isdigit():
+            return int(value)
+    return None
+
+
+def _fast_path(  # pylint: disable=too-many-return-statements
+    op: str, a: int, b: int, decimals: int
+) -> int | None:
+    """Evaluate *op* on integers if the result is an exact integer."""
+    if op == "add":
+        return a + b
+    if op == "subtract":
+        return a - b
+    if op == "multiply":
+        return a * b
+    if op == "absolute":
+        return abs(a)
+    if op in ("floor", "ceil") or (op == "round" and decimals == 0):
+        return a
+    if op == "power":
+        if b >= 0 and a.bit_length() * b <= MAX_EXACT_BITS:
+            return a**b
+        return None
+    if b == 0:
+        return None
+    if op == "modulo":
+        return a % b
+    if op == "floor_divide":
+        return a // b
+    if op == "divide" and a % b == 0:
+        return a // b
+    return None
+
+
+class PreciseCalculator:
+    """Evaluate operations in ``Decimal`` or ``Fraction`` arithmetic.
+
+    Args:
+        digits: Default number of significant digits of decimal results.
+        rounding: Decimal rounding mode, e.g. ``"ROUND_HALF_EVEN"``,
+            used for inexact results and by ``round``.
+    """
+
+    def __init__(self, digits: int = 28, rounding: str = "ROUND_HALF_EVEN") -> None:
+        if not 1 <= digits <= MAX_DIGITS:
+            raise ValueError(f"digits must be between 1 and {MAX_DIGITS}")
+        self.digits = digits
+        self.rounding = getattr(decimal, rounding)
+        self._contexts: dict[int, decimal.Context] = {}
+        self._limits: dict[int, int] = {}
+        self._decimal_ops: dict[str, Callable] = {
+            "add": lambda c, a, b, _: c.add(a, b),
+            "subtract": lambda c, a, b, _: c.subtract(a, b),
+            "multiply": lambda c, a, b, _: c.multiply(a, b),
+            "divide": self._decimal_divide,
+            "power": self._decimal_power,
+            "sqrt": self._decimal_sqrt,
+            "nth_root": self._decimal_nth_root,
+            "modulo": self._decimal_modulo,
+            "floor_divide": self._decimal_floor_divide,
+            "absolute": lambda c, a, b, _: c.abs(a),
+            "round": self._decimal_round,
+            "floor": lambda c, a, b, _: c.plus(
+                a.to_integral_value(decimal.ROUND_FLOOR)
+            ),
+            "ceil": lambda c, a, b, _: c.plus(
+                a.to_integral_value(decimal.ROUND_CEILING)
+            ),
+            "log10": self._decimal_log(lambda c, a: c.log10(a)),
+            "ln": self._decimal_log(lambda c, a: c.ln(a)),
+            "exp": lambda c, a, b, _: c.exp(a),
+        }
+        self._fraction_ops: dict[str, Callable] = {
+            "add": lambda a, b, _: a + b,
+            "subtract": lambda a, b, _: a - b,
+            "multiply": lambda a, b, _: a * b,
+            "divide": self._fraction_divide,
+            "power": self._fraction_power,
+            "sqrt": self._fraction_sqrt,
+            "nth_root": self._fraction_nth_root,
+            "modulo": self._fraction_modulo,
+            "floor_divide": self._fraction_floor_divide,
+            "absolute": lambda a, b, _: abs(a),
+            "round": lambda a, b, decimals: round(a, decimals),
+            "floor": lambda a, b, _: Fraction(math.floor(a)),
+            "ceil": lambda a, b, _: Fraction(math.ceil(a)),
+            "log10": lambda a, b, _: self._fraction_irrational("log10"),
+            "ln": lambda a, b, _: self._fraction_irrational("ln"),
+            "exp": lambda a, b, _: self._fraction_irrational("exp"),
+        }
+
+    def __reduce__(self):
+        # The operation tables hold lambdas: rebuild them when unpickled,
+        # e.g. in an offload worker process.
+        return type(self), (self.digits, self.rounding)
+
+    def context(self, digits: int | None = None) -> decimal.Context:
+        """Return the (cached) decimal context for *digits* digits."""
+        digits = digits or self.digits
+        context = self._contexts.get(digits)
+        if context is None:
+            context = decimal.Context(
+                prec=digits,
+                rounding=self.rounding,
+                traps=_TRAPS,
+            )
+            self._contexts[digits] = context
+            self._limits[digits] = 10**digits
+        return context
+
+    def evaluate(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+        self,
+        op: str,
+        a: int | float | str,
+        b: int | float | str | None = None,
+        decimals: int = 0,
+        mode: PrecisionMode = "decimal",
+        digits: int | None = None,
+    ) -> str:
+        """Evaluate *op* and return its result as a string.
+
+        Raises:
+            ValueError: If *op* is unknown, an operand is missing, too
+                long or not a finite number, *decimals* is out of range,
+                or the operation is invalid for the operands (including
+                irrational results in ``fraction`` mode).
+            OverflowError: If the result is too large.
+        """
+        operations = self._decimal_ops if mode == "decimal" else self._fraction_ops
+        if op not in operations:
+            raise ValueError(f"Unknown operation: {op}")
+        if op not in BINARY_OPERATIONS:
+            b = None
+        elif b is None:
+            raise ValueError(f"Operation '{op}' requires operand 'b'")
+        if not -MAX_DECIMALS <= decimals <= MAX_DECIMALS:
+            raise ValueError(
+                f"decimals must be between -{MAX_DECIMALS} and {MAX_DECIMALS}"
+            )
+        for value in (a, b):
+            if isinstance(value, int) and abs(value) >= _INT_OPERAND_LIMIT:
+                raise ValueError(f"Operands are limited to {MAX_OPERAND_LENGTH} digits")
+
+        int_a = _int_operand(a)
+        int_b = 0 if b is None else _int_operand(b)
+        if int_a is not None and int_b is not None:
+            result = _fast_path(op, int_a, int_b, decimals)
+            if result is not None:
+                if mode == "fraction":
+                    return _exact_str(result)
+                context = self.context(digits)
+                if -self._limits[context.prec] < result < self._limits[context.prec]:
+                    return str(result)
+
+        if mode == "fraction":
+            exact_a = self._fraction(a)
+            exact_b = None if b is None else self._fraction(b)
+            return _exact_str(operations[op](exact_a, exact_b, decimals))
+
+        context = self.context(digits)
+        decimal_a = self._decimal(a)
+        decimal_b = None if b is None else self._decimal(b)
+        try:
+            result = operations[op](context, decimal_a, decimal_b, decimals)
+        except decimal.Overflow as e:
+            raise OverflowError("Result is too large") from e
+        except decimal.DivisionByZero as e:
+            raise ValueError("Division by zero") from e
+        except decimal.InvalidOperation as e:
+            raise ValueError("Invalid operation for the given operands") from e
+        if not result.is_finite():
+            raise OverflowError("Result is too large")
+        return str(result)
+
+    # Operand parsing
+
+    @staticmethod
+    def _decimal(value: int | float | str) -> Decimal:
+        if isinstance(value, float):
+            value = repr(value)
+        try:
+            number = Decimal(value)
+        except decimal.InvalidOperation:
+            raise ValueError(f"Invalid number: {value!r}") from None
+        if not number.is_finite():
+            raise ValueError("Operands must be finite numbers")
+        return number
+
+    @classmethod
+    def _fraction(cls, value: int | float | str) -> Fraction:
+        if isinstance(value, str) and "/" in value:
+            try:
+                return Fraction(value)
+            except _INVALID_FRACTION:
+                raise ValueError(f"Invalid number: {value!r}") from None
+        number = cls._decimal(value)
+        exponent = number.as_tuple().exponent
+        # Always an int: _decimal() only returns finite numbers.
+        if isinstance(exponent, int) and abs(exponent) > MAX_EXACT_BITS:
+            raise OverflowError("Operand exponent is too large for exact evaluation")
+        return Fraction(number)
+
+    # Decimal operations
+
+    @staticmethod
+    def _decimal_divide(context, a, b, _):
+        if not b:
+            raise ValueError("Cannot divide by zero")
+        return context.divide(a, b)
+
+    @staticmethod
+    def _decimal_power(context, a, b, _):
+        if not b:
+            return Decimal(1)
+        if not a and b < 0:
+            raise ValueError("Cannot raise zero to a negative power")
+        return context.power(a, b)
+
+    @staticmethod
+    def _decimal_sqrt(context, a, _b, _):
+        if a < 0:
+            raise ValueError("Cannot take square root of a negative number")
+        return context.sqrt(a)
+
+    @staticmethod
+    def _decimal_nth_root(context, a, n, _):
+        if not n:
+            raise ValueError("Cannot take zeroth root")
+        if a < 0 and n % 2 == 0:
+            raise ValueError("Cannot take even root of a negative number")
+        if not a:
+            return Decimal(0)
+        # Evaluate exp(ln(|a|) / n) with guard digits, then prefer the
+        # shortest result when it is an exact root.
+        wide = context.copy()
+        wide.prec += 10
+        magnitude = wide.exp(wide.divide(wide.ln(abs(a)), n))
+        root = context.plus(magnitude)
+        if n == n.to_integral_value():
+            shortest = root.normalize(context)
+            if wide.power(shortest, n) == abs(a):
+                root = shortest
+        return root if a > 0 else -root
+
+    @staticmethod
+    def _decimal_modulo(context, a, b, _):
+        if not b:
+            raise ValueError("Cannot modulo by zero")
+        return context.plus(_floor_divmod(context, a, b)[1])
+
+    @staticmethod
+    def _decimal_floor_divide(context, a, b, _):
+        if not b:
+            raise ValueError("Cannot floor divide by zero")
+        return context.plus(_floor_divmod(context, a, b)[0])
+
+    @staticmethod
+    def _decimal_round(context, a, _b, decimals):
+        return a.quantize(Decimal(1).scaleb(-decimals), context=context)
+
+    @staticmethod
+    def _decimal_log(function):
+        def log(context, a, _b, _):
+            if a <= 0:
+                raise ValueError("Cannot take logarithm of a non-positive number")
+            return function(context, a)
+
+        return log
+
+    # Fraction operations
+
+    @staticmethod
+    def _fraction_divide(a, b, _):
+        if not b:
+            raise ValueError("Cannot divide by zero")
+        return a / b
+
+    @staticmethod
+    def _fraction_power(a, b, _):
+        if b.denominator != 1:
+            raise _no_exact_result("power")
+        exponent = b.numerator
+        if not a and exponent < 0:
+            raise ValueError("Cannot raise zero to a negative power")
+        size = max(a.numerator.bit_length(), a.denominator.bit_length())
+        if size * abs(exponent) > MAX_EXACT_BITS:
+            raise OverflowError("Result is too large for exact evaluation")
+        return a**exponent
+
+    @staticmethod
+    def _fraction_sqrt(a, _b, _):
+        if a < 0:
+            raise ValueError("Cannot take square root of a negative number")
+        return _exact_root(a, 2, "sqrt")
+
+    @staticmethod
+    def _fraction_nth_root(a, n, _):
+        if not n:
+            raise ValueError("Cannot take zeroth root")
+        if a < 0 and n % 2 == 0:
+            raise ValueError("Cannot take even root of a negative number")
+        if n.denominator != 1 or abs(n.numerator) > MAX_EXACT_BITS:
+            raise _no_exact_result("nth_root")
+        root = _exact_root(abs(a), abs(n.numerator), "nth_root")
+        if n < 0:
+            if not root:
+                raise ValueError("Cannot raise zero to a negative power")
+            root = 1 / root
+        return root if a >= 0 else -root
+
+    @staticmethod
+    def _fraction_modulo(a, b, _):
+        if not b:
+            raise ValueError("Cannot modulo by zero")
+        return a % b
+
+    @staticmethod
+    def _fraction_floor_divide(a, b, _):
+        if not b:
+            raise ValueError("Cannot floor divide by zero")
+        return Fraction(a // b)
+
+    @staticmethod
+    def _fraction_irrational(op):
+        raise _no_exact_result(op)
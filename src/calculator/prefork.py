@@ -0,0 +1,156 @@
+"""Pre-fork server: build the app once, then fork the workers from it.
+
+With uvicorn's own multi-worker mode every worker is a fresh interpreter
+that imports FastAPI, pydantic and NumPy, builds the routes and parses
+config.yaml itself, so memory grows by a whole application per worker.
+:func:`serve` instead does all of that once in a supervisor process,
+binds the listening socket, and forks the workers, which inherit the
+initialized heap copy-on-write.
+
+Copy-on-write only saves memory while pages are not written, and the
+cyclic garbage collector writes to every tracked object it examines.
+The supervisor therefore disables automatic collection while it loads,
+then moves every object it created into the permanent generation with
+:func:`gc.freeze` just before forking, so the workers' collections never
+touch the shared heap.  ``/memory``, when enabled, reports the unique and
+shared memory of each worker (see :mod:`calculator.memory`).
+
+Fork-only: :func:`supported` is false where :func:`os.fork` is not
+available, and the launcher then falls back to uvicorn's workers.
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+
+import uvicorn
+from uvicorn.main import STARTUP_FAILURE
+
+from . import memory
+from .api import create_app
+from .config import DEFAULT_CONFIG_PATH, setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Modules the app imports lazily, loaded up front so the workers share them.
+_PRELOADED_MODULES = ("numpy", "msgpack", "calculator.vector", "calculator.tabulate")
+
+_STOP_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+def supported() -> bool:
+    """Whether workers can be forked on this platform."""
+    return hasattr(os, "fork")
+
+
+def preload(config_path: str = DEFAULT_CONFIG_PATH, **options) -> uvicorn.Config:
+    """Build the app and everything the workers share.
+
+    Loads the configuration, creates the app, imports the modules it
+    would otherwise import on first use and renders its OpenAPI schema,
+    with automatic garbage collection disabled so that collections do
+    not dirty the heap before it is frozen.
+
+    Args:
+        config_path: Filesystem path to the YAML configuration file.
+        **options: :class:`uvicorn.Config` options.
+
+    Returns:
+        The loaded uvicorn configuration serving the app.
+    """
+    gc.disable()
+    app = create_app(config_path)
+    for module in _PRELOADED_MODULES:
+        __import__(module)
+    app.openapi()
+    config = uvicorn.Config(app, **options)
+    config.load()
+    return config
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> int:
+    """Serve requests in a forked worker until it is stopped.
+
+    Returns:
+        The worker's exit status.
+    """
+    for signum in _STOP_SIGNALS:
+        signal.signal(signum, signal.SIG_DFL)
+    gc.enable()
+    # Threads do not survive a fork: restart the log queue listener.
+    setup_logging()
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    return 0 if server.started else STARTUP_FAILURE
+
+
+def _spawn(config: uvicorn.Config, sock: socket.socket) -> int:
+    """Fork one worker and return its pid."""
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            status = _run_worker(config, sock)
+        except BaseException:  # pylint: disable=broad-exception-caught
+            logger.exception("Worker %d failed", os.getpid())
+        finally:
+            os._exit(status)  # pylint: disable=protected-access
+    return pid
+
+
+def serve(config: uvicorn.Config, workers: int) -> None:
+    """Bind the socket, fork *workers* workers and supervise them.
+
+    A worker that exits on its own (e.g. after ``limit_max_requests``
+    requests) is replaced.  SIGINT and SIGTERM are passed on to the
+    workers, which finish their requests and exit, and the supervisor
+    returns once they all have.
+
+    Raises:
+        SystemExit: With uvicorn's startup failure status, after
+            stopping the other workers, if a worker fails to start.
+    """
+    sock = config.bind_socket()
+    memory.supervisor_pid = os.getpid()
+    gc.collect()
+    gc.freeze()
+    pids: set[int] = set()
+    stopping = failed = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    previous = {signum: signal.signal(signum, stop) for signum in _STOP_SIGNALS}
+    try:
+        pids.update(_spawn(config, sock) for _ in range(workers))
+        logger.info("Started %d pre-forked workers: %s", workers, sorted(pids))
+        while pids:
+            pid, status = os.wait()
+            pids.discard(pid)
+            if stopping:
+                continue
+            status = os.waitstatus_to_exitcode(status)
+            if status == STARTUP_FAILURE:
+                logger.error("Worker %d failed to start, stopping", pid)
+                failed = True
+                stop(signal.SIGTERM, None)
+                continue
+            logger.warning("Worker %d exited with status %d, replacing it", pid, status)
+            pids.add(_spawn(config, sock))
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        sock.close()
+        memory.supervisor_pid = None
+        gc.unfreeze()
+        gc.enable()
+    if failed:
+        raise SystemExit(STARTUP_FAILURE)
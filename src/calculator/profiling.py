@@ -0,0 +1,278 @@
+"""Sampled request profiling that can be switched on at runtime.
+
+:class:`ProfilingMiddleware` runs a fraction of requests under
+:mod:`cProfile` and feeds each profile to a :class:`Profiler`, which
+keeps, in memory:
+
+* per-route totals of where the time went, split into the request path
+  phases listed in :data:`PHASES` (plus ``other`` for routing, framework
+  and I/O);
+* the merged :class:`pstats.Stats` of every sampled request, which can be
+  downloaded in the ``.prof`` format read by :mod:`pstats`, snakeviz and
+  similar tools, or as collapsed stacks for ``flamegraph.pl`` and
+  speedscope.
+
+While profiling is disabled the middleware costs one attribute check per
+request.  Only one request is profiled at a time, and the profiler is
+switched on only while that request's own coroutine runs (see
+:class:`_Profiled`), so other requests served by the event loop while
+it awaits are not charged to it.  Only code running on the event loop
+thread is seen: work on the offload pool shows up as time spent
+awaiting it.
+"""
+
+import cProfile
+import marshal
+import pstats
+import random
+import time
+from pathlib import PurePath
+from typing import Callable, Coroutine
+
+from .metrics import RouteLabeler
+
+# Phase name -> predicate on a pstats function key (file, line, name).
+# A phase is charged the cumulative time of every call entering it from
+# code outside the phase (or of every call with no recorded caller), so
+# nested calls are not counted twice.
+PHASES: dict[str, Callable[[tuple], bool]] = {
+    "json_decode": lambda f: f[0].endswith(("json/__init__.py", "json/decoder.py"))
+    or "unpackb" in f[2],
+    "validation": lambda f: f[0].endswith("fastapi/dependencies/utils.py")
+    and f[2] == "solve_dependencies",
+    "compute": lambda f: "calculator_lib" in f[0],
+    "logging": lambda f: "/logging/" in f[0],
+    "serialization": lambda f: (
+        f[0].endswith("fastapi/routing.py") and f[2] == "serialize_response"
+    )
+    or (f[0].endswith("starlette/responses.py") and f[2] == "render")
+    # Pre-encoded results and the MessagePack and frame responses.
+    or (
+        f[0].endswith("calculator/transport.py")
+        and f[2] in ("encode_result", "_encode")
+    ),
+}
+
+# Collapsed-stack frames below this share of their parent are dropped.
+_MIN_STACK_SHARE = 0.001
+_MAX_STACK_DEPTH = 64
+
+
+def _entries(stats: pstats.Stats) -> dict[tuple, tuple]:
+    """Return the ``{function: (cc, nc, tt, ct, callers)}`` table of *stats*."""
+    return stats.stats  # type: ignore[attr-defined]
+
+
+def phase_breakdown(stats: pstats.Stats) -> dict[str, float]:
+    """Return the seconds spent in each of :data:`PHASES` in *stats*."""
+    totals = dict.fromkeys(PHASES, 0.0)
+    for func, (_, _, _, cumulative, callers) in _entries(stats).items():
+        for phase, matches in PHASES.items():
+            if not matches(func):
+                continue
+            if not callers:
+                totals[phase] += cumulative
+            for caller, edge in callers.items():
+                if not matches(caller):
+                    totals[phase] += edge[3]
+    return totals
+
+
+def _frame_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ",")
+    path = PurePath(filename)
+    short = "/".join(path.parts[-2:])
+    return f"{name} ({short}:{line})".replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> str:
+    """Render *stats* as collapsed stacks (``frame;frame;... microseconds``).
+
+    cProfile records caller/callee edges, not whole stacks, so the stacks
+    are reconstructed by splitting each function's time between its
+    callees in proportion to their cumulative time, as flameprof does.
+    """
+    callees: dict[tuple, dict[tuple, float]] = {}
+    roots = []
+    for func, (_, _, _, cumulative, callers) in _entries(stats).items():
+        if not callers:
+            roots.append((func, cumulative))
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+
+    lines: dict[str, float] = {}
+
+    def walk(func: tuple, seconds: float, stack: tuple, labels: str) -> None:
+        cumulative = _entries(stats)[func][3] or seconds
+        ratio = seconds / cumulative if cumulative else 0.0
+        remaining = seconds
+        if len(stack) < _MAX_STACK_DEPTH:
+            for callee, edge_seconds in callees.get(func, {}).items():
+                share = edge_seconds * ratio
+                if callee in stack or share < seconds * _MIN_STACK_SHARE:
+                    continue
+                remaining -= share
+                walk(
+                    callee,
+                    share,
+                    stack + (callee,),
+                    labels + ";" + _frame_label(callee),
+                )
+        if remaining > 0:
+            lines[labels] = lines.get(labels, 0.0) + remaining
+
+    for func, cumulative in roots:
+        walk(func, cumulative, (func,), _frame_label(func))
+    return "".join(
+        f"{labels} {round(seconds * 1e6)}\n"
+        for labels, seconds in sorted(lines.items())
+        if round(seconds * 1e6) > 0
+    )
+
+
+class Profiler:
+    """Sampling decisions and the in-memory profile aggregate.
+
+    Args:
+        sample_rate: Fraction of requests profiled while enabled.
+        enabled: Whether sampling starts enabled.
+        rng: Random source for sampling decisions, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.01,
+        enabled: bool = False,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.active = False
+        self._rng = rng
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop every collected profile."""
+        self.stats: pstats.Stats | None = None
+        self.routes: dict[str, dict[str, float]] = {}
+
+    def should_sample(self) -> bool:
+        """Decide whether the next request is profiled."""
+        return not self.active and self._rng() < self.sample_rate
+
+    def record(self, route: str, profile: cProfile.Profile, elapsed: float) -> None:
+        """Add one request's profile to the aggregate."""
+        stats = pstats.Stats(profile)
+        phases = phase_breakdown(stats)
+        totals = self.routes.setdefault(
+            route, {"samples": 0, "total": 0.0, **dict.fromkeys(PHASES, 0.0)}
+        )
+        totals["samples"] += 1
+        totals["total"] += elapsed
+        for phase, seconds in phases.items():
+            totals[phase] += seconds
+        if self.stats is None:
+            self.stats = stats
+        else:
+            self.stats.add(stats)
+
+    def summary(self) -> dict:
+        """Return the settings and mean per-route phase times in ms."""
+        routes = {}
+        for route, totals in sorted(self.routes.items()):
+            samples = totals["samples"]
+            mean = {
+                name: round(totals[name] / samples * 1000, 4)
+                for name in ("total", *PHASES)
+            }
+            mean["other"] = round(
+                max(0.0, mean["total"] - sum(mean[phase] for phase in PHASES)), 4
+            )
+            routes[route] = {"samples": samples, "mean_ms": mean}
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "routes": routes,
+        }
+
+    def dump_pstats(self) -> bytes:
+        """Return the merged profile in the ``pstats`` file format."""
+        stats = _entries(self.stats) if self.stats is not None else {}
+        return marshal.dumps(stats)
+
+    def collapsed(self) -> str:
+        """Return the merged profile as collapsed stacks."""
+        return collapsed_stacks(self.stats) if self.stats is not None else ""
+
+
+class _Profiled:
+    """Awaitable driving a coroutine with *profile* enabled only in its steps.
+
+    A profiler left enabled across an ``await`` records whatever else the
+    event loop runs meanwhile.  Each step of the coroutine, up to the
+    point where it suspends, is instead run between ``enable()`` and
+    ``disable()``, and the profiler is off while the event loop serves
+    other tasks.
+    """
+
+    __slots__ = ("coro", "profile")
+
+    def __init__(self, coro: Coroutine, profile: cProfile.Profile) -> None:
+        self.coro = coro
+        self.profile = profile
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self.profile.enable()
+            try:
+                if error is None:
+                    yielded = self.coro.send(value)
+                else:
+                    yielded = self.coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:  # pylint: disable=broad-exception-caught
+                value, error = None, e
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling sampled requests into a Profiler.
+
+    Paths starting with one of *exempt_prefixes* (the admin endpoints)
+    are never profiled.
+    """
+
+    def __init__(
+        self, app, profiler: Profiler, exempt_prefixes: tuple[str, ...] = ()
+    ) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.exempt_prefixes = exempt_prefixes
+        self._labeler = RouteLabeler(app)
+
+    async def __call__(self, scope, receive, send) -> None:
+        profiler = self.profiler
+        if (
+            not profiler.enabled
+            or scope["type"] != "http"
+            or not profiler.should_sample()
+            or scope["path"].startswith(self.exempt_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+        profile = cProfile.Profile()
+        profiler.active = True
+        start = time.perf_counter()
+        try:
+            await _Profiled(self.app(scope, receive, send), profile)
+        finally:
+            elapsed = time.perf_counter() - start
+            profiler.active = False
+            profiler.record(self._labeler(scope), profile, elapsed)
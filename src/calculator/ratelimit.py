@@ -0,0 +1,49 @@
+"""Token bucket rate limiter.
+
+A bucket holds up to ``burst`` tokens and refills continuously at
+``rate`` tokens per second; each admitted event takes one token.  The
+bucket is refilled lazily when it is checked, so it costs a clock read
+and a few float operations per event and needs no background timer.
+"""
+
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Token bucket admitting *rate* events per second with bursts of *burst*.
+
+    The bucket is not thread-safe; it is meant to be checked from the
+    event loop thread.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "_clock")
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._clock = clock
+        self.updated = clock()
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take *tokens* if available and report whether they were."""
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def retry_after(self, tokens: float = 1.0) -> float:
+        """Seconds until *tokens* will be available."""
+        missing = tokens - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float("inf")
@@ -0,0 +1,271 @@
+"""Numerically stable reductions over float64 arrays.
+
+The input is consumed in a single pass, :data:`CHUNK_SIZE` elements at a
+time, so temporaries stay bounded however long the array is (a float64
+frame is read straight from the request buffer).  Rounding errors are
+compensated rather than accumulated:
+
+* sums add each chunk pairwise and keep the exact rounding error of
+  every addition (TwoSum), so the result is as accurate as if it had been
+  computed in twice the working precision, and chunk totals are combined
+  with Neumaier's compensated summation;
+* ``dot`` also keeps the exact error of every product (Dekker's
+  TwoProduct), as in Ogita, Rump and Oishi's ``Dot2``;
+* ``cumsum`` corrects each running total by the running sum of the
+  rounding errors made so far;
+* ``product`` multiplies the binary mantissas and adds the exponents
+  separately (a base-2 log domain), so intermediate products never
+  overflow or underflow and only a final result out of range fails, with
+  :class:`OverflowError` as ``Calculator.exp`` does.
+"""
+
+import math
+from typing import Callable, Iterator, Sequence
+
+import numpy as np
+
+CHUNK_SIZE = 65536
+
+# Mantissas lie in [0.5, 1), so a product of this many stays normal.
+_MANTISSA_BLOCK = 1000
+
+# Veltkamp splitting constant for float64: 2**27 + 1.
+_SPLITTER = 134217729.0
+
+# Largest magnitude that can be split without overflowing.
+_SPLIT_LIMIT = 2.0**996
+
+Array = Sequence[float] | np.ndarray
+
+
+def _chunks(values: Array) -> Iterator[np.ndarray]:
+    """Yield *values* as float64 arrays of at most :data:`CHUNK_SIZE`."""
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield np.asarray(values[start : start + CHUNK_SIZE], dtype=np.float64)
+
+
+def _two_sum(a: np.ndarray, b: np.ndarray, s: np.ndarray) -> np.ndarray:
+    """Return the exact rounding errors of ``s = a + b``."""
+    b_virtual = s - a
+    return (a - (s - b_virtual)) + (b - b_virtual)
+
+
+def _finite_errors(errors: np.ndarray) -> np.ndarray:
+    """Drop the meaningless errors of additions involving infinities."""
+    errors[~np.isfinite(errors)] = 0.0
+    return errors
+
+
+class _Accumulator:
+    """Neumaier compensated sum of floats."""
+
+    def __init__(self) -> None:
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value: float) -> None:
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    def result(self) -> float:
+        if not math.isfinite(self.total):
+            return self.total
+        return self.total + self.compensation
+
+
+def _add_chunk(accumulator: _Accumulator, chunk: np.ndarray) -> None:
+    """Add the pairwise, error-compensated sum of *chunk*."""
+    errors = 0.0
+    while len(chunk) > 1:
+        if len(chunk) % 2:
+            accumulator.add(float(chunk[-1]))
+            chunk = chunk[:-1]
+        a, b = chunk[0::2], chunk[1::2]
+        with np.errstate(all="ignore"):
+            chunk = a + b
+            level_errors = _finite_errors(_two_sum(a, b, chunk))
+        errors += float(np.sum(level_errors))
+    if len(chunk):
+        accumulator.add(float(chunk[0]))
+    accumulator.add(errors)
+
+
+def fsum(values: Array) -> float:
+    """Return the compensated sum of *values* (0.0 when empty)."""
+    accumulator = _Accumulator()
+    for chunk in _chunks(values):
+        _add_chunk(accumulator, chunk)
+    return accumulator.result()
+
+
+def mean(values: Array) -> float:
+    """Return the arithmetic mean of *values*.
+
+    Raises:
+        ValueError: If *values* is empty.
+    """
+    if len(values) == 0:
+        raise ValueError("Cannot take the mean of an empty array")
+    count = len(values)
+    total = fsum(values)
+    if math.isfinite(total):
+        return total / count
+    # The sum of finite values may overflow where their mean cannot: add
+    # the values scaled down by their count instead.
+    accumulator = _Accumulator()
+    for chunk in _chunks(values):
+        _add_chunk(accumulator, chunk / count)
+    return accumulator.result()
+
+
+def product(values: Array) -> float:
+    """Return the product of *values* (1.0 when empty).
+
+    Zeros, infinities and NaN follow IEEE 754 multiplication, as
+    ``Calculator.multiply`` does.
+
+    Raises:
+        OverflowError: If the product of finite values is too large for
+            a float.
+    """
+    mantissa, exponent = 1.0, 0
+    negative = zero = infinite = False
+    for chunk in _chunks(values):
+        if np.isnan(chunk).any():
+            return math.nan
+        negative ^= bool(np.count_nonzero(np.signbit(chunk)) % 2)
+        finite = np.isfinite(chunk)
+        if not finite.all():
+            infinite = True
+            chunk = chunk[finite]
+        if zero or (chunk == 0).any():
+            zero = True
+            continue
+        mantissas, exponents = np.frexp(np.abs(chunk))
+        exponent += int(exponents.sum())
+        for start in range(0, len(mantissas), _MANTISSA_BLOCK):
+            block = float(np.prod(mantissas[start : start + _MANTISSA_BLOCK]))
+            mantissa, shift = math.frexp(mantissa * block)
+            exponent += shift
+    sign = -1.0 if negative else 1.0
+    if zero and infinite:
+        return math.nan
+    if zero:
+        return math.copysign(0.0, sign)
+    if infinite:
+        return math.copysign(math.inf, sign)
+    return math.copysign(math.ldexp(mantissa, exponent), sign)
+
+
+def _extremum(values: Array, reduce: Callable, pick: Callable, name: str) -> float:
+    if len(values) == 0:
+        raise ValueError(f"Cannot take the {name} of an empty array")
+    chunks = _chunks(values)
+    result = float(reduce(next(chunks)))
+    for chunk in chunks:
+        if math.isnan(result):
+            break
+        value = float(reduce(chunk))
+        result = value if math.isnan(value) else pick(result, value)
+    return result
+
+
+def minimum(values: Array) -> float:
+    """Return the smallest of *values*, or NaN if any is NaN.
+
+    Raises:
+        ValueError: If *values* is empty.
+    """
+    return _extremum(values, np.min, min, "minimum")
+
+
+def maximum(values: Array) -> float:
+    """Return the largest of *values*, or NaN if any is NaN.
+
+    Raises:
+        ValueError: If *values* is empty.
+    """
+    return _extremum(values, np.max, max, "maximum")
+
+
+def _split(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Split *x* into high and low halves of 26 significant bits each."""
+    c = _SPLITTER * x
+    high = c - (c - x)
+    return high, x - high
+
+
+def dot(a: Array, b: Array) -> float:
+    """Return the compensated dot product of *a* and *b*.
+
+    Raises:
+        ValueError: If *a* and *b* differ in length.
+    """
+    if len(a) != len(b):
+        raise ValueError("Operands 'a' and 'b' must have the same length")
+    accumulator = _Accumulator()
+    for x, y in zip(_chunks(a), _chunks(b)):
+        with np.errstate(all="ignore"):
+            p = x * y
+            x_high, x_low = _split(x)
+            y_high, y_low = _split(y)
+            errors = ((x_high * y_high - p) + x_high * y_low + x_low * y_high) + (
+                x_low * y_low
+            )
+        splittable = (np.abs(x) < _SPLIT_LIMIT) & (np.abs(y) < _SPLIT_LIMIT)
+        errors[~splittable] = 0.0
+        _add_chunk(accumulator, p)
+        _add_chunk(accumulator, _finite_errors(errors))
+    return accumulator.result()
+
+
+def cumsum(values: Array) -> np.ndarray:
+    """Return the compensated running totals of *values*."""
+    result = np.empty(len(values), dtype=np.float64)
+    total, compensation = 0.0, 0.0
+    start = 0
+    for chunk in _chunks(values):
+        with np.errstate(all="ignore"):
+            totals = np.cumsum(np.concatenate(([total], chunk)))[1:]
+            previous = np.concatenate(([total], totals[:-1]))
+            errors = _finite_errors(_two_sum(previous, chunk, totals))
+            corrections = np.cumsum(errors) + compensation
+            out = result[start : start + len(chunk)]
+            np.add(totals, corrections, out=out)
+        non_finite = ~np.isfinite(totals)
+        out[non_finite] = totals[non_finite]
+        total, compensation = float(totals[-1]), float(corrections[-1])
+        start += len(chunk)
+    return result
+
+
+REDUCTIONS: dict[str, Callable[..., float]] = {
+    "sum": fsum,
+    "product": product,
+    "mean": mean,
+    "min": minimum,
+    "max": maximum,
+    "dot": dot,
+}
+
+
+def reduce(op: str, a: Array, b: Array | None = None) -> float:
+    """Reduce *a* (and *b*, for ``dot``) with the reduction *op*.
+
+    Raises:
+        ValueError: If *op* is unknown, *b* is missing for ``dot``, or
+            the input is outside the reduction's domain.
+        OverflowError: If a product is too large for a float.
+    """
+    reduction = REDUCTIONS.get(op)
+    if reduction is None:
+        raise ValueError(f"Unknown reduction: {op}")
+    if op == "dot":
+        if b is None:
+            raise ValueError("Operation 'dot' requires operand 'b'")
+        return reduction(a, b)
+    return reduction(a)
@@ -0,0 +1,130 @@
+"""Per-application state shared by the route handlers.
+
+:func:`~calculator.api.create_app` builds a :class:`Runtime` from the
+configuration and keeps it on ``app.state.runtime``; handlers look it up
+from their request with :func:`get_runtime`, so several apps in one
+process do not share pools, caches or job stores.
+"""
+
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Awaitable, Callable
+
+from calculator_lib import Calculator
+from starlette.requests import HTTPConnection
+
+from .admission import AdmissionController
+from .cache import ResultCache, make_key
+from .jobs import JobStore
+from .metrics import MetricsRegistry, current_timing
+from .offload import OffloadPool
+from .operations import Dispatcher
+from .precision import PreciseCalculator, PrecisionMode
+from .profiling import Profiler
+from .singleflight import SingleFlight
+
+calc = Calculator()
+dispatch = Dispatcher(calc)
+
+
+def timed(fn: Callable, *args):
+    """Call *fn*, recording validation and compute time for metrics."""
+    timing = current_timing()
+    if timing is None:
+        return fn(*args)
+    start = time.perf_counter()
+    if not timing.validation:
+        timing.validation = start - timing.start
+    try:
+        return fn(*args)
+    finally:
+        timing.compute += time.perf_counter() - start
+
+
+async def timed_async(fn: Callable[..., Awaitable], *args):
+    """Await ``fn(*args)``, recording validation and compute time."""
+    timing = current_timing()
+    if timing is None:
+        return await fn(*args)
+    start = time.perf_counter()
+    if not timing.validation:
+        timing.validation = start - timing.start
+    try:
+        return await fn(*args)
+    finally:
+        timing.compute += time.perf_counter() - start
+
+
+def compute(
+    cache: ResultCache | None, op: str, method: Callable[..., float], *args
+) -> float:
+    """Call a calculator method through *cache*, when there is one."""
+    if cache is None:
+        return timed(method, *args)
+    return timed(cache.call, op, method, *args)
+
+
+@dataclass
+class Runtime:  # pylint: disable=too-many-instance-attributes
+    """The pools, caches and settings of one application.
+
+    Attributes:
+        offload_pool: Pool running bulk work and offloaded operations.
+        result_cache: Cache of scalar results, or ``None`` when disabled.
+            Never set with a process pool, whose workers cannot share it.
+        offloaded_operations: Scalar operations run on the pool.
+        coalescer: Deduplicates identical offloaded operations in
+            flight, or ``None`` when disabled.
+        admission: Admission controller, reported on ``/metrics``.
+        metrics_registry: Request metrics, or ``None`` when disabled.
+        memory_enabled: Whether ``/memory`` reports process memory.
+        profiler: Request profiler, or ``None`` when disabled.
+        admin_token: Bearer token of the ``/admin`` endpoints.
+        precise_calc: Evaluator of the ``/precise`` endpoints.
+        precision_mode: Default mode of the ``/precise`` endpoints.
+        job_store: Background job store, or ``None`` when disabled.
+    """
+
+    offload_pool: OffloadPool = field(default_factory=OffloadPool)
+    result_cache: ResultCache | None = None
+    offloaded_operations: frozenset[str] = frozenset()
+    coalescer: SingleFlight | None = field(default_factory=SingleFlight)
+    admission: AdmissionController | None = None
+    metrics_registry: MetricsRegistry | None = None
+    memory_enabled: bool = False
+    profiler: Profiler | None = None
+    admin_token: str | None = None
+    precise_calc: PreciseCalculator = field(default_factory=PreciseCalculator)
+    precision_mode: PrecisionMode = "decimal"
+    job_store: JobStore | None = None
+
+    async def run(self, op: str, method: Callable[..., float], *args) -> float:
+        """Compute inline, or on the offload pool for configured operations.
+
+        Identical offloaded operations in flight at the same time are
+        computed once, and every caller gets the outcome.
+
+        Raises:
+            PoolSaturated: If the operation is offloaded and the pool is
+                full.
+        """
+        if op not in self.offloaded_operations:
+            return compute(self.result_cache, op, method, *args)
+        run = partial(
+            self.offload_pool.run, compute, self.result_cache, op, method, *args
+        )
+        if self.coalescer is None:
+            return await timed_async(run)
+        return await timed_async(self.coalescer.do, make_key(op, args), run)
+
+    def shutdown(self) -> None:
+        """Stop the offload pool and job workers."""
+        self.offload_pool.shutdown()
+        if self.job_store is not None:
+            self.job_store.shutdown()
+
+
+def get_runtime(connection: HTTPConnection) -> Runtime:
+    """Return the runtime of the app serving *connection*."""
+    return connection.app.state.runtime
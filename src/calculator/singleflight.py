@@ -0,0 +1,72 @@
+"""Coalescing of identical concurrent computations ("single flight").
+
+When several requests ask for the same ``(operation, operands)`` while
+the first one is still being computed, :class:`SingleFlight` lets the
+later ones wait for that computation instead of starting their own, and
+hands its outcome (result or exception) to every waiter.  Unlike the
+result cache nothing is kept once the computation finishes, so a result
+is never stale and memory is bounded by the number of computations in
+flight.
+
+Only computations that await (offloaded operations) can overlap; an
+operation computed inline on the event loop finishes before the next
+request is read.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Share in-flight awaitable computations between identical callers.
+
+    Not thread-safe: it is meant to be used from the event loop thread.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.bypasses = 0
+
+    async def do(self, key: Hashable | None, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the outcome of ``await fn()``, shared among callers.
+
+        A caller whose *key* is already in flight waits for that call
+        instead of invoking *fn*.  The computation runs in its own task,
+        so a caller that is cancelled (e.g. a client that disconnects)
+        does not cancel it for the others.  A ``None`` key bypasses
+        coalescing.
+
+        Raises:
+            Exception: Whatever the shared computation raised, re-raised
+                in every waiter.
+        """
+        if key is None:
+            self.bypasses += 1
+            return await fn()
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter left.
+            task.exception()
+
+    def stats(self) -> dict:
+        """Return the coalescing counters and current in-flight calls."""
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "bypasses": self.bypasses,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,135 @@
+"""Pre-rendered OpenAPI documents served with HTTP caching.
+
+The schema only changes when the code does, so each representation (JSON
+or YAML) is rendered once per app and held as bytes together with its
+gzip (and, when the optional ``brotli`` package is installed, Brotli)
+encoding and a strong ``ETag``.  Polling clients that send
+``If-None-Match`` get an empty ``304 Not Modified``.
+"""
+
+import gzip
+import hashlib
+import json
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+JSON = "application/json"
+YAML = "application/vnd.oai.openapi;version=3.1"
+
+CACHE_CONTROL = "public, max-age=300"
+
+# Content codings in server preference order, with their ETag suffixes.
+_CODINGS = (("br", "-br"), ("gzip", "-gz"))
+
+
+def render_yaml(schema: dict) -> str:
+    """Dump *schema* as YAML, using libyaml when it is available."""
+    import yaml  # pylint: disable=import-outside-toplevel
+
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    return yaml.dump(schema, Dumper=dumper, sort_keys=False, allow_unicode=True)
+
+
+def render_json(schema: dict) -> str:
+    """Dump *schema* as compact JSON, as FastAPI's own schema route does."""
+    return json.dumps(
+        schema, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    )
+
+
+def _brotli(body: bytes) -> bytes | None:
+    try:
+        import brotli  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return brotli.compress(body)
+
+
+class RenderedDocument:
+    """One representation of a document, with its encoded variants.
+
+    Attributes:
+        media_type: The ``Content-Type`` of the document.
+        etag: Strong entity tag of the identity encoding.
+        variants: Body and ``ETag`` per content coding (``identity``,
+            ``gzip`` and, when available, ``br``).
+    """
+
+    __slots__ = ("media_type", "etag", "variants")
+
+    def __init__(self, text: str, media_type: str) -> None:
+        body = text.encode()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.media_type = media_type
+        self.etag = f'"{digest}"'
+        self.variants: dict[str, tuple[bytes, str]] = {"identity": (body, self.etag)}
+        encoded = {"gzip": gzip.compress(body, mtime=0), "br": _brotli(body)}
+        for coding, suffix in _CODINGS:
+            variant = encoded[coding]
+            if variant is not None:
+                self.variants[coding] = (variant, f'"{digest}{suffix}"')
+
+    def _coding(self, accept_encoding: str) -> str:
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, *params = item.split(";")
+            quality = 1.0
+            for param in params:
+                name, _, value = param.strip().partition("=")
+                if name == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip().lower())
+        for coding, _ in _CODINGS:
+            if coding in self.variants and (coding in accepted or "*" in accepted):
+                return coding
+        return "identity"
+
+    def _not_modified(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return any(etag in tags for _, etag in self.variants.values())
+
+    def response(self, request: Request) -> Response:
+        """Return the variant the request accepts, or a 304."""
+        coding = self._coding(request.headers.get("accept-encoding", ""))
+        body, etag = self.variants[coding]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if self._not_modified(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+def openapi_document(request: Request, media_type: str) -> RenderedDocument:
+    """Return the app's schema rendered as *media_type*, rendering it once.
+
+    Documents are cached on ``app.state`` per media type and root path,
+    since a proxy root path is added to the schema's ``servers``.
+    """
+    app = request.app
+    root_path = request.scope.get("root_path", "").rstrip("/")
+    documents = getattr(app.state, "openapi_documents", None)
+    if documents is None:
+        documents = app.state.openapi_documents = {}
+    key = (media_type, root_path)
+    document = documents.get(key)
+    if document is None:
+        schema = app.openapi()
+        if root_path and app.root_path_in_servers:
+            servers = schema.get("servers", [])
+            if root_path not in {server.get("url") for server in servers}:
+                schema = {**schema, "servers": [{"url": root_path}, *servers]}
+        render = render_json if media_type == JSON else render_yaml
+        document = documents[key] = RenderedDocument(render(schema), media_type)
+    return document
@@ -0,0 +1,73 @@
+"""Helpers for newline-delimited JSON (NDJSON) request and response streams.
+
+Lines are read from the request body incrementally and results are
+written back as they are produced, so server memory is bounded by the
+longest line rather than by the size of the whole stream.
+"""
+
+from typing import AsyncIterable, AsyncIterator
+
+from starlette.responses import StreamingResponse
+
+NDJSON = "application/x-ndjson"
+
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class LineTooLong:
+    """Placeholder yielded by :func:`iter_lines` for an oversized line."""
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[bytes | LineTooLong]:
+    """Split a byte stream into non-blank lines.
+
+    Lines longer than *max_length* are discarded without being buffered
+    and reported as a single :class:`LineTooLong` item.
+    """
+    buffer = b""
+    skipped = 0
+    async for chunk in chunks:
+        if skipped:
+            newline = chunk.find(b"\n")
+            if newline < 0:
+                skipped += len(chunk)
+                continue
+            yield LineTooLong(skipped + newline)
+            skipped = 0
+            chunk = chunk[newline + 1 :]
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line) > max_length:
+                yield LineTooLong(len(line))
+            elif line.strip():
+                yield line
+        if len(buffer) > max_length:
+            skipped, buffer = len(buffer), b""
+    if skipped:
+        yield LineTooLong(skipped)
+    elif buffer.strip():
+        yield buffer
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streaming response that leaves the request body to the endpoint.
+
+    :class:`~starlette.responses.StreamingResponse` listens for a client
+    disconnect on ASGI servers older than spec 2.4, which consumes the
+    request body messages.  Endpoints that read their request while
+    streaming the response need the body for themselves; a disconnect
+    still ends the stream when reading the request raises.
+    """
+
+    media_type = NDJSON
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,217 @@
+"""Lazy tabulation of an operation over a numeric range.
+
+One operand runs over an evenly spaced :class:`Grid` while the other is
+held fixed.  The grid is never materialized: points are generated
+:data:`CHUNK_SIZE` at a time as ``start + i * step`` (so rounding errors
+do not accumulate along the range), evaluated with the columnar kernels
+of :mod:`calculator.vector`, and encoded straight into response chunks,
+so server memory is bounded by one chunk however many points the table
+has.  Points outside the operation's domain are reported individually,
+and ranges that lie entirely outside it are rejected up front by
+:func:`check_range`.
+"""
+
+import json
+import math
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from . import vector
+from .operations import BINARY_OPERATIONS, ROUND_OPERATION
+from .transport import encode_float, encode_frame
+
+CHUNK_SIZE = 16384
+
+MAX_POINTS = 100_000_000
+
+# Domain check failures that hold at both ends of the range hold at every
+# point in between, except for the even-root check as the root varies.
+_NON_CONVEX = frozenset({("nth_root", "b")})
+
+# The points, results (NaN where a point failed) and failed indices by
+# error message of one evaluated chunk.
+Chunk = tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]
+
+
+@dataclass(frozen=True)
+class Grid:
+    """``count`` evenly spaced points, the *i*-th at ``start + i * step``.
+
+    Attributes:
+        start: The first point.
+        step: The spacing between points.
+        count: The number of points.
+        last: The exact last point, when it differs from the formula.
+    """
+
+    start: float
+    step: float
+    count: int
+    last: float | None = None
+
+    @classmethod
+    def from_range(
+        cls,
+        start: float,
+        stop: float,
+        step: float | None = None,
+        count: int | None = None,
+        max_points: int = MAX_POINTS,
+    ) -> "Grid":
+        """Build the grid for *start*, *stop* and either *step* or *count*.
+
+        With *step*, the points run from *start* up to but excluding
+        *stop*, as with :func:`range`.  With *count*, *count* points run
+        from *start* to *stop* inclusive.
+
+        Raises:
+            ValueError: If neither or both of *step* and *count* are
+                given, the range is empty or not finite, or it has more
+                than *max_points* points.
+        """
+        if not (math.isfinite(start) and math.isfinite(stop)):
+            raise ValueError("Range bounds must be finite")
+        if count is not None and step is None:
+            if count < 1:
+                raise ValueError("Count must be positive")
+            if count > max_points:
+                raise ValueError(
+                    f"Range has {count} points, more than the maximum of {max_points}"
+                )
+            if count == 1:
+                return cls(start, 0.0, 1)
+            return cls(start, (stop - start) / (count - 1), count, last=stop)
+        if step is None or count is not None:
+            raise ValueError("Exactly one of 'step' and 'count' is required")
+        if step == 0 or not math.isfinite(step):
+            raise ValueError("Step must be finite and non-zero")
+        span = (stop - start) / step
+        if not span > 0:
+            raise ValueError("Range is empty")
+        if span > max_points:
+            raise ValueError(f"Range has more than the maximum of {max_points} points")
+        count = math.ceil(span)
+        # Rounding may put the formula's last point on or past the stop.
+        while count > 1 and (start + (count - 1) * step - stop) * step >= 0:
+            count -= 1
+        return cls(start, step, count)
+
+    def points(self, begin: int, end: int) -> np.ndarray:
+        """Return the points with indices in ``[begin, end)``."""
+        points = self.start + np.arange(begin, end, dtype=np.float64) * self.step
+        if self.last is not None and end == self.count:
+            points[-1] = self.last
+        return points
+
+    @property
+    def endpoints(self) -> np.ndarray:
+        """The first and last points."""
+        return np.concatenate(
+            (self.points(0, 1), self.points(self.count - 1, self.count))
+        )
+
+
+def _operands(
+    op: str, points: np.ndarray, operand: str, value: float | None
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """Place *points* and the fixed *value* in the operand positions."""
+    if op not in BINARY_OPERATIONS:
+        return points, None
+    fixed = np.full(points.shape, value, dtype=np.float64)
+    return (points, fixed) if operand == "a" else (fixed, points)
+
+
+def validate(op: str, operand: str, value: float | None) -> None:
+    """Check that *operand* can vary and *value* is given when needed.
+
+    Raises:
+        ValueError: If the request does not fit the operation.
+    """
+    if op not in vector.VECTOR_OPERATIONS:
+        raise ValueError(f"Unknown operation: {op}")
+    if op in BINARY_OPERATIONS:
+        if value is None:
+            raise ValueError(f"Operation '{op}' requires a fixed 'value'")
+    elif operand != "a":
+        raise ValueError(f"Operation '{op}' only has operand 'a'")
+
+
+def check_range(op: str, grid: Grid, operand: str = "a", value: float | None = None):
+    """Reject a range on which every point fails the same domain check.
+
+    The domain checks are convex along the varying operand (apart from
+    :data:`_NON_CONVEX`), and the points are monotonic, so a check that
+    both endpoints fail is failed by every point.
+
+    Raises:
+        ValueError: With the check's message, if the whole range fails it.
+    """
+    if (op, operand) in _NON_CONVEX:
+        return
+    _, errors = vector.domain_errors(
+        op,
+        tuple(
+            x for x in _operands(op, grid.endpoints, operand, value) if x is not None
+        ),
+    )
+    for message, indices in errors.items():
+        if len(indices) == 2:
+            raise ValueError(f"{message} at every point of the range")
+
+
+def evaluate(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    op: str,
+    grid: Grid,
+    operand: str = "a",
+    value: float | None = None,
+    decimals: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Chunk]:
+    """Lazily evaluate *op* over the grid, *chunk_size* points at a time."""
+    for begin in range(0, grid.count, chunk_size):
+        points = grid.points(begin, min(begin + chunk_size, grid.count))
+        a, b = _operands(op, points, operand, value)
+        if op == ROUND_OPERATION:
+            result, errors = vector.evaluate(op, a, None, decimals)
+        else:
+            result, errors = vector.evaluate(op, a, b)
+        yield points, result, errors
+
+
+def ndjson_chunks(
+    chunks: Iterator[Chunk],
+) -> Iterator[bytes]:
+    """Encode evaluated chunks as result lines, one per point.
+
+    Each line is a ``/stream`` result line with the point added as ``x``.
+    """
+    for points, result, errors in chunks:
+        heads = [b'{"x":' + encode_float(x) for x in points.tolist()]
+        lines = [
+            head + b',"result":' + encode_float(value) + b',"detail":null}\n'
+            for head, value in zip(heads, result.tolist())
+        ]
+        for message, indices in errors.items():
+            tail = b',"result":null,"detail":' + json.dumps(message).encode() + b"}\n"
+            for i in indices.tolist():
+                lines[i] = heads[i] + tail
+        yield b"".join(lines)
+
+
+def frame_chunks(
+    op: str,
+    chunks: Iterator[Chunk],
+) -> Iterator[bytes]:
+    """Encode evaluated chunks as frames of point, result and error columns.
+
+    The error column holds 0 for a valid point and otherwise the 1-based
+    index of its message in :func:`calculator.vector.error_messages`.
+    """
+    codes = {message: code for code, message in enumerate(vector.error_messages(op), 1)}
+    for points, result, errors in chunks:
+        error = np.zeros(points.shape, dtype=np.float64)
+        for message, indices in errors.items():
+            error[indices] = codes[message]
+        yield encode_frame(op, np.stack((points, result, error)))
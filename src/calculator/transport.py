@@ -0,0 +1,451 @@
+"""Binary transports negotiated alongside JSON on the operation endpoints.
+
+Two content types are accepted in addition to ``application/json``:
+
+``application/msgpack``
+    The JSON request body shape, encoded with MessagePack.  Responses
+    use the JSON response shape.
+
+``application/octet-stream``
+    A raw little-endian frame (see :func:`decode_frame`) whose operand
+    columns are decoded straight from the request buffer into float64
+    arrays, without building intermediate Python objects.  The response
+    is a frame holding the ``result`` column.
+
+The response format follows the ``Accept`` header when it names one of
+these types or JSON, and otherwise mirrors the request content type.
+Requests without a binary content type are handled by FastAPI as usual,
+so JSON stays the default and the OpenAPI schema is unchanged.
+
+JSON results of the ``{"result": x}`` shape are encoded directly by
+:class:`ResultResponse`, skipping response model validation and
+serialization.  Strict JSON has no literal for non-finite floats, so
+infinities and NaN are encoded as the strings ``"Infinity"``,
+``"-Infinity"`` and ``"NaN"``, as pydantic does with
+``ser_json_inf_nan="strings"``; MessagePack and frames carry them as
+plain floats.
+"""
+
+import inspect
+import math
+import struct
+import types
+import typing
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, get_args
+
+import msgpack
+from annotated_types import MaxLen
+from fastapi import BackgroundTasks, HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import to_json
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+if TYPE_CHECKING:
+    import numpy as np
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+FRAME = "application/octet-stream"
+
+FRAME_MAGIC = b"CALC"
+FRAME_VERSION = 1
+
+# magic, version, op name length, column count, element count, parameter
+_FRAME_HEADER = struct.Struct("<4sBBHIi")
+
+# NumPy is imported on first use so that only frame requests pay for it.
+_FLOAT64 = "<f8"
+_FLOAT64_SIZE = 8
+
+
+_JSON_CONTENT_TYPE = JSON.encode()
+_NON_FINITE = {math.inf: '"Infinity"', -math.inf: '"-Infinity"'}
+
+
+def encode_float(value: float) -> bytes:
+    """Encode a float as compact JSON.
+
+    Finite floats use their shortest round-trip ``repr``, exactly as
+    :func:`json.dumps` does; non-finite ones are encoded as strings.
+    """
+    if math.isfinite(value):
+        return float.__repr__(float(value)).encode()
+    return _NON_FINITE.get(value, '"NaN"').encode()
+
+
+def encode_result(value: float) -> bytes:
+    """Encode ``{"result": value}`` as compact JSON (see :func:`encode_float`)."""
+    return b'{"result":' + encode_float(value) + b"}"
+
+
+class ResultResponse(Response):
+    """Pre-encoded JSON response for a single operation result.
+
+    Returned by the operation endpoints in place of their response model,
+    so FastAPI neither validates nor serializes it; the route's
+    ``response_model`` still documents the shape.  The raw value is kept
+    in :attr:`result` for the binary transports.
+    """
+
+    media_type = JSON
+
+    def __init__(
+        self,
+        result: float,
+        status_code: int = 200,
+        headers: typing.Mapping[str, str] | None = None,
+    ) -> None:
+        self.result = result
+        if headers is not None:
+            super().__init__(result, status_code, headers)
+            return
+        # The common case, without Response.init_headers()'s checks.
+        self.status_code = status_code
+        self.background = None
+        self.body = encode_result(result)
+        self.raw_headers = [
+            (b"content-length", str(len(self.body)).encode()),
+            (b"content-type", _JSON_CONTENT_TYPE),
+        ]
+
+    def render(self, content: float) -> bytes:
+        return encode_result(content)
+
+
+def encode_frame(op: str, columns: "np.ndarray", param: int = 0) -> bytes:
+    """Encode float64 *columns* (shape ``(C, N)`` or ``(N,)``) as a frame."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    columns = np.asarray(columns, dtype=_FLOAT64)
+    if columns.ndim == 1:
+        columns = columns.reshape(1, -1)
+    name = op.encode("ascii")
+    header = _FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, len(name), columns.shape[0], columns.shape[1], param
+    )
+    return header + name + columns.tobytes()
+
+
+def decode_frame(data: bytes) -> tuple[str, "np.ndarray", int]:
+    """Decode a frame into its operation name, columns and parameter.
+
+    The frame is a 16-byte header (``CALC`` magic, uint8 version, uint8
+    operation name length *L*, uint16 column count *C*, uint32 element
+    count *N*, int32 parameter), the ASCII operation name, then *C*
+    columns of *N* little-endian float64 values each.  The returned
+    ``(C, N)`` array is a read-only view of *data*.
+
+    Raises:
+        ValueError: If the frame is malformed.
+    """
+    if len(data) < _FRAME_HEADER.size:
+        raise ValueError("Malformed frame: truncated header")
+    magic, frame_version, name_length, column_count, count, param = (
+        _FRAME_HEADER.unpack_from(data)
+    )
+    if magic != FRAME_MAGIC:
+        raise ValueError("Malformed frame: bad magic")
+    if frame_version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version: {frame_version}")
+    offset = _FRAME_HEADER.size + name_length
+    if len(data) != offset + column_count * count * _FLOAT64_SIZE:
+        raise ValueError("Malformed frame: payload length does not match header")
+    try:
+        op = data[_FRAME_HEADER.size : offset].decode("ascii")
+    except UnicodeDecodeError as e:
+        raise ValueError("Malformed frame: operation name is not ASCII") from e
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    columns = np.frombuffer(
+        data, dtype=_FLOAT64, count=column_count * count, offset=offset
+    )
+    return op, columns.reshape(column_count, count), param
+
+
+def media_type(header: str | None) -> str:
+    """Return the bare, lower-case media type of a content-type header."""
+    if not header:
+        return ""
+    return header.split(";", 1)[0].strip().lower()
+
+
+def _response_type(request: Request, request_type: str) -> str:
+    """Pick the response media type from the ``Accept`` header."""
+    for candidate in request.headers.get("accept", "").split(","):
+        candidate = media_type(candidate)
+        if candidate in (JSON, MSGPACK, FRAME):
+            return candidate
+    return request_type
+
+
+def _is_float_column(annotation: Any) -> bool | None:
+    """Classify a field: True for ``list[float]``, False for ``float``."""
+    if isinstance(annotation, types.UnionType) or typing.get_origin(annotation) in (
+        typing.Union,
+    ):
+        members = [arg for arg in get_args(annotation) if arg is not types.NoneType]
+        return _is_float_column(members[0]) if len(members) == 1 else None
+    if annotation is float:
+        return False
+    if typing.get_origin(annotation) is list and get_args(annotation) == (float,):
+        return True
+    return None
+
+
+def _length_errors(model: type[BaseModel], names: list[str], count: int) -> list:
+    """Return the validation errors of *count*-element columns *names*."""
+    errors = []
+    for name in names:
+        for constraint in model.model_fields[name].metadata:
+            if isinstance(constraint, MaxLen) and count > constraint.max_length:
+                errors.append(
+                    {
+                        "type": "too_long",
+                        "loc": (name,),
+                        "msg": f"List should have at most {constraint.max_length} "
+                        f"items after validation, not {count}",
+                        "input": None,
+                        "ctx": {
+                            "max_length": constraint.max_length,
+                            "actual_length": count,
+                        },
+                    }
+                )
+    return errors
+
+
+def _is_model(annotation: Any) -> bool:
+    return inspect.isclass(annotation) and issubclass(annotation, BaseModel)
+
+
+class NegotiatedRoute(APIRoute):
+    """API route that also accepts MessagePack and raw float64 frames.
+
+    Binary requests are decoded here, turned into the endpoint's request
+    model and passed to the endpoint directly; everything else goes
+    through FastAPI's regular JSON handling.  Frames map their columns
+    onto the model's ``float``/``list[float]`` fields in declaration
+    order and their header parameter onto ``decimals``; either body is
+    validated against the model.  The endpoint receives the
+    :class:`~starlette.requests.Request`, ``Response`` and
+    ``BackgroundTasks`` parameters it declares, as from FastAPI; routes
+    with query, header or cookie parameters or dependencies answer
+    binary requests with HTTP 415.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs) -> None:
+        # Introspect before super().__init__(), which builds the handler.
+        self._body_name: str | None = None
+        self._body_model: type[BaseModel] | None = None
+        self._path_params: dict[str, TypeAdapter] = {}
+        for name, parameter in inspect.signature(endpoint).parameters.items():
+            annotation = parameter.annotation
+            if _is_model(annotation):
+                self._body_name, self._body_model = name, annotation
+            elif "{" + name + "}" in path:
+                self._path_params[name] = TypeAdapter(annotation)
+        self._columns: list[str] = []
+        self._required_columns = 0
+        self._vectorized = False
+        if self._body_model is not None:
+            for name, field in self._body_model.model_fields.items():
+                kind = _is_float_column(field.annotation)
+                if kind is None:
+                    continue
+                self._columns.append(name)
+                self._required_columns += field.is_required()
+                self._vectorized = kind
+        self._is_coroutine = inspect.iscoroutinefunction(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        json_handler = super().get_route_handler()
+        body_name, body_model = self._body_name, self._body_model
+        if body_name is None or body_model is None:
+            return json_handler
+        dependant = self.dependant
+        # Only path parameters and the body are decoded here; anything
+        # else FastAPI would resolve keeps the route JSON-only.
+        binary = not (
+            dependant.query_params
+            or dependant.header_params
+            or dependant.cookie_params
+            or dependant.dependencies
+        )
+
+        async def handler(request: Request) -> Response:
+            request_type = media_type(request.headers.get("content-type"))
+            if request_type not in (MSGPACK, FRAME):
+                return await json_handler(request)
+            if not binary:
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"{request_type} is not supported by {self.path}",
+                )
+            kwargs = self._validate_path_params(request)
+            body = await request.body()
+            if request_type == MSGPACK:
+                model = self._decode_msgpack(body_model, body)
+            else:
+                model = self._decode_frame(body_model, body, kwargs)
+            kwargs[body_name] = model
+            sub_response, background = self._inject(request, kwargs)
+            if self._is_coroutine:
+                content = await self.endpoint(**kwargs)
+            else:
+                content = await run_in_threadpool(self.endpoint, **kwargs)
+            response = self._encode(
+                content, _response_type(request, request_type), kwargs
+            )
+            if sub_response is not None:
+                if sub_response.status_code:
+                    response.status_code = sub_response.status_code
+                response.headers.raw.extend(sub_response.headers.raw)
+            if background is not None and response.background is None:
+                response.background = background
+            return response
+
+        return handler
+
+    def _inject(
+        self, request: Request, kwargs: dict[str, Any]
+    ) -> tuple[Response | None, BackgroundTasks | None]:
+        """Pass the special parameters FastAPI would to the endpoint.
+
+        Returns:
+            The response whose status and headers the endpoint may set,
+            and the background tasks it may add, if it takes them.
+        """
+        dependant = self.dependant
+        for name in (
+            dependant.request_param_name,
+            dependant.http_connection_param_name,
+        ):
+            if name:
+                kwargs[name] = request
+        sub_response = background = None
+        if dependant.response_param_name:
+            sub_response = Response()
+            del sub_response.headers["content-length"]
+            sub_response.status_code = None  # type: ignore[assignment]
+            kwargs[dependant.response_param_name] = sub_response
+        if dependant.background_tasks_param_name:
+            background = BackgroundTasks()
+            kwargs[dependant.background_tasks_param_name] = background
+        return sub_response, background
+
+    def _validate_path_params(self, request: Request) -> dict[str, Any]:
+        kwargs = {}
+        for name, adapter in self._path_params.items():
+            try:
+                kwargs[name] = adapter.validate_python(request.path_params[name])
+            except ValidationError as e:
+                raise RequestValidationError(e.errors()) from e
+        return kwargs
+
+    @staticmethod
+    def _decode_msgpack(model: type[BaseModel], body: bytes) -> BaseModel:
+        try:
+            data = msgpack.unpackb(body)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise HTTPException(status_code=400, detail="Malformed MessagePack") from e
+        try:
+            return model.model_validate(data)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors()) from e
+
+    def _operation(self, kwargs: dict[str, Any]) -> str:
+        return kwargs.get("op") or self.path.rsplit("/", 1)[-1]
+
+    def _decode_frame(
+        self, model: type[BaseModel], body: bytes, kwargs: dict[str, Any]
+    ) -> BaseModel:
+        """Build the request model from a frame.
+
+        Scalar columns are validated with the model.  Vector columns are
+        checked against their ``max_length`` on the array itself, then
+        set on the validated model as they are, without converting them
+        to lists: the model sees them as empty lists during validation.
+        """
+        if not self._columns:
+            raise HTTPException(
+                status_code=415, detail=f"{FRAME} is not supported by {self.path}"
+            )
+        try:
+            op, columns, param = decode_frame(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        if op != self._operation(kwargs):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Frame operation '{op}' does not match {self.path}",
+            )
+        column_count, count = columns.shape
+        if not self._required_columns <= column_count <= len(self._columns):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Frame has {column_count} column(s), expected "
+                f"{self._required_columns} to {len(self._columns)}",
+            )
+        if not self._vectorized and count != 1:
+            raise HTTPException(
+                status_code=400, detail="Frame must hold exactly one element"
+            )
+        names = self._columns[:column_count]
+        values: dict[str, Any] = {}
+        if self._vectorized:
+            errors = _length_errors(model, names, count)
+            if errors:
+                raise RequestValidationError(errors)
+            values = dict.fromkeys(names, [])
+        else:
+            values = {name: float(column[0]) for name, column in zip(names, columns)}
+        if "decimals" in model.model_fields:
+            values["decimals"] = param
+        try:
+            validated = model.model_validate(values)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors()) from e
+        if not self._vectorized:
+            return validated
+        return validated.model_copy(update=dict(zip(names, columns)))
+
+    def _encode(self, content: Any, response_type: str, kwargs: dict) -> Response:
+        if isinstance(content, ResultResponse):
+            if response_type == JSON:
+                return content
+            content = {"result": content.result}
+        elif isinstance(content, Response):
+            return content
+        elif (
+            not isinstance(content, BaseModel)
+            and response_type != FRAME
+            and _is_model(self.response_model)
+        ):
+            content = self.response_model.model_validate(content)
+        if response_type == JSON:
+            # Serialized by pydantic, so that the model's non-finite float
+            # setting applies.
+            if isinstance(content, BaseModel):
+                return Response(content.model_dump_json(), media_type=JSON)
+            return Response(to_json(content, inf_nan_mode="strings"), media_type=JSON)
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        if response_type == MSGPACK:
+            return Response(msgpack.packb(content), media_type=MSGPACK)
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        result = np.array(content["result"], dtype=_FLOAT64, ndmin=1)
+        headers = {}
+        if "errors" in content:
+            failed = sum(len(error["indices"]) for error in content["errors"])
+            headers["X-Error-Count"] = str(failed)
+        return Response(
+            encode_frame(self._operation(kwargs), result),
+            media_type=FRAME,
+            headers=headers,
+        )
@@ -0,0 +1,225 @@
+"""Vectorized (columnar) implementations of the calculator operations.
+
+Each operation is evaluated over whole NumPy ``float64`` arrays instead of
+element by element through :class:`calculator_lib.Calculator`.  Inputs
+that the scalar calculator would reject with a ``ValueError`` (or an
+``OverflowError``, reported as out of range) are not fatal here: their
+indices are collected, grouped by error message, and their result slots
+are left as NaN.
+"""
+
+from typing import Callable
+
+import numpy as np
+
+from .operations import (
+    BINARY_OPERATIONS,
+    OUT_OF_RANGE,
+    ROUND_OPERATION,
+    UNARY_OPERATIONS,
+)
+
+VECTOR_OPERATIONS = BINARY_OPERATIONS + UNARY_OPERATIONS + (ROUND_OPERATION,)
+
+_NOT_REAL = "Result is not a real number"
+_NAN_TO_INTEGER = "cannot convert float NaN to integer"
+
+# Decimal places for which 10.0 ** decimals is exact.
+_EXACT_SCALE = 22
+# Beyond these, Python's round() returns x unchanged, or a signed zero.
+_ROUND_IDENTITY_DIGITS = 323
+_ROUND_ZERO_DIGITS = -308
+
+Check = tuple[Callable[..., np.ndarray], str]
+
+
+def _nth_root(a: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Odd roots of negative numbers are real, as in ``Calculator.nth_root``."""
+    return np.where(a < 0, -np.power(-a, 1 / n), np.power(a, 1 / n))
+
+
+_KERNELS: dict[str, Callable[..., np.ndarray]] = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": np.divide,
+    "power": np.power,
+    "nth_root": _nth_root,
+    "modulo": np.remainder,
+    "floor_divide": np.floor_divide,
+    "sqrt": np.sqrt,
+    "absolute": np.abs,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "log10": np.log10,
+    "ln": np.log,
+    "exp": np.exp,
+}
+
+# Domain checks mirroring the errors raised by calculator_lib.
+_CHECKS: dict[str, list[Check]] = {
+    "divide": [(lambda a, b: b == 0, "Cannot divide by zero")],
+    "power": [
+        (
+            lambda a, b: (a == 0) & (b < 0),
+            "0.0 cannot be raised to a negative power",
+        )
+    ],
+    "sqrt": [(lambda a: a < 0, "Cannot take square root of a negative number")],
+    "nth_root": [
+        (lambda a, b: b == 0, "Cannot take zeroth root"),
+        (
+            lambda a, b: (a < 0) & (np.remainder(b, 2) == 0),
+            "Cannot take even root of a negative number",
+        ),
+    ],
+    "modulo": [(lambda a, b: b == 0, "Cannot modulo by zero")],
+    "floor_divide": [(lambda a, b: b == 0, "Cannot floor divide by zero")],
+    "log10": [(lambda a: a <= 0, "Cannot take logarithm of a non-positive number")],
+    "ln": [(lambda a: a <= 0, "Cannot take logarithm of a non-positive number")],
+    "floor": [
+        (np.isinf, "Cannot take floor of an infinite number"),
+        (np.isnan, _NAN_TO_INTEGER),
+    ],
+    "ceil": [
+        (np.isinf, "Cannot take ceiling of an infinite number"),
+        (np.isnan, _NAN_TO_INTEGER),
+    ],
+}
+
+# Operations whose scalar counterparts raise OverflowError instead of
+# returning infinity, or produce complex numbers for negative bases.
+_RANGE_CHECKED = frozenset({"power", "nth_root", "exp"})
+
+
+def error_messages(op: str) -> list[str]:
+    """Return every error message :func:`evaluate` can report for *op*."""
+    messages = [message for _, message in _CHECKS.get(op, ())]
+    if op == ROUND_OPERATION:
+        messages.append(OUT_OF_RANGE)
+    if op in _RANGE_CHECKED:
+        messages += [OUT_OF_RANGE, _NOT_REAL]
+    return messages
+
+
+def domain_errors(
+    op: str, operands: tuple[np.ndarray, ...]
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Apply the domain checks of *op* to its operand arrays.
+
+    Returns:
+        A tuple of the mask of rejected elements and a dict mapping each
+        error message to the indices it applies to; each element is
+        reported under the first check it fails.
+    """
+    failed = np.zeros(operands[0].shape, dtype=bool)
+    errors: dict[str, np.ndarray] = {}
+    for check, message in _CHECKS.get(op, ()):
+        mask = check(*operands) & ~failed
+        if mask.any():
+            errors[message] = np.flatnonzero(mask)
+            failed |= mask
+    return failed, errors
+
+
+def _round(a: np.ndarray, decimals: int) -> tuple[np.ndarray, np.ndarray]:
+    """Round like Python's ``round()``, as ``Calculator.round_number`` does.
+
+    ``np.round`` rounds ``a * 10**decimals``, whose own rounding error
+    can carry a value across a tie (``np.round(2.675, 2)`` is 2.68, but
+    the double nearest 2.675 is below it).  Elements scaled to within an
+    ulp of a tie, or beyond exact integers, are rounded with ``round()``
+    itself, and so are all elements when ``10**decimals`` is inexact.
+
+    Returns:
+        A tuple of the result array and the indices of the elements
+        whose rounded value overflows.
+    """
+    if decimals == 0:
+        return np.round(a), np.zeros(0, dtype=np.intp)
+    if decimals > _ROUND_IDENTITY_DIGITS:
+        return a.copy(), np.zeros(0, dtype=np.intp)
+    if decimals < _ROUND_ZERO_DIGITS:
+        zeros = np.where(np.isfinite(a), np.copysign(0.0, a), a)
+        return zeros, np.zeros(0, dtype=np.intp)
+    if abs(decimals) > _EXACT_SCALE:
+        result = np.empty_like(a)
+        indices = np.arange(len(a))
+    else:
+        scale = 10.0 ** abs(decimals)
+        with np.errstate(all="ignore"):
+            scaled = np.abs(a * scale if decimals > 0 else a / scale)
+            result = np.round(a, decimals)
+            tie_distance = np.abs(scaled - np.floor(scaled) - 0.5)
+            unsure = (
+                (tie_distance <= np.spacing(scaled))
+                | ~(scaled < 2.0**52)
+                | ~np.isfinite(result)
+            )
+        indices = np.flatnonzero(unsure & np.isfinite(a))
+    overflowed = []
+    for position, value in enumerate(a[indices].tolist()):
+        try:
+            result[indices[position]] = round(value, decimals)
+        except OverflowError:
+            overflowed.append(position)
+    return result, indices[overflowed]
+
+
+def evaluate(
+    op: str,
+    a: np.ndarray,
+    b: np.ndarray | None = None,
+    decimals: int = 0,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Evaluate *op* element-wise over the operand arrays.
+
+    Args:
+        op: Operation name, one of :data:`VECTOR_OPERATIONS`.
+        a: First operand column.
+        b: Second operand column for binary operations.
+        decimals: Decimal places for the ``round`` operation, which
+            rounds exactly as the scalar ``round`` does.
+
+    Returns:
+        A tuple of the result array, with NaN in every failed slot, and
+        a dict mapping each error message to the indices it applies to.
+
+    Raises:
+        ValueError: If *op* is unknown or *b* is missing for a binary
+            operation.
+    """
+    if op == ROUND_OPERATION:
+        result, overflowed = _round(a, decimals)
+        if overflowed.size == 0:
+            return result, {}
+        result[overflowed] = np.nan
+        return result, {OUT_OF_RANGE: overflowed}
+    kernel = _KERNELS.get(op)
+    if kernel is None:
+        raise ValueError(f"Unknown operation: {op}")
+    operands: tuple[np.ndarray, ...] = (a,)
+    if op in BINARY_OPERATIONS:
+        if b is None:
+            raise ValueError(f"Operation '{op}' requires operand 'b'")
+        operands = (a, b)
+
+    failed, errors = domain_errors(op, operands)
+
+    with np.errstate(all="ignore"):
+        result = kernel(*operands)
+
+    if op in _RANGE_CHECKED:
+        finite_inputs = np.logical_and.reduce([np.isfinite(x) for x in operands])
+        suspect = finite_inputs & ~failed
+        for mask, message in (
+            (suspect & np.isinf(result), OUT_OF_RANGE),
+            (suspect & np.isnan(result), _NOT_REAL),
+        ):
+            if mask.any():
+                errors[message] = np.flatnonzero(mask)
+                failed |= mask
+
+    if failed.any():
+        result[failed] = np.nan
+    return result, errors
@@ -0,0 +1,152 @@
+"""Persistent WebSocket calculation sessions.
+
+A client opens one connection and pipelines tagged operation messages
+over it.  Each message is evaluated in its own task, so replies are sent
+as soon as they are ready and may arrive out of order; the ``id`` echoed
+in every reply ties it to its request.  A session enforces a per-
+connection token bucket, a cap on in-flight messages, a bounded queue of
+replies waiting to be sent and an idle timeout, so long-lived connections
+cannot starve the worker or buffer replies for a client that does not
+read them.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable
+
+from starlette.websockets import WebSocket
+
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+IDLE_TIMEOUT_CLOSE_CODE = 1000
+IDLE_TIMEOUT = "Idle timeout"
+INTERNAL_ERROR_CLOSE_CODE = 1011
+INTERNAL_ERROR = "Internal error"
+RATE_LIMITED = "Rate limit exceeded"
+
+
+def message_id(message: str | bytes):
+    """Best-effort extraction of the ``id`` of an unprocessed message."""
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return None
+    return data.get("id") if isinstance(data, dict) else None
+
+
+class CalculationSession:  # pylint: disable=too-many-instance-attributes
+    """Serve one WebSocket connection.
+
+    Args:
+        websocket: The accepted-or-pending WebSocket connection.
+        handle: Coroutine turning one message into its encoded reply.
+        reject: Function encoding an error reply for a message ``id``
+            and detail.
+        rate: Sustained messages per second allowed on the connection.
+        burst: Messages allowed in a burst above *rate*.
+        idle_timeout: Seconds without a message before the connection
+            is closed.
+        max_in_flight: Messages evaluated concurrently, and replies
+            waiting to be sent, before the session stops reading from
+            the socket.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        websocket: WebSocket,
+        handle: Callable[[str | bytes], Awaitable[str]],
+        reject: Callable[[object, str], str],
+        *,
+        rate: float,
+        burst: float,
+        idle_timeout: float,
+        max_in_flight: int,
+    ) -> None:
+        self.websocket = websocket
+        self.handle = handle
+        self.reject = reject
+        self.bucket = TokenBucket(rate, burst)
+        self.idle_timeout = idle_timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._outbox: asyncio.Queue[str | None] = asyncio.Queue(max_in_flight)
+        self._tasks: set[asyncio.Task] = set()
+        self.received = 0
+        self.rejected = 0
+
+    async def run(self) -> None:
+        """Accept the connection and serve it until it closes.
+
+        The server closes the connection after an idle timeout, or with
+        code 1011 if serving it fails.
+        """
+        await self.websocket.accept()
+        writer = asyncio.create_task(self._write())
+        disconnected = False
+        code, reason = IDLE_TIMEOUT_CLOSE_CODE, IDLE_TIMEOUT
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        self.websocket.receive(), self.idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.info("WebSocket session idle, closing")
+                    break
+                if message["type"] == "websocket.disconnect":
+                    disconnected = True
+                    break
+                payload = message.get("text")
+                if payload is None:
+                    payload = message.get("bytes") or b""
+                self.received += 1
+                if not self.bucket.try_acquire():
+                    self.rejected += 1
+                    await self._outbox.put(
+                        self.reject(message_id(payload), RATE_LIMITED)
+                    )
+                    continue
+                await self._slots.acquire()
+                task = asyncio.create_task(self._process(payload))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except asyncio.CancelledError:
+            # The server is stopping: drop the pending replies.
+            disconnected = True
+            raise
+        except Exception:
+            logger.exception("WebSocket session failed, closing")
+            code, reason = INTERNAL_ERROR_CLOSE_CODE, INTERNAL_ERROR
+            raise
+        finally:
+            if disconnected:
+                for task in self._tasks:
+                    task.cancel()
+                writer.cancel()
+            else:
+                if self._tasks:
+                    await asyncio.gather(*self._tasks, return_exceptions=True)
+                await self._outbox.put(None)
+                await writer
+                await self.websocket.close(code=code, reason=reason)
+            logger.info(
+                "WebSocket session closed: %d messages, %d rate limited",
+                self.received,
+                self.rejected,
+            )
+
+    async def _process(self, payload: str | bytes) -> None:
+        # Waits for room in the outbox, holding the slot meanwhile.
+        try:
+            await self._outbox.put(await self.handle(payload))
+        finally:
+            self._slots.release()
+
+    async def _write(self) -> None:
+        while True:
+            reply = await self._outbox.get()
+            if reply is None:
+                return
+            await self.websocket.send_text(reply)
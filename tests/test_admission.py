@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api
+from calculator.admission import (
+    AdaptiveLimit,
+    AdmissionController,
+    AdmissionMiddleware,
+)
+
+
+def client_for(controller, exempt_paths=("/metrics",)):
+    return TestClient(AdmissionMiddleware(api.app, controller, exempt_paths))
+
+
+def test_adaptive_limit_increases_additively():
+    limit = AdaptiveLimit(initial=10, min_limit=1, max_limit=12, target_latency=0.05)
+    for _ in range(10):
+        limit.observe(0.01)
+    assert limit.limit == pytest.approx(11, abs=0.1)
+    for _ in range(100):
+        limit.observe(0.01)
+    assert limit.limit == 12
+
+
+def test_adaptive_limit_decreases_once_per_window():
+    now = [0.0]
+    limit = AdaptiveLimit(10, 5, 100, target_latency=0.05, clock=lambda: now[0])
+    limit.observe(1.0)
+    limit.observe(1.0)
+    assert limit.limit == pytest.approx(9)
+    now[0] = 0.1
+    for _ in range(20):
+        limit.observe(1.0)
+        now[0] += 0.1
+    assert limit.limit == 5
+
+
+def test_client_rate_limit_returns_429():
+    controller = AdmissionController(client_rate=0.5, client_burst=2)
+    client = client_for(controller)
+    statuses = [
+        client.post("/add", json={"a": 1, "b": 2}).status_code for _ in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+    response = client.post("/add", json={"a": 1, "b": 2})
+    assert response.json() == {"detail": "Rate limit exceeded"}
+    assert response.headers["retry-after"] == "2"
+    assert controller.stats()["rate_limited"] == 2
+
+
+def test_client_buckets_are_bounded():
+    controller = AdmissionController(client_rate=1, client_burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        assert controller.check_rate(client) is None
+    assert controller.stats()["clients"] == 2
+    assert controller.check_rate("a") is None
+    assert controller.check_rate("c") is not None
+
+
+def test_concurrency_limit_sheds_with_503():
+    controller = AdmissionController(max_in_flight=4)
+    client = client_for(controller)
+    assert client.post("/add", json={"a": 1, "b": 2}).status_code == 200
+    assert controller.in_flight == 0
+    controller.in_flight = 4
+    response = client.post("/add", json={"a": 1, "b": 2})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert controller.stats()["shed"] == 1
+
+
+def test_adaptive_limit_caps_concurrency():
+    controller = AdmissionController(
+        max_in_flight=100, adaptive=AdaptiveLimit(2, 1, 100, 0.05)
+    )
+    controller.in_flight = 2
+    assert controller.limit == 2
+    assert client_for(controller).post("/sqrt", json={"a": 4}).status_code == 503
+
+
+def test_exempt_paths_bypass_admission():
+    controller = AdmissionController(max_in_flight=0)
+    client = client_for(controller, exempt_paths=("/cache/stats",))
+    assert client.get("/cache/stats").status_code == 200
+    assert client.post("/add", json={"a": 1, "b": 2}).status_code == 503
@@ -2,7 +2,9 @@
 import yaml
 from fastapi.testclient import TestClient
 
+from calculator import api
 from calculator.api import app
+from calculator.cache import ResultCache
 
 client = TestClient(app)
 
@@ -22,6 +24,45 @@ def test_openapi_yaml():
     assert "/add" in spec["paths"]
 
 
+@pytest.mark.parametrize("path", ["/openapi.yaml", "/docs"])
+def test_openapi_conditional_get(path):
+    response = client.get(path, headers={"Accept-Encoding": "identity"})
+    etag = response.headers["etag"]
+    assert etag.startswith('"')  # strong ETag, no W/ prefix
+    assert response.headers["cache-control"] == "public, max-age=300"
+    assert "content-encoding" not in response.headers
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    changed = client.get(path, headers={"If-None-Match": '"stale"'})
+    assert changed.status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/openapi.yaml", "/docs"])
+def test_openapi_precompressed(path):
+    plain = client.get(path, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.headers["etag"] != plain.headers["etag"]
+    assert compressed.content == plain.content
+    refused = client.get(path, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+
+
+def test_openapi_json_matches_schema():
+    assert client.get("/docs").json() == app.openapi()
+
+
+def test_openapi_documents_non_finite_results():
+    schemas = app.openapi()["components"]["schemas"]
+    result = schemas["OperationResponse"]["properties"]["result"]
+    assert result["anyOf"] == [
+        {"type": "number"},
+        {"type": "string", "enum": ["Infinity", "-Infinity", "NaN"]},
+    ]
+
+
 def test_add():
     response = client.post("/add", json={"a": 2, "b": 3})
     assert response.status_code == 200
@@ -136,6 +177,21 @@ def test_ceil():
     assert response.json() == {"result": 4.0}
 
 
+@pytest.mark.parametrize(
+    "path, body, detail",
+    [
+        ("/floor", '{"a": Infinity}', "Cannot take floor of an infinite number"),
+        ("/ceil", '{"a": -Infinity}', "Cannot take ceiling of an infinite number"),
+    ],
+)
+def test_floor_and_ceil_reject_infinity(path, body, detail):
+    response = client.post(
+        path, content=body, headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
+
+
 def test_log10():
     response = client.post("/log10", json={"a": 100})
     assert response.status_code == 200
@@ -168,3 +224,237 @@ def test_exp():
     response = client.post("/exp", json={"a": 0})
     assert response.status_code == 200
     assert response.json() == {"result": 1.0}
+
+
+@pytest.mark.parametrize(
+    "path, body",
+    [
+        ("/exp", '{"a": 1000}'),
+        ("/power", '{"a": 10, "b": 1000}'),
+    ],
+)
+def test_overflow_is_bad_request(path, body):
+    response = client.post(
+        path, content=body, headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Numerical result out of range"}
+
+
+@pytest.mark.parametrize(
+    "path, body, expected",
+    [
+        ("/multiply", '{"a": 1e200, "b": -1e200}', "-Infinity"),
+        ("/add", '{"a": 1e308, "b": 1e308}', "Infinity"),
+        ("/subtract", '{"a": Infinity, "b": Infinity}', "NaN"),
+        ("/evaluate", '{"expression": "a * a", "variables": {"a": 1e200}}', "Infinity"),
+    ],
+)
+def test_non_finite_results_are_strings(path, body, expected):
+    response = client.post(
+        path, content=body, headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 200
+    assert response.text == '{"result":"%s"}' % expected
+
+
+def test_non_finite_batch_results_are_strings():
+    response = client.post(
+        "/batch",
+        json={"operations": [{"op": "multiply", "a": 1e200, "b": 1e200}]},
+    )
+    assert response.json() == {"results": [{"result": "Infinity", "detail": None}]}
+
+
+def test_batch():
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "add", "a": 2, "b": 3},
+                {"op": "sqrt", "a": 16},
+                {"op": "round", "a": 3.14159, "decimals": 2},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [
+            {"result": 5.0, "detail": None},
+            {"result": 4.0, "detail": None},
+            {"result": 3.14, "detail": None},
+        ]
+    }
+
+
+def test_batch_reports_errors_per_item():
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "divide", "a": 1, "b": 0},
+                {"op": "multiply", "a": 3, "b": 7},
+                {"op": "log10", "a": -1},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [
+            {"result": None, "detail": "Cannot divide by zero"},
+            {"result": 21.0, "detail": None},
+            {
+                "result": None,
+                "detail": "Cannot take logarithm of a non-positive number",
+            },
+        ]
+    }
+
+
+def test_batch_reports_overflow_like_single_operations():
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [{"op": "exp", "a": 1000}, {"op": "power", "a": 10, "b": 400}]
+        },
+    )
+    assert [item["detail"] for item in response.json()["results"]] == [
+        "Numerical result out of range"
+    ] * 2
+
+
+def test_batch_missing_operand():
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "add", "a": 1},
+                {"op": "sqrt"},
+                {"op": "sqrt", "a": 4},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"result": None, "detail": "Operation 'add' requires operand 'b'"},
+        {"result": None, "detail": "Operation 'sqrt' requires operand 'a'"},
+        {"result": 2.0, "detail": None},
+    ]
+
+
+def test_batch_unknown_operation():
+    response = client.post(
+        "/batch", json={"operations": [{"op": "sin", "a": 1, "b": 2}]}
+    )
+    assert response.status_code == 422
+
+
+def test_vector_add():
+    response = client.post("/vector/add", json={"a": [1, 2, 3], "b": [4, 5, 6]})
+    assert response.status_code == 200
+    assert response.json() == {"result": [5.0, 7.0, 9.0], "errors": []}
+
+
+def test_vector_round():
+    response = client.post("/vector/round", json={"a": [3.14159, 2.5], "decimals": 2})
+    assert response.status_code == 200
+    assert response.json() == {"result": [3.14, 2.5], "errors": []}
+
+
+def test_vector_log10_reports_invalid_indices():
+    response = client.post("/vector/log10", json={"a": [100, 0, 10, -5]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "result": [2.0, None, 1.0, None],
+        "errors": [
+            {
+                "detail": "Cannot take logarithm of a non-positive number",
+                "indices": [1, 3],
+            }
+        ],
+    }
+
+
+def test_vector_nth_root():
+    response = client.post(
+        "/vector/nth_root", json={"a": [27, -8, -16, 8], "b": [3, 3, 2, 0]}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["result"][:2] == [pytest.approx(3.0), pytest.approx(-2.0)]
+    assert body["result"][2:] == [None, None]
+    assert body["errors"] == [
+        {"detail": "Cannot take zeroth root", "indices": [3]},
+        {"detail": "Cannot take even root of a negative number", "indices": [2]},
+    ]
+
+
+def test_vector_exp_out_of_range():
+    response = client.post("/vector/exp", json={"a": [0, 1000]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "result": [1.0, None],
+        "errors": [{"detail": "Numerical result out of range", "indices": [1]}],
+    }
+
+
+def test_vector_missing_operand():
+    response = client.post("/vector/divide", json={"a": [1, 2]})
+    assert response.status_code == 422
+
+
+def test_vector_length_mismatch():
+    response = client.post("/vector/add", json={"a": [1, 2], "b": [1]})
+    assert response.status_code == 422
+
+
+def test_evaluate():
+    response = client.post(
+        "/evaluate",
+        json={"expression": "round(sqrt(a*a + b*b), 2)", "variables": {"a": 3, "b": 4}},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"result": 5.0}
+
+
+def test_evaluate_invalid_input():
+    response = client.post(
+        "/evaluate", json={"expression": "ln(a)", "variables": {"a": 0}}
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "Cannot take logarithm of a non-positive number"
+    }
+
+
+@pytest.mark.parametrize("expression", ["exp(1000)", "10 ** 400", "power(a, 400)"])
+def test_evaluate_reports_overflow_like_single_operations(expression):
+    response = client.post(
+        "/evaluate", json={"expression": expression, "variables": {"a": 10}}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Numerical result out of range"}
+
+
+def test_evaluate_malformed_expression():
+    response = client.post("/evaluate", json={"expression": "open('x')"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown function: open"}
+
+
+def test_cache_stats_disabled():
+    response = client.get("/cache/stats")
+    assert response.status_code == 200
+    assert response.json() == {"enabled": False}
+
+
+def test_cached_operations(monkeypatch):
+    monkeypatch.setattr(api.app.state.runtime, "result_cache", ResultCache(max_size=10))
+    for _ in range(2):
+        assert client.post("/power", json={"a": 2, "b": 3}).json() == {"result": 8.0}
+        response = client.post("/divide", json={"a": 1, "b": 0})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Cannot divide by zero"}
+    stats = client.get("/cache/stats").json()
+    assert stats["enabled"] is True
+    assert (stats["hits"], stats["misses"]) == (2, 2)
@@ -0,0 +1,98 @@
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+spec = importlib.util.spec_from_file_location(
+    "benchmark", ROOT / "scripts" / "benchmark.py"
+)
+benchmark = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark)
+
+
+def route(rps, p50):
+    return {"requests": 100, "rps": rps, "p50_ms": p50, "p99_ms": p50 * 2}
+
+
+def test_summary_percentiles():
+    summary = benchmark._summary([i / 1000 for i in range(1, 101)], elapsed=0.5)
+    assert summary == {"requests": 100, "rps": 200.0, "p50_ms": 51.0, "p99_ms": 100.0}
+
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = {"routes": {"add": route(1000, 0.10), "sqrt": route(1000, 0.10)}}
+    current = {"routes": {"add": route(950, 0.105), "sqrt": route(800, 0.20)}}
+    regressions = benchmark.compare(current, baseline, threshold=0.10)
+    assert len(regressions) == 2
+    assert all(regression.startswith("sqrt:") for regression in regressions)
+
+
+def test_covers_every_route():
+    from calculator.api import router
+
+    post_paths = {
+        route.path for route in router.routes if "POST" in getattr(route, "methods", ())
+    }
+    case_paths = {path for path, _, _ in benchmark._route_cases().values()}
+    # Background jobs answer before evaluating: there is no latency to measure.
+    jobs = {"/jobs", "/jobs/{job_id}/cancel"}
+    templates = {"/vector/{op}", "/precise/{op}", "/reduce/{op}", "/tabulate/{op}"}
+    assert post_paths - case_paths == templates | jobs
+    assert {
+        "/vector/sqrt",
+        "/precise/add",
+        "/reduce/sum",
+        "/tabulate/log10",
+    } <= case_paths
+
+
+def test_inprocess_run_writes_results(tmp_path):
+    output = tmp_path / "results.json"
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "scripts" / "benchmark.py"),
+            "--requests",
+            "5",
+            "--warmup",
+            "1",
+            "--concurrency",
+            "1,2",
+            "--output",
+            str(output),
+        ],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+    )
+    results = json.loads(output.read_text())
+    assert set(results) == {"meta", "routes", "components", "scaling", "reductions"}
+    assert results["reductions"]["sum_frame"]["elements"] == 100_000
+    assert results["routes"]["add"]["requests"] == 5
+    assert [level["concurrency"] for level in results["scaling"]] == [1, 2]
+    completed = subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "scripts" / "benchmark.py"),
+            "--requests",
+            "5",
+            "--warmup",
+            "1",
+            "--concurrency",
+            "1",
+            "--output",
+            str(tmp_path / "current.json"),
+            "--compare",
+            str(output),
+            "--threshold",
+            "-1",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 1
+    assert "REGRESSION" in completed.stderr
@@ -0,0 +1,74 @@
+import pytest
+from calculator_lib import Calculator
+
+from calculator.cache import ResultCache, make_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def calc():
+    return Calculator()
+
+
+def test_hit_and_miss(calc):
+    cache = ResultCache(max_size=10)
+    assert cache.call("power", calc.power, 2.0, 10.0) == 1024.0
+    assert cache.call("power", calc.power, 2.0, 10.0) == 1024.0
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction(calc):
+    cache = ResultCache(max_size=2)
+    cache.call("add", calc.add, 1.0, 1.0)
+    cache.call("add", calc.add, 2.0, 2.0)
+    cache.call("add", calc.add, 1.0, 1.0)
+    cache.call("add", calc.add, 3.0, 3.0)
+    assert cache.stats()["evictions"] == 1
+    cache.call("add", calc.add, 1.0, 1.0)
+    assert cache.stats()["hits"] == 2
+    cache.call("add", calc.add, 2.0, 2.0)
+    assert cache.stats()["misses"] == 4
+
+
+def test_ttl_expiry(calc):
+    clock = FakeClock()
+    cache = ResultCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.call("exp", calc.exp, 0.0)
+    clock.now = 4.9
+    cache.call("exp", calc.exp, 0.0)
+    clock.now = 5.0
+    cache.call("exp", calc.exp, 0.0)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+
+def test_negative_entries(calc):
+    cache = ResultCache(max_size=10)
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Cannot take zeroth root"):
+            cache.call("nth_root", calc.nth_root, 8.0, 0.0)
+    assert cache.stats()["hits"] == 1
+
+
+def test_nan_bypasses_cache(calc):
+    cache = ResultCache(max_size=10)
+    cache.call("add", calc.add, float("nan"), 1.0)
+    assert cache.stats()["bypasses"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_negative_zero_is_distinct(calc):
+    cache = ResultCache(max_size=10)
+    assert make_key("divide", (1.0, 0.0)) != make_key("divide", (1.0, -0.0))
+    assert cache.call("multiply", calc.multiply, 1.0, 0.0) == 0.0
+    result = cache.call("multiply", calc.multiply, 1.0, -0.0)
+    assert str(result) == "-0.0"
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,230 @@
+import asyncio
+import inspect
+import math
+import threading
+
+import httpx
+import pytest
+from calculator_lib import Calculator
+from fastapi.testclient import TestClient
+
+from calculator import api
+from calculator.client import AsyncClient, Client
+from calculator.offload import OffloadPool
+
+
+class RecordingClient(TestClient):
+    """Test client that records the paths it posts to."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.paths = []
+
+    def post(self, url, **kwargs):
+        self.paths.append(url)
+        return super().post(url, **kwargs)
+
+
+@pytest.fixture
+def http():
+    return RecordingClient(api.app)
+
+
+def _async_client(**kwargs):
+    paths = []
+
+    async def record(request):
+        paths.append(request.url.path)
+
+    http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=api.app),
+        base_url="http://testserver",
+        event_hooks={"request": [record]},
+    )
+    return AsyncClient(http=http, **kwargs), paths
+
+
+@pytest.mark.parametrize(
+    "method, args",
+    [
+        ("add", (2, 3)),
+        ("subtract", (2, 3.5)),
+        ("divide", (7, 2)),
+        ("power", (2, 10)),
+        ("sqrt", (16,)),
+        ("nth_root", (-27, 3)),
+        ("modulo", (7, 3)),
+        ("floor_divide", (7, 2)),
+        ("absolute", (-4.5,)),
+        ("round_number", (3.14159, 2)),
+        ("round_number", (2.5,)),
+        ("ln", (1,)),
+        ("exp", (1,)),
+    ],
+)
+def test_matches_local_calculator(http, method, args):
+    calc = Client(http=http)
+    assert getattr(calc, method)(*args) == getattr(Calculator(), method)(*args)
+
+
+def test_keyword_arguments_and_signatures(http):
+    calc = Client(http=http)
+    assert calc.nth_root(a=8, n=3) == 2.0
+    assert calc.round_number(1.23456, decimals=3) == 1.235
+    assert list(inspect.signature(Client.nth_root).parameters) == ["self", "a", "n"]
+    with pytest.raises(TypeError):
+        calc.add(1)
+
+
+def test_call_by_operation_name(http):
+    assert Client(http=http).call("log10", {"a": 100}) == 2.0
+    assert http.paths == ["/log10"]
+
+
+@pytest.mark.parametrize(
+    "method, args, error, message",
+    [
+        ("divide", (1, 0), ValueError, "Cannot divide by zero"),
+        ("sqrt", (-1,), ValueError, "Cannot take square root of a negative number"),
+        ("exp", (1000,), OverflowError, "Numerical result out of range"),
+    ],
+)
+def test_errors_map_to_exceptions(http, method, args, error, message):
+    with pytest.raises(error, match=message):
+        getattr(Client(http=http), method)(*args)
+    with pytest.raises(error, match=message):
+        getattr(Client(http=http, batch_window=0), method)(*args)
+
+
+def test_non_finite_values(http):
+    calc = Client(http=http)
+    assert calc.add(math.inf, 1) == math.inf
+    assert math.isnan(calc.add(math.nan, 1))
+    assert Client(http=http, batch_window=0).multiply(-math.inf, 2) == -math.inf
+
+
+def test_other_errors_raise_http_status_error(http, monkeypatch):
+    pool = OffloadPool("thread", max_workers=1, max_queue=0)
+    monkeypatch.setattr(api.app.state.runtime, "offload_pool", pool)
+    pool.pending = pool.capacity
+    with pytest.raises(httpx.HTTPStatusError) as info:
+        Client(http=http, batch_window=0).add(1, 2)
+    assert info.value.response.status_code == 503
+    pool.shutdown()
+
+
+def test_concurrent_calls_are_batched(http):
+    calc = Client(http=http, batch_window=0.5, max_batch_size=8)
+    results = [None] * 8
+    errors = []
+
+    def call(i):
+        try:
+            results[i] = calc.divide(i, i % 4)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert http.paths == ["/batch"]
+    assert errors == ["Cannot divide by zero"] * 2
+    assert [results[i] for i in (1, 2, 3, 5)] == [1.0, 1.0, 1.0, 5.0]
+
+
+def test_window_sends_partial_batches(http):
+    calc = Client(http=http, batch_window=0.01)
+    assert calc.add(1, 2) == 3.0
+    assert calc.sqrt(4) == 2.0
+    assert http.paths == ["/batch", "/batch"]
+
+
+def test_unbatched_calls_reuse_one_client(http):
+    calc = Client(http=http)
+    calc.add(1, 2)
+    calc.sqrt(4)
+    assert http.paths == ["/add", "/sqrt"]
+    calc.close()
+    assert calc.add(1, 1) == 2.0
+
+
+def test_async_client():
+    async def main():
+        calc, paths = _async_client()
+        async with calc:
+            assert await calc.add(2, 3) == 5.0
+            assert await calc.round_number(2.567, decimals=2) == 2.57
+            with pytest.raises(ValueError, match="Cannot take logarithm"):
+                await calc.ln(0)
+        return paths
+
+    assert asyncio.run(main()) == ["/add", "/round", "/ln"]
+
+
+def test_async_client_batches_concurrent_calls():
+    async def main():
+        calc, paths = _async_client(batch_window=0.05, max_batch_size=10)
+        async with calc:
+            results = await asyncio.gather(
+                *(calc.divide(i, i % 5) for i in range(25)), return_exceptions=True
+            )
+        return results, paths
+
+    results, paths = asyncio.run(main())
+    assert paths == ["/batch"] * 3
+    assert [type(result) for result in results[:5]] == [ValueError] + [float] * 4
+    assert results[24] == 6.0
+
+
+def test_async_cancelled_caller_does_not_cancel_batch():
+    async def main():
+        calc, paths = _async_client(batch_window=0.05)
+        async with calc:
+            cancelled = asyncio.ensure_future(calc.add(1, 2))
+            kept = asyncio.ensure_future(calc.add(3, 4))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            return await kept, paths
+
+    assert asyncio.run(main()) == (7.0, ["/batch"])
+
+
+def test_rejected_call_does_not_fail_its_batch(http):
+    calc = Client(http=http, batch_window=0.5, max_batch_size=3)
+    results = {}
+
+    def call(name, *args):
+        try:
+            results[name] = calc.add(*args)
+        except ValueError as e:
+            results[name] = e
+
+    threads = [
+        threading.Thread(target=call, args=args)
+        for args in (("first", 1, 2), ("invalid", "x", 1), ("last", 3, 4))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert http.paths[0] == "/batch"
+    assert sorted(http.paths[1:]) == ["/add"] * 3
+    assert results["first"] == 3.0 and results["last"] == 7.0
+    assert isinstance(results["invalid"], ValueError)
+
+
+def test_async_rejected_call_does_not_fail_its_batch():
+    async def main():
+        calc, paths = _async_client(batch_window=0.05)
+        async with calc:
+            results = await asyncio.gather(
+                calc.add(1, 2), calc.add("x", 1), calc.add(3, 4), return_exceptions=True
+            )
+        return results, paths
+
+    results, paths = asyncio.run(main())
+    assert paths == ["/batch"] + ["/add"] * 3
+    assert results[0] == 3.0 and results[2] == 7.0
+    assert isinstance(results[1], ValueError)
@@ -0,0 +1,61 @@
+import pytest
+
+from calculator.expression import compile_expression
+
+
+def test_hypotenuse():
+    plan = compile_expression("round(sqrt(a*a + b*b), 2)")
+    assert plan({"a": 3, "b": 4}) == 5.0
+    assert plan({"a": 1, "b": 1}) == 1.41
+
+
+def test_variables_are_collected():
+    plan = compile_expression("x ** 2 - nth_root(y, 3) + abs(-z)")
+    assert plan.variables == frozenset({"x", "y", "z"})
+    assert plan({"x": 2, "y": 27, "z": 1}) == pytest.approx(2.0)
+
+
+def test_operator_precedence():
+    plan = compile_expression("-2 + 3 * 4 % 5 // 1")
+    assert plan({}) == 0.0
+
+
+def test_plan_is_cached():
+    assert compile_expression("a + 1") is compile_expression("a + 1")
+
+
+def test_division_by_zero():
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        compile_expression("a / b")({"a": 1, "b": 0})
+
+
+def test_undefined_variable():
+    with pytest.raises(ValueError, match="Undefined variable: b"):
+        compile_expression("a + b")({"a": 1})
+
+
+def test_complex_power_rejected():
+    with pytest.raises(ValueError, match="Result is not a real number"):
+        compile_expression("(-8) ** 0.5")({})
+
+
+@pytest.mark.parametrize(
+    "expression, message",
+    [
+        ("a +", "Invalid expression"),
+        ("__import__('os')", "Unknown function"),
+        ("a.real", "Unsupported expression element"),
+        ("'text'", "Unsupported literal"),
+        ("sqrt(1, 2)", "takes 1 argument"),
+        ("round(a, 1.5)", None),
+        ("f(x)(y)", "Only calculator operations"),
+        ("a if b else c", "Unsupported expression element"),
+    ],
+)
+def test_rejected_expressions(expression, message):
+    if message is None:
+        with pytest.raises(ValueError):
+            compile_expression(expression)({"a": 1})
+    else:
+        with pytest.raises(ValueError, match=message):
+            compile_expression(expression)
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api, job_routes, jobs
+from calculator.jobs import RECORD, JobStore, run_job
+
+OPERATIONS = (
+    b'{"op": "add", "a": 1, "b": 2}\n'
+    b"\n"
+    b'{"op": "divide", "a": 1, "b": 0}\n'
+    b'{"op": "sqrt", "a": 9}\n'
+    b"not json\n"
+    b'{"op": "divide", "a": 2, "b": 0}\n'
+    b'{"op": "round", "a": 2.567, "decimals": 2}'
+)
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    client = TestClient(api.app)
+    store = JobStore(str(tmp_path / "jobs"), job_routes.job_result, kind="thread")
+    monkeypatch.setattr(api.app.state.runtime, "job_store", store)
+    yield store, client
+    store.shutdown()
+
+
+def _wait(client, job_id):
+    for _ in range(500):
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["state"] in jobs.FINISHED_STATES:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def _spool(path, data):
+    path.mkdir()
+    (path / jobs.INPUT_FILE).write_bytes(data)
+    (path / jobs.STATUS_FILE).write_text(json.dumps({"state": "queued"}))
+
+
+def test_run_job_spools_records(tmp_path):
+    _spool(tmp_path / "job", OPERATIONS)
+    assert (
+        run_job(str(tmp_path / "job"), job_routes.job_result, chunk_size=2)
+        == "completed"
+    )
+    status = json.loads((tmp_path / "job" / jobs.STATUS_FILE).read_text())
+    assert status["operations"] == 6
+    assert status["failed"] == 3
+    assert status["processed_bytes"] == len(OPERATIONS)
+    assert status["errors"][0] == "Cannot divide by zero"
+    assert status["errors"][1].startswith("Invalid JSON")
+    data = (tmp_path / "job" / jobs.RESULTS_FILE).read_bytes()
+    assert len(data) == 6 * RECORD.size
+    records = list(RECORD.iter_unpack(data))
+    assert records[0] == (3.0, 0)
+    assert math.isnan(records[1][0]) and records[1][1] == 1
+    assert records[2] == (3.0, 0)
+    assert records[3][1] == 2
+    assert records[4][1] == 1
+    assert records[5] == (2.57, 0)
+
+
+def test_run_job_stops_when_cancelled(tmp_path):
+    path = tmp_path / "job"
+    _spool(path, b'{"op": "add", "a": 1, "b": 2}\n' * 10)
+
+    def evaluate(line):
+        (path / jobs.CANCEL_FILE).touch()
+        return job_routes.job_result(line)
+
+    assert run_job(str(path), evaluate, chunk_size=3) == "cancelled"
+    status = json.loads((path / jobs.STATUS_FILE).read_text())
+    assert status["operations"] == 3
+    assert status["finished"] is not None
+
+
+def test_submit_and_read_results(store):
+    _, client = store
+    response = client.post("/jobs", content=OPERATIONS, headers=NDJSON)
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.headers["location"] == f"/jobs/{job_id}"
+    assert response.json()["input_bytes"] == len(OPERATIONS)
+
+    status = _wait(client, job_id)
+    assert status["state"] == "completed"
+    assert status["operations"] == 6
+
+    response = client.get(f"/jobs/{job_id}/results")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 6
+    assert lines[0] == {"result": 3.0, "detail": None}
+    assert lines[1] == {"result": None, "detail": "Cannot divide by zero"}
+
+    response = client.get(f"/jobs/{job_id}/results", params={"start": 3, "count": 2})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["detail"] is None for line in lines] == [False, False]
+    assert client.get(f"/jobs/{job_id}/results?start=10").text == ""
+
+    response = client.get(
+        f"/jobs/{job_id}/results",
+        params={"start": 2, "count": 1},
+        headers={"Accept": "application/octet-stream"},
+    )
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert list(RECORD.iter_unpack(response.content)) == [(3.0, 0)]
+
+
+def test_results_are_chunked(store):
+    job_store, client = store
+    body = b"".join(
+        json.dumps({"op": "multiply", "a": i, "b": 2}).encode() + b"\n"
+        for i in range(100)
+    )
+    job_id = client.post("/jobs", content=body).json()["id"]
+    _wait(client, job_id)
+    chunks = list(job_store.results(job_id, start=10, count=25, chunk_size=10))
+    assert [chunk.count(b"\n") for chunk in chunks] == [10, 10, 5]
+    assert json.loads(chunks[0].splitlines()[0]) == {"result": 20.0, "detail": None}
+
+
+def test_cancel_queued_job(store):
+    job_store, client = store
+    release = threading.Event()
+    job_store.evaluate = lambda line: release.wait(5) and job_routes.job_result(line)
+    first = client.post("/jobs", content=OPERATIONS).json()["id"]
+    second = client.post("/jobs", content=OPERATIONS).json()["id"]
+
+    response = client.post(f"/jobs/{second}/cancel")
+    assert response.json()["state"] == "cancelled"
+    assert client.delete(f"/jobs/{first}").status_code == 409
+    release.set()
+    assert _wait(client, first)["state"] == "completed"
+    assert client.post(f"/jobs/{first}/cancel").status_code == 409
+
+    assert client.delete(f"/jobs/{first}").status_code == 204
+    assert client.get(f"/jobs/{first}").status_code == 404
+    assert client.get(f"/jobs/{first}/results").status_code == 404
+
+
+def test_submit_limits(store):
+    job_store, client = store
+    job_store.max_input_bytes = 10
+    response = client.post("/jobs", content=OPERATIONS)
+    assert response.status_code == 413
+    assert list(job_store.directory.iterdir()) == []
+
+    job_store.max_input_bytes = 2**20
+    job_store.max_pending = 0
+    response = client.post("/jobs", content=OPERATIONS)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert job_store.stats()["rejected"] == 1
+
+
+def test_unknown_and_invalid_job_ids(store):
+    _, client = store
+    assert client.get("/jobs/" + "0" * 32).status_code == 404
+    assert client.get("/jobs/../etc").status_code == 404
+    assert client.get("/jobs/not-a-job-id").status_code == 422
+    assert client.post("/jobs/" + "0" * 32 + "/cancel").status_code == 404
+
+
+def test_jobs_disabled(monkeypatch):
+    client = TestClient(api.app)
+    monkeypatch.setattr(api.app.state.runtime, "job_store", None)
+    response = client.post("/jobs", content=OPERATIONS)
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Jobs are disabled"}
+
+
+def test_remove_expired(store):
+    job_store, client = store
+    job_id = client.post("/jobs", content=OPERATIONS).json()["id"]
+    _wait(client, job_id)
+    assert job_store.remove_expired() == 0
+    job_store.retention_seconds = -1
+    assert job_store.remove_expired() == 1
+    assert client.get(f"/jobs/{job_id}").status_code == 404
+
+
+def test_process_pool(tmp_path):
+    job_store = JobStore(str(tmp_path), job_routes.job_result, kind="process")
+
+    async def body():
+        yield OPERATIONS
+
+    try:
+        job_id = asyncio.run(job_store.submit(body()))["id"]
+        for _ in range(3000):
+            if job_store.status(job_id)["state"] in jobs.FINISHED_STATES:
+                break
+            time.sleep(0.01)
+        assert job_store.status(job_id)["state"] == "completed"
+        assert job_store.status(job_id)["operations"] == 6
+    finally:
+        job_store.shutdown()
+
+
+def test_orphaned_jobs_are_failed(store):
+    job_store, client = store
+    dead = subprocess.Popen([sys.executable, "-c", ""])
+    dead.wait()
+    job_store.directory.mkdir()
+    for job_id, owner in (("a" * 32, dead.pid), ("b" * 32, os.getpid())):
+        path = job_store.directory / job_id
+        _spool(path, OPERATIONS)
+        (path / jobs.OWNER_FILE).write_text(str(owner))
+    job_store.retention_seconds = None
+    assert job_store.remove_expired() == 0
+    status = job_store.status("a" * 32)
+    assert status["state"] == "failed"
+    assert status["detail"] == "Interrupted by a server restart"
+    assert client.delete("/jobs/" + "a" * 32).status_code == 204
+    assert job_store.status("b" * 32)["state"] == "queued"
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from calculator import __main__ as launcher
+from calculator import config
+
+
+@pytest.fixture
+def server_config(monkeypatch):
+    def configure(**section):
+        monkeypatch.setitem(config._config, "server", section)
+
+    yield configure
+
+
+def test_server_config_defaults(server_config):
+    server_config(port=9000)
+    server = config.get_server_config()
+    assert server["host"] == "0.0.0.0"
+    assert server["port"] == 9000
+    assert server["workers"] is None
+    assert server["backlog"] == 2048
+
+
+def test_workers_default_to_cpu_count(server_config):
+    server_config()
+    options = launcher.uvicorn_options(config.get_server_config())
+    assert options["workers"] == (os.cpu_count() or 1)
+    assert options["timeout_graceful_shutdown"] == 30
+    assert options["loop"] == "auto"
+
+
+def test_main_runs_uvicorn_with_config(monkeypatch, server_config):
+    calls = []
+    monkeypatch.setattr(launcher, "load_config", lambda: config._config)
+    monkeypatch.setattr(
+        launcher.uvicorn, "run", lambda app, **options: calls.append((app, options))
+    )
+    server_config(workers=4, http="h11", limit_concurrency=500, preload=False)
+    launcher.main(["--port", "9001"])
+    [(app, options)] = calls
+    assert app == "calculator.api:app"
+    assert options["workers"] == 4
+    assert options["port"] == 9001
+    assert options["http"] == "h11"
+    assert options["limit_concurrency"] == 500
+
+
+def test_main_preforks_preloaded_app(monkeypatch, server_config):
+    from calculator import prefork
+
+    calls = []
+    monkeypatch.setattr(launcher, "load_config", lambda: config._config)
+    monkeypatch.setattr(prefork, "preload", lambda **options: options)
+    monkeypatch.setattr(
+        prefork, "serve", lambda options, workers: calls.append((options, workers))
+    )
+    monkeypatch.setattr(
+        launcher.uvicorn, "run", lambda app, **options: calls.append((app, options))
+    )
+    server_config(workers=3)
+    launcher.main(["--port", "9002"])
+    [(options, workers)] = calls
+    assert workers == 3
+    assert options["port"] == 9002
+    assert "workers" not in options
+
+    calls.clear()
+    launcher.main(["--no-preload"])
+    [(app, options)] = calls
+    assert app == "calculator.api:app"
+    assert options["workers"] == 3
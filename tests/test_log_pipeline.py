@@ -0,0 +1,82 @@
+import json
+import logging
+import queue
+
+import pytest
+
+from calculator import config
+from calculator.log_pipeline import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+)
+
+
+def make_record(level=logging.INFO, op=None, msg="add(%s, %s) = %s"):
+    record = logging.LogRecord(
+        "calculator.api", level, __file__, 1, msg, (1.0, 2.0, 3.0), None
+    )
+    if op is not None:
+        record.op = op
+    return record
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    config.load_config()
+    config.setup_logging()
+
+
+class TestSamplingFilter:
+    def test_samples_per_operation(self):
+        sampler = SamplingFilter(default=1, operations={"add": 3})
+        kept = [sampler.filter(make_record(op="add")) for _ in range(9)]
+        assert kept.count(True) == 3
+        assert all(sampler.filter(make_record(op="divide")) for _ in range(5))
+
+    def test_warnings_always_pass(self):
+        sampler = SamplingFilter(default=1000)
+        assert all(
+            sampler.filter(make_record(level=logging.WARNING, op="add"))
+            for _ in range(10)
+        )
+
+    def test_records_without_op_pass(self):
+        sampler = SamplingFilter(default=1000)
+        assert all(sampler.filter(make_record()) for _ in range(10))
+
+
+def test_json_formatter():
+    line = JsonFormatter().format(make_record(op="add"))
+    entry = json.loads(line)
+    assert entry["msg"] == "add(1.0, 2.0) = 3.0"
+    assert entry["op"] == "add"
+    assert entry["level"] == "INFO"
+    assert "\n" not in line
+
+
+def test_queue_handler_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1
+
+
+def test_setup_logging_with_queue(restore_logging):
+    config._config["log_pipeline"] = {
+        "queue": True,
+        "sampling": {"operations": {"add": 1000}},
+    }
+    config.setup_logging()
+    root = logging.getLogger()
+    assert [type(h) for h in root.handlers] == [NonBlockingQueueHandler]
+    api_logger = logging.getLogger("calculator.api")
+    assert any(isinstance(f, SamplingFilter) for f in api_logger.filters)
+
+
+def test_setup_logging_is_idempotent(restore_logging):
+    config._config["log_pipeline"] = {"queue": True}
+    config.setup_logging()
+    config.setup_logging()
+    assert len(logging.getLogger().handlers) == 1
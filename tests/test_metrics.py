@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api
+from calculator.metrics import Histogram, MetricsMiddleware, MetricsRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(api.app.state.runtime, "metrics_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def client(registry):
+    return TestClient(MetricsMiddleware(api.app, registry))
+
+
+def test_histogram_buckets():
+    histogram = Histogram(bounds=(1.0, 2.0))
+    for value in (0.5, 1.0, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    lines = histogram.render("h", 'route="/x"')
+    assert 'h_bucket{route="/x",le="2.0"} 3' in lines
+    assert 'h_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'h_sum{route="/x"} 6.0' in lines
+
+
+def test_requests_counted_by_route_and_status(client, registry):
+    client.post("/add", json={"a": 1, "b": 2})
+    client.post("/add", json={"a": 1})
+    client.post("/divide", json={"a": 1, "b": 0})
+    client.post("/vector/sqrt", json={"a": [4]})
+    client.get("/no-such-route")
+    assert registry.routes["/add"].statuses == {200: 1, 422: 1}
+    assert registry.routes["/divide"].statuses == {400: 1}
+    assert registry.routes["/vector/{op}"].statuses == {200: 1}
+    assert registry.routes["other"].statuses == {404: 1}
+    assert registry.routes["/add"].in_flight == 0
+
+
+def test_validation_and_compute_split(client, registry):
+    client.post("/power", json={"a": 2, "b": 10})
+    metrics = registry.routes["/power"]
+    assert metrics.latency.count == 1
+    assert metrics.validation.count == 1
+    assert metrics.compute.count == 1
+    assert metrics.validation.total + metrics.compute.total <= metrics.latency.total
+
+
+def test_metrics_endpoint(client):
+    client.post("/add", json={"a": 1, "b": 2})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'calculator_requests_total{route="/add",status="200"} 1' in response.text
+    assert 'calculator_requests_in_flight{route="/metrics"} 1' in response.text
+    assert "calculator_request_compute_seconds_count" in response.text
+
+
+def test_metrics_disabled():
+    response = TestClient(api.app).get("/metrics")
+    assert response.status_code == 404
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api
+from calculator.api import app
+from calculator.offload import OffloadPool, PoolSaturated
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = OffloadPool("thread", max_workers=2, max_queue=1)
+    monkeypatch.setattr(api.app.state.runtime, "offload_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError, match="Unknown pool kind"):
+        OffloadPool("fiber")
+
+
+@pytest.mark.anyio
+async def test_run_returns_result_and_counts():
+    pool = OffloadPool("thread", max_workers=1)
+    assert await pool.run(pow, 2, 10) == 1024
+    assert pool.stats()["completed"] == 1
+    assert pool.stats()["pending"] == 0
+    pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_saturated_pool_rejects_immediately():
+    pool = OffloadPool("thread", max_workers=1, max_queue=1)
+    release = threading.Event()
+    running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(PoolSaturated):
+        await pool.run(pow, 2, 2)
+    release.set()
+    assert await asyncio.gather(*running) == [True, True]
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_cancelled_caller_keeps_task_pending():
+    pool = OffloadPool("thread", max_workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        return release.wait()
+
+    task = asyncio.create_task(pool.run(work))
+    await asyncio.to_thread(started.wait)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # The task still occupies the only worker.
+    assert pool.stats()["pending"] == 1
+    with pytest.raises(PoolSaturated):
+        await pool.run(pow, 2, 2)
+    release.set()
+    while pool.stats()["pending"]:
+        await asyncio.sleep(0.01)
+    assert await pool.run(pow, 2, 2) == 4
+    pool.shutdown()
+
+
+def test_batch_returns_503_when_saturated(pool):
+    pool.pending = pool.capacity
+    response = client.post("/batch", json={"operations": [{"op": "sqrt", "a": 4}]})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json() == {"detail": "Server is busy, retry later"}
+
+
+def test_configured_operations_are_offloaded(pool, monkeypatch):
+    monkeypatch.setattr(
+        api.app.state.runtime, "offloaded_operations", frozenset({"power"})
+    )
+    assert client.post("/power", json={"a": 2, "b": 10}).json() == {"result": 1024.0}
+    assert client.post("/add", json={"a": 2, "b": 10}).json() == {"result": 12.0}
+    assert pool.completed == 1
+
+
+def test_checked_operation_on_process_pool(monkeypatch):
+    pool = OffloadPool("process", max_workers=1)
+    monkeypatch.setattr(api.app.state.runtime, "offload_pool", pool)
+    monkeypatch.setattr(
+        api.app.state.runtime, "offloaded_operations", frozenset({"power"})
+    )
+    try:
+        assert client.post("/power", json={"a": 2, "b": 10}).json() == {
+            "result": 1024.0
+        }
+        response = client.post("/power", json={"a": 0, "b": -1})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "0.0 cannot be raised to a negative power"}
+        assert pool.completed == 2
+    finally:
+        pool.shutdown()
+
+
+def test_saturation_is_reported_per_stream_line(pool, monkeypatch):
+    monkeypatch.setattr(
+        api.app.state.runtime, "offloaded_operations", frozenset({"exp"})
+    )
+    pool.pending = pool.capacity
+    response = client.post(
+        "/stream",
+        content=b'{"op": "exp", "a": 0}\n{"op": "add", "a": 1, "b": 1}\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    lines = response.text.splitlines()
+    assert '"detail":"Server is busy, retry later"' in lines[0]
+    assert '"result":2.0' in lines[1]
+
+
+def test_app_state_owns_the_pool():
+    first = api.create_app(configure_logging=False)
+    pool = first.state.runtime.offload_pool
+    with TestClient(first) as client:
+        client.post("/batch", json={"operations": [{"op": "add", "a": 1, "b": 2}]})
+        assert pool._executor is not None
+    # The lifespan stops the pool of its app.
+    assert pool._executor is None
+    TestClient(first).post("/batch", json={"operations": [{"op": "sqrt", "a": 4}]})
+    assert pool._executor is not None
+    # Apps are independent: a new one neither uses nor stops this pool.
+    second = api.create_app(configure_logging=False)
+    assert second.state.runtime.offload_pool is not pool
+    with TestClient(second) as client:
+        client.post("/batch", json={"operations": [{"op": "add", "a": 1, "b": 2}]})
+    assert pool._executor is not None
+    assert pool.completed == 2
+    pool.shutdown()
+
+
+def test_cache_with_process_pool_is_rejected(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("cache: {enabled: true}\noffload: {kind: process}\n")
+    with pytest.raises(ValueError, match="process pool"):
+        api.create_app(str(config_file), configure_logging=False)
@@ -0,0 +1,73 @@
+import pytest
+from calculator_lib import Calculator
+from fastapi.testclient import TestClient
+
+from calculator.api import app
+from calculator.operations import (
+    BINARY,
+    OPERATIONS,
+    OPERATIONS_BY_NAME,
+    ROUNDING,
+    UNARY,
+    Dispatcher,
+)
+
+client = TestClient(app)
+
+
+def test_registry_describes_calculator_methods():
+    calc = Calculator()
+    assert len(OPERATIONS_BY_NAME) == len(OPERATIONS) == 16
+    for op in OPERATIONS:
+        assert callable(getattr(calc, op.method))
+        assert op.operands in (BINARY, UNARY, ROUNDING)
+        assert op.summary.endswith(".")
+
+
+def test_routes_are_generated_from_registry():
+    schema = app.openapi()
+    for op in OPERATIONS:
+        post = schema["paths"][f"/{op.name}"]["post"]
+        endpoint = op.endpoint or op.name
+        assert post["operationId"] == f"{endpoint}_{op.name}_post"
+        assert post["description"] == op.description
+        assert post["summary"] == endpoint.replace("_", " ").title()
+
+
+def test_description_lists_rejected_inputs():
+    assert OPERATIONS_BY_NAME["add"].description == "Return the sum of two numbers."
+    assert OPERATIONS_BY_NAME["divide"].description == (
+        "Return the quotient of two numbers. "
+        "Returns an HTTP 400 Bad Request error on division by zero."
+    )
+
+
+@pytest.mark.parametrize(
+    "body, detail",
+    [
+        ({"a": 0, "b": -1}, "0.0 cannot be raised to a negative power"),
+        ({"a": -8, "b": 0.5}, "Result is not a real number"),
+    ],
+)
+def test_power_domain_checks(body, detail):
+    response = client.post("/power", json=body)
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
+    response = client.post("/batch", json={"operations": [{"op": "power", **body}]})
+    assert response.json()["results"] == [{"result": None, "detail": detail}]
+
+
+def test_power_negative_base_integer_exponent():
+    response = client.post("/power", json={"a": -2, "b": 3})
+    assert response.json() == {"result": -8.0}
+
+
+def test_dispatcher():
+    dispatch = Dispatcher(Calculator())
+    assert dispatch("add", 1, 2) == 3
+    assert dispatch("sqrt", 9) == 3
+    assert dispatch("round", 2.567, decimals=2) == 2.57
+    with pytest.raises(ValueError, match="requires operand 'b'"):
+        dispatch("divide", 1)
+    with pytest.raises(ValueError, match="Unknown operation"):
+        dispatch("sin", 1)
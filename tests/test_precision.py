@@ -0,0 +1,209 @@
+import pickle
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api, precision
+from calculator.operations import BINARY_OPERATIONS, UNARY_OPERATIONS
+from calculator.precision import PreciseCalculator
+
+client = TestClient(api.app)
+
+
+@pytest.fixture
+def calc():
+    return PreciseCalculator()
+
+
+@pytest.mark.parametrize(
+    "op, a, b, expected",
+    [
+        ("add", "0.1", "0.2", "0.3"),
+        ("add", 0.1, 0.2, "0.3"),
+        ("subtract", "0.3", "0.1", "0.2"),
+        ("multiply", "1.10", "3", "3.30"),
+        ("divide", 1, 3, "0.3333333333333333333333333333"),
+        ("power", "1.1", 2, "1.21"),
+        ("power", 0, 0, "1"),
+        ("nth_root", "0.001", 3, "0.1"),
+        ("nth_root", -8, 3, "-2"),
+        ("modulo", "7.5", "-2", "-0.5"),
+        ("floor_divide", "-7.5", "2", "-4"),
+    ],
+)
+def test_decimal_binary_operations(calc, op, a, b, expected):
+    assert calc.evaluate(op, a, b) == expected
+
+
+@pytest.mark.parametrize(
+    "op, a, expected",
+    [
+        ("sqrt", "0.01", "0.1"),
+        ("absolute", "-0.10", "0.10"),
+        ("floor", "-2.5", "-3"),
+        ("ceil", "-2.5", "-2"),
+        ("log10", "1000", "3"),
+        ("ln", 1, "0"),
+        ("exp", 1, "2.718281828459045235360287471"),
+    ],
+)
+def test_decimal_unary_operations(calc, op, a, expected):
+    assert calc.evaluate(op, a) == expected
+
+
+def test_round_uses_configured_rounding():
+    assert PreciseCalculator().evaluate("round", "2.675", decimals=2) == "2.68"
+    assert PreciseCalculator().evaluate("round", "2.665", decimals=2) == "2.66"
+    half_up = PreciseCalculator(rounding="ROUND_HALF_UP")
+    assert half_up.evaluate("round", "2.665", decimals=2) == "2.67"
+    assert half_up.evaluate("round", "2.5") == "3"
+
+
+def test_digits_sets_decimal_precision(calc):
+    assert calc.evaluate("divide", 2, 3, digits=5) == "0.66667"
+    assert calc.evaluate("sqrt", 2, digits=50) == (
+        "1.4142135623730950488016887242096980785696718753769"
+    )
+
+
+@pytest.mark.parametrize(
+    "op, a, b, expected",
+    [
+        ("add", "1/3", "1/6", "1/2"),
+        ("add", 0.1, "0.2", "3/10"),
+        ("divide", 1, 3, "1/3"),
+        ("power", "2/3", -2, "9/4"),
+        ("sqrt", "9/4", None, "3/2"),
+        ("nth_root", "-27/8", 3, "-3/2"),
+        ("modulo", "7/2", -2, "-1/2"),
+        ("round", "2.675", None, "67/25"),
+    ],
+)
+def test_fraction_operations(calc, op, a, b, expected):
+    decimals = 2 if op == "round" else 0
+    assert calc.evaluate(op, a, b, decimals, mode="fraction") == expected
+
+
+@pytest.mark.parametrize(
+    "op, a, b",
+    [("sqrt", 2, None), ("power", 2, "1/2"), ("ln", 1, None), ("nth_root", 2, 3)],
+)
+def test_fraction_rejects_irrational_results(calc, op, a, b):
+    with pytest.raises(ValueError, match="no exact rational result"):
+        calc.evaluate(op, a, b, mode="fraction")
+
+
+@pytest.mark.parametrize("mode", ["decimal", "fraction"])
+@pytest.mark.parametrize(
+    "op, a, b, message",
+    [
+        ("divide", 1, 0, "Cannot divide by zero"),
+        ("modulo", 1, "0.0", "Cannot modulo by zero"),
+        ("floor_divide", 1, 0, "Cannot floor divide by zero"),
+        ("sqrt", -1, None, "Cannot take square root of a negative number"),
+        ("nth_root", 4, 0, "Cannot take zeroth root"),
+        ("nth_root", -4, 2, "Cannot take even root of a negative number"),
+        ("power", 0, -1, "Cannot raise zero to a negative power"),
+        ("add", 1, None, "requires operand 'b'"),
+        ("add", "NaN", 1, "finite"),
+        ("add", "abc", 1, "Invalid number"),
+    ],
+)
+def test_invalid_input(calc, mode, op, a, b, message):
+    with pytest.raises(ValueError, match=message):
+        calc.evaluate(op, a, b, mode=mode)
+
+
+def test_overflow(calc):
+    with pytest.raises(OverflowError):
+        calc.evaluate("exp", "1e10")
+    with pytest.raises(OverflowError):
+        calc.evaluate("power", 10, 10**9, mode="fraction")
+
+
+def test_exact_results_are_bounded(calc):
+    with pytest.raises(OverflowError, match="too large for exact evaluation"):
+        calc.evaluate("power", 3, 8000, mode="fraction")
+    with pytest.raises(OverflowError, match="too large for exact evaluation"):
+        calc.evaluate("add", "1e5000", 0, mode="fraction")
+    with pytest.raises(ValueError, match="decimals must be between"):
+        calc.evaluate("round", "1/3", decimals=10**7, mode="fraction")
+    with pytest.raises(ValueError, match="limited to 1000 digits"):
+        calc.evaluate("add", 10**1000, 1)
+    assert len(calc.evaluate("round", "1/3", decimals=1000, mode="fraction")) > 1000
+
+
+def test_calculator_pickles():
+    calc = pickle.loads(pickle.dumps(PreciseCalculator(5, "ROUND_DOWN")))
+    assert calc.evaluate("divide", 2, 3) == "0.66666"
+
+
+@pytest.mark.parametrize("mode", ["decimal", "fraction"])
+def test_fast_path_matches_slow_path(monkeypatch, mode):
+    rng = random.Random(0)
+    calc = PreciseCalculator(digits=12)
+    cases = []
+    for _ in range(300):
+        op = rng.choice(BINARY_OPERATIONS + UNARY_OPERATIONS + ("round",))
+        a = rng.choice([rng.randint(-1000, 1000), str(rng.randint(-(10**15), 10**15))])
+        b = rng.randint(-12, 12)
+        cases.append((op, a, b))
+
+    def run():
+        results = []
+        for op, a, b in cases:
+            try:
+                results.append(calc.evaluate(op, a, b, mode=mode))
+            except (ValueError, OverflowError) as e:
+                results.append(type(e))
+        return results
+
+    fast = run()
+    monkeypatch.setattr(precision, "_fast_path", lambda *args: None)
+    assert run() == fast
+
+
+def test_endpoint_avoids_float_artifacts():
+    response = client.post("/precise/add", json={"a": "0.1", "b": "0.2"})
+    assert response.status_code == 200
+    assert response.json() == {"result": "0.3", "mode": "decimal"}
+    response = client.post("/precise/add", json={"a": 0.1, "b": 0.2})
+    assert response.json()["result"] == "0.3"
+
+
+def test_endpoint_mode_and_digits_per_request():
+    response = client.post("/precise/divide", json={"a": 1, "b": 3, "mode": "fraction"})
+    assert response.json() == {"result": "1/3", "mode": "fraction"}
+    response = client.post("/precise/divide", json={"a": 1, "b": 3, "digits": 3})
+    assert response.json()["result"] == "0.333"
+
+
+def test_endpoint_default_mode_from_config(monkeypatch):
+    monkeypatch.setattr(api.app.state.runtime, "precision_mode", "fraction")
+    response = client.post("/precise/multiply", json={"a": "0.5", "b": "0.5"})
+    assert response.json() == {"result": "1/4", "mode": "fraction"}
+
+
+def test_endpoint_errors():
+    response = client.post("/precise/divide", json={"a": "1", "b": "0"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Cannot divide by zero"}
+    response = client.post("/precise/add", json={"a": 1})
+    assert response.status_code == 400
+    response = client.post("/precise/unknown", json={"a": 1, "b": 2})
+    assert response.status_code == 422
+    response = client.post("/precise/add", json={"a": "1" * 1001, "b": 1})
+    assert response.status_code == 422
+    response = client.post("/precise/add", json={"a": True, "b": 1})
+    assert response.status_code == 422
+    response = client.post(
+        "/precise/round",
+        json={"a": "1/3", "decimals": 10**7, "mode": "fraction"},
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/precise/power", json={"a": 3, "b": 8000, "mode": "fraction"}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Numerical result out of range"}
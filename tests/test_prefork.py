@@ -0,0 +1,151 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api, memory, prefork
+
+# Memory added by each pre-forked worker beyond the first, as total PSS.
+WORKER_BUDGET_BYTES = 16 * 2**20
+
+SMAPS_ROLLUP = """\
+55d0c0a00000-7ffd1e3ff000 ---p 00000000 00:00 0                  [rollup]
+Rss:                1436 kB
+Pss:                 413 kB
+Shared_Clean:       1292 kB
+Shared_Dirty:          0 kB
+Private_Clean:        40 kB
+Private_Dirty:       104 kB
+Swap:                  8 kB
+"""
+
+needs_proc = pytest.mark.skipif(
+    not (memory.available() and prefork.supported()),
+    reason="needs fork and /proc/<pid>/smaps_rollup",
+)
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "_PROC", tmp_path)
+    (tmp_path / "self").mkdir()
+    (tmp_path / "self" / "smaps_rollup").write_text(SMAPS_ROLLUP)
+    return tmp_path
+
+
+def test_process_memory_sums_smaps_rollup(proc):
+    assert memory.process_memory() == {
+        "rss": 1436 * 1024,
+        "pss": 413 * 1024,
+        "uss": 144 * 1024,
+        "shared": 1292 * 1024,
+        "swap": 8 * 1024,
+    }
+
+
+def test_worker_pids_reads_supervisor_children(proc, monkeypatch):
+    assert memory.worker_pids() == [os.getpid()]
+    monkeypatch.setattr(memory, "supervisor_pid", 10)
+    (proc / "10" / "task" / "10").mkdir(parents=True)
+    (proc / "10" / "task" / "10" / "children").write_text("12 11 ")
+    assert memory.worker_pids() == [11, 12]
+
+
+def test_memory_endpoint(proc, monkeypatch):
+    client = TestClient(api.app)
+    response = client.get("/memory")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Memory statistics are disabled"}
+    monkeypatch.setattr(api.app.state.runtime, "memory_enabled", True)
+    report = client.get("/memory").json()
+    assert report["pid"] == os.getpid()
+    assert report["preloaded"] is False
+    assert report["supervisor"] is None
+    # The test process has no smaps_rollup under the fake /proc.
+    assert report["workers"] == []
+    (proc / "self" / "smaps_rollup").unlink()
+    response = client.get("/memory")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Memory statistics are unavailable"}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _report(port, workers, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/memory") as response:
+                report = json.load(response)
+            if len(report["workers"]) == workers:
+                return report
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise AssertionError(f"{workers} workers did not start")
+
+
+def _serve(tmp_path, workers):
+    port = _free_port()
+    (tmp_path / "config.yaml").write_text("memory:\n  enabled: true\n")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "calculator", "--host", "127.0.0.1"]
+        + ["--port", str(port), "--workers", str(workers)],
+        cwd=tmp_path,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return server, port
+
+
+def _total_pss(report):
+    processes = [report["supervisor"]] + report["workers"]
+    return sum(process["pss"] for process in processes)
+
+
+@needs_proc
+def test_memory_budget_per_additional_worker(tmp_path):
+    totals = {}
+    for workers in (2, 4):
+        server, port = _serve(tmp_path, workers)
+        try:
+            _report(port, workers)
+            # Let the workers finish starting before measuring.
+            time.sleep(0.5)
+            report = _report(port, workers)
+        finally:
+            server.terminate()
+            assert server.wait(30) == 0
+        assert report["preloaded"] is True
+        assert report["gc_frozen"] > 0
+        assert report["supervisor"]["pid"] == server.pid
+        totals[workers] = _total_pss(report)
+    assert (totals[4] - totals[2]) / 2 < WORKER_BUDGET_BYTES
+
+
+@needs_proc
+def test_supervisor_replaces_workers(tmp_path):
+    server, port = _serve(tmp_path, 2)
+    try:
+        before = {worker["pid"] for worker in _report(port, 2)["workers"]}
+        os.kill(min(before), signal.SIGKILL)
+        for _ in range(300):
+            after = {worker["pid"] for worker in _report(port, 2)["workers"]}
+            if min(before) not in after:
+                break
+            time.sleep(0.1)
+        assert len(after) == 2 and min(before) not in after
+    finally:
+        server.send_signal(signal.SIGINT)
+        assert server.wait(30) == 0
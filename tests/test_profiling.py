@@ -0,0 +1,198 @@
+import asyncio
+import cProfile
+import marshal
+import pstats
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api, runtime
+from calculator.profiling import (
+    PHASES,
+    Profiler,
+    ProfilingMiddleware,
+    collapsed_stacks,
+    phase_breakdown,
+)
+from calculator.transport import encode_result
+
+TOKEN = "secret"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    profiler = Profiler(sample_rate=1.0)
+    monkeypatch.setattr(api.app.state.runtime, "profiler", profiler)
+    monkeypatch.setattr(api.app.state.runtime, "admin_token", TOKEN)
+    client = TestClient(
+        ProfilingMiddleware(api.app, profiler, exempt_prefixes=("/admin/",))
+    )
+    return profiler, client
+
+
+def _work(n):
+    return sum(range(n))
+
+
+def _outer():
+    return _work(10_000) + _work(20_000)
+
+
+def test_phase_breakdown_counts_nested_calls_once():
+    profile = cProfile.Profile()
+    profile.enable()
+    for _ in range(100):
+        runtime.calc.power(2, 10)
+    profile.disable()
+    stats = pstats.Stats(profile)
+    phases = phase_breakdown(stats)
+    assert set(phases) == set(PHASES)
+    compute = sum(
+        entry[3] for func, entry in stats.stats.items() if PHASES["compute"](func)
+    )
+    assert 0 < phases["compute"] <= compute
+
+
+def test_pre_encoded_results_count_as_serialization():
+    profile = cProfile.Profile()
+    profile.enable()
+    for _ in range(100):
+        encode_result(1.5)
+    profile.disable()
+    assert phase_breakdown(pstats.Stats(profile))["serialization"] > 0
+
+
+def test_collapsed_stacks_format():
+    profile = cProfile.Profile()
+    profile.enable()
+    for _ in range(20):
+        _outer()
+    profile.disable()
+    text = collapsed_stacks(pstats.Stats(profile))
+    lines = text.splitlines()
+    assert lines
+    for line in lines:
+        stack, _, micros = line.rpartition(" ")
+        assert int(micros) > 0
+        assert stack
+    assert any("_outer" in line and "_work" in line for line in lines)
+
+
+def test_disabled_profiler_passes_requests_through():
+    profiler = Profiler(sample_rate=1.0, enabled=False)
+    client = TestClient(ProfilingMiddleware(api.app, profiler))
+    assert client.post("/add", json={"a": 1, "b": 2}).json() == {"result": 3}
+    assert profiler.stats is None
+    assert profiler.summary()["routes"] == {}
+
+
+def _unrelated():
+    return _work(1000)
+
+
+def test_concurrent_tasks_are_not_charged_to_sampled_request():
+    profiler = Profiler(sample_rate=1.0, enabled=True)
+
+    async def app(scope, receive, send):
+        _outer()
+        await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app.routes = []
+
+    async def main():
+        async def send(message):
+            pass
+
+        middleware = ProfilingMiddleware(app, profiler)
+        scope = {"type": "http", "path": "/", "app": app}
+        request = asyncio.create_task(middleware(scope, None, send))
+        await asyncio.sleep(0)
+        while not request.done():
+            _unrelated()
+            await asyncio.sleep(0)
+
+    asyncio.run(main())
+    names = {func[2] for func in profiler.stats.stats}
+    assert "_outer" in names
+    assert "_unrelated" not in names
+
+
+def test_sampled_request_records_phase_breakdown(admin):
+    profiler, client = admin
+    profiler.enabled = True
+    for _ in range(3):
+        assert client.post("/add", json={"a": 1, "b": 2}).status_code == 200
+    route = profiler.summary()["routes"]["/add"]
+    assert route["samples"] == 3
+    mean = route["mean_ms"]
+    assert set(mean) == {"total", "other", *PHASES}
+    assert mean["total"] > 0
+    assert mean["validation"] > 0
+    assert mean["serialization"] > 0
+
+
+def test_admin_endpoints_require_token(admin):
+    _, client = admin
+    response = client.get("/admin/profiling")
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+    headers = {"Authorization": "Bearer wrong"}
+    assert client.get("/admin/profiling", headers=headers).status_code == 401
+    assert client.get("/admin/profiling", headers=AUTH).status_code == 200
+
+
+def test_admin_endpoints_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(api.app.state.runtime, "profiler", Profiler())
+    monkeypatch.setattr(api.app.state.runtime, "admin_token", None)
+    client = TestClient(api.app)
+    assert client.get("/admin/profiling", headers=AUTH).status_code == 404
+
+
+def test_toggle_download_and_reset(admin):
+    profiler, client = admin
+    response = client.put(
+        "/admin/profiling", json={"enabled": True, "sample_rate": 1}, headers=AUTH
+    )
+    assert response.json()["enabled"] is True
+    client.post("/multiply", json={"a": 3, "b": 4})
+    client.get("/admin/profiling", headers=AUTH)
+
+    summary = client.get("/admin/profiling", headers=AUTH).json()
+    assert list(summary["routes"]) == ["/multiply"]
+
+    response = client.get("/admin/profiling/pstats", headers=AUTH)
+    assert response.headers["content-type"] == "application/octet-stream"
+    stats = marshal.loads(response.content)
+    assert any(func[2] == "multiply" for func in stats)
+
+    response = client.get("/admin/profiling/collapsed", headers=AUTH)
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text
+
+    client.delete("/admin/profiling", headers=AUTH)
+    assert profiler.stats is None
+    client.put("/admin/profiling", json={"enabled": False}, headers=AUTH)
+    client.post("/multiply", json={"a": 3, "b": 4})
+    assert profiler.summary()["routes"] == {}
+
+
+def test_toggle_with_msgpack_body(admin):
+    profiler, client = admin
+    response = client.put(
+        "/admin/profiling",
+        content=msgpack.packb({"enabled": True, "sample_rate": 0.5}),
+        headers={**AUTH, "Content-Type": "application/msgpack"},
+    )
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content)["sample_rate"] == 0.5
+    assert profiler.enabled is True
+
+
+def test_sample_rate_is_validated(admin):
+    _, client = admin
+    response = client.put("/admin/profiling", json={"sample_rate": 2}, headers=AUTH)
+    assert response.status_code == 422
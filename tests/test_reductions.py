@@ -0,0 +1,176 @@
+import math
+import random
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api, reductions
+from calculator.transport import decode_frame, encode_frame
+
+client = TestClient(api.app)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(reductions, "CHUNK_SIZE", 7)
+
+
+def _exact_sum(values):
+    return float(sum(Fraction(value) for value in values))
+
+
+def _random_values(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.uniform(-1, 1) * 10 ** rng.randint(-12, 12) for _ in range(count)]
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_sum_is_compensated(request, chunked):
+    if chunked:
+        request.getfixturevalue("small_chunks")
+    values = _random_values(2000)
+    assert reductions.fsum(values) == pytest.approx(_exact_sum(values), rel=1e-15)
+    assert reductions.fsum([0.1] * 100_000) == 10_000.0
+    assert reductions.fsum([1e16, 1.0, -1e16]) == 1.0
+    assert reductions.fsum([]) == 0.0
+
+
+def test_sum_of_non_finite_values():
+    assert reductions.fsum([1.0, math.inf]) == math.inf
+    assert math.isnan(reductions.fsum([math.inf, -math.inf]))
+    assert math.isnan(reductions.fsum([1.0, math.nan]))
+
+
+def test_dot_is_compensated(small_chunks):
+    a = _random_values(500, seed=1)
+    b = _random_values(500, seed=2)
+    exact = float(sum(Fraction(x) * Fraction(y) for x, y in zip(a, b)))
+    assert reductions.dot(a, b) == pytest.approx(exact, rel=1e-15)
+    assert reductions.dot([1e300, 1.0], [1e10, 1.0]) == math.inf
+    with pytest.raises(ValueError, match="same length"):
+        reductions.dot([1.0], [1.0, 2.0])
+
+
+def test_cumsum_is_compensated(small_chunks):
+    values = _random_values(100, seed=3)
+    expected = [_exact_sum(values[: i + 1]) for i in range(len(values))]
+    result = reductions.cumsum(values)
+    assert result.tolist() == pytest.approx(expected, rel=1e-15, abs=1e-30)
+    assert reductions.cumsum([0.1] * 10)[-1] == 1.0
+    assert reductions.cumsum([1.0, math.inf, 1.0]).tolist() == [1.0, math.inf, math.inf]
+    assert reductions.cumsum([]).tolist() == []
+
+
+def test_product_avoids_intermediate_overflow(small_chunks):
+    assert reductions.product([2.0, 3.0, 4.0]) == 24.0
+    assert reductions.product([1e200, 1e200, 1e-300]) == pytest.approx(1e100)
+    assert reductions.product([0.5] * 2000 + [2.0] * 2000) == 1.0
+    assert reductions.product([-2.0, 0.5, 3.0]) == -3.0
+    assert reductions.product([]) == 1.0
+    assert math.copysign(1.0, reductions.product([-0.0, 1.0])) == -1.0
+    assert reductions.product([-math.inf, 2.0]) == -math.inf
+    assert math.isnan(reductions.product([0.0, math.inf]))
+    with pytest.raises(OverflowError):
+        reductions.product([1e200, 1e200])
+
+
+def test_mean_min_max(small_chunks):
+    values = [float(i) for i in range(100)]
+    assert reductions.mean(values) == 49.5
+    assert reductions.minimum(values[::-1]) == 0.0
+    assert reductions.maximum(values) == 99.0
+    assert math.isnan(reductions.maximum([1.0, math.nan, 3.0]))
+    for reduction in (reductions.mean, reductions.minimum, reductions.maximum):
+        with pytest.raises(ValueError, match="empty array"):
+            reduction([])
+
+
+def test_mean_of_large_values_does_not_overflow(small_chunks):
+    values = [1e308] * 20
+    assert reductions.mean([1e308, 1e308]) == 1e308
+    assert reductions.mean(values) == pytest.approx(1e308)
+    assert reductions.mean(values + [-math.inf]) == -math.inf
+
+
+def test_reduce_dispatch():
+    assert reductions.reduce("sum", [1.0, 2.0]) == 3.0
+    assert reductions.reduce("dot", [1.0, 2.0], [3.0, 4.0]) == 11.0
+    with pytest.raises(ValueError, match="requires operand 'b'"):
+        reductions.reduce("dot", [1.0])
+    with pytest.raises(ValueError, match="Unknown reduction"):
+        reductions.reduce("median", [1.0])
+
+
+def test_numpy_input_is_not_copied_whole(monkeypatch):
+    sizes = []
+    chunks = reductions._chunks
+
+    def recording_chunks(values):
+        for chunk in chunks(values):
+            sizes.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(reductions, "CHUNK_SIZE", 1000)
+    monkeypatch.setattr(reductions, "_chunks", recording_chunks)
+    assert reductions.fsum(np.ones(2500)) == 2500.0
+    assert sizes == [1000, 1000, 500]
+
+
+@pytest.mark.parametrize(
+    "op, body, expected",
+    [
+        ("sum", {"a": [0.1] * 10}, 1.0),
+        ("product", {"a": [2, 3, 4]}, 24.0),
+        ("mean", {"a": [1, 2, 3, 4]}, 2.5),
+        ("min", {"a": [3, -1, 2]}, -1.0),
+        ("max", {"a": [3, -1, 2]}, 3.0),
+        ("dot", {"a": [1, 2], "b": [3, 4]}, 11.0),
+    ],
+)
+def test_reduce_endpoints(op, body, expected):
+    response = client.post(f"/reduce/{op}", json=body)
+    assert response.status_code == 200
+    assert response.json() == {"result": expected}
+
+
+def test_cumsum_endpoint():
+    response = client.post("/reduce/cumsum", json={"a": [0.1, 0.2, 0.3]})
+    assert response.status_code == 200
+    assert response.json() == {"result": [0.1, 0.30000000000000004, 0.6]}
+
+
+@pytest.mark.parametrize(
+    "op, body, detail",
+    [
+        ("mean", {"a": []}, "Cannot take the mean of an empty array"),
+        ("min", {"a": []}, "Cannot take the minimum of an empty array"),
+        ("product", {"a": [1e200, 1e200]}, "Numerical result out of range"),
+    ],
+)
+def test_reduce_domain_errors(op, body, detail):
+    response = client.post(f"/reduce/{op}", json=body)
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
+
+
+def test_reduce_request_validation():
+    assert client.post("/reduce/dot", json={"a": [1.0]}).status_code == 422
+    response = client.post("/reduce/dot", json={"a": [1.0], "b": [1.0, 2.0]})
+    assert response.status_code == 422
+    assert client.post("/reduce/median", json={"a": [1.0]}).status_code == 422
+
+
+def test_reduce_frames():
+    headers = {"Content-Type": "application/octet-stream"}
+    response = client.post(
+        "/reduce/sum", content=encode_frame("sum", np.arange(10.0)), headers=headers
+    )
+    assert decode_frame(response.content)[1].tolist() == [[45.0]]
+    response = client.post(
+        "/reduce/cumsum",
+        content=encode_frame("cumsum", np.arange(4.0)),
+        headers=headers,
+    )
+    assert decode_frame(response.content)[1].tolist() == [[0.0, 1.0, 3.0, 6.0]]
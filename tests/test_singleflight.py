@@ -0,0 +1,153 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api
+from calculator.metrics import MetricsRegistry
+from calculator.offload import OffloadPool
+from calculator.singleflight import SingleFlight
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def offloaded(monkeypatch):
+    client = TestClient(api.app)
+    pool = OffloadPool("thread", max_workers=2, max_queue=16)
+    monkeypatch.setattr(api.app.state.runtime, "offload_pool", pool)
+    monkeypatch.setattr(api.app.state.runtime, "coalescer", SingleFlight())
+    monkeypatch.setattr(
+        api.app.state.runtime, "offloaded_operations", frozenset({"power"})
+    )
+    yield pool, client
+    pool.shutdown()
+
+
+class SlowPower:
+    """Calculator method stand-in that blocks until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, a, b):
+        self.calls += 1
+        self.release.wait(5)
+        if b < 0:
+            raise ValueError("negative exponent")
+        return a**b
+
+
+async def _gather_when_waiting(slow, calls):
+    tasks = [asyncio.create_task(call) for call in calls]
+    await asyncio.sleep(0.05)
+    slow.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.anyio
+async def test_identical_calls_are_computed_once():
+    flight = SingleFlight()
+    started = 0
+
+    async def compute():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(flight.do("k", compute) for _ in range(5)))
+    assert results == [42] * 5
+    assert started == 1
+    assert flight.stats() == {
+        "leaders": 1,
+        "coalesced": 4,
+        "bypasses": 0,
+        "in_flight": 0,
+    }
+    assert await flight.do("k", compute) == 42
+    assert started == 2
+
+
+@pytest.mark.anyio
+async def test_none_key_bypasses():
+    flight = SingleFlight()
+
+    async def compute():
+        return 1
+
+    assert await asyncio.gather(flight.do(None, compute), flight.do(None, compute))
+    assert flight.stats()["bypasses"] == 2
+    assert flight.stats()["leaders"] == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_leader_does_not_cancel_waiters():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.do("k", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await follower == "done"
+    assert leader.cancelled()
+
+
+@pytest.mark.anyio
+async def test_offloaded_operations_are_coalesced(offloaded):
+    slow = SlowPower()
+    results = await _gather_when_waiting(
+        slow,
+        [api.app.state.runtime.run("power", slow, 2.0, 10.0) for _ in range(10)]
+        + [api.app.state.runtime.run("power", slow, 3.0, 2.0)],
+    )
+    assert results == [1024.0] * 10 + [9.0]
+    assert slow.calls == 2
+    assert api.app.state.runtime.coalescer.stats()["coalesced"] == 9
+    assert offloaded[0].completed == 2
+
+
+@pytest.mark.anyio
+async def test_errors_are_propagated_to_every_waiter(offloaded):
+    slow = SlowPower()
+    results = await _gather_when_waiting(
+        slow, [api.app.state.runtime.run("power", slow, 2.0, -1.0) for _ in range(3)]
+    )
+    assert [str(result) for result in results] == ["negative exponent"] * 3
+    assert all(isinstance(result, ValueError) for result in results)
+    assert slow.calls == 1
+
+
+@pytest.mark.anyio
+async def test_negative_zero_is_not_coalesced_with_zero(offloaded):
+    slow = SlowPower()
+    await _gather_when_waiting(
+        slow,
+        [
+            api.app.state.runtime.run("power", slow, 0.0, 1.0),
+            api.app.state.runtime.run("power", slow, -0.0, 1.0),
+        ],
+    )
+    assert slow.calls == 2
+
+
+def test_singleflight_counters_in_metrics(offloaded, monkeypatch):
+    _, client = offloaded
+    monkeypatch.setattr(api.app.state.runtime, "metrics_registry", MetricsRegistry())
+    assert client.post("/power", json={"a": 2, "b": 3}).json() == {"result": 8.0}
+    body = client.get("/metrics").text
+    assert "calculator_singleflight_leaders 1" in body
+    assert "calculator_singleflight_coalesced 0" in body
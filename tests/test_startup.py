@@ -0,0 +1,88 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Time from interpreter start of the import to the first /add response.
+STARTUP_BUDGET_SECONDS = 1.5
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_REQUEST = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+from calculator.api import app
+
+async def first_request():
+    messages = [{"type": "http.request", "body": b'{"a": 1, "b": 2}'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/add",
+        "raw_path": b"/add",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    await app(scope, receive, send)
+    return sent
+
+sent = asyncio.run(first_request())
+print(json.dumps({
+    "elapsed": time.perf_counter() - start,
+    "status": sent[0]["status"],
+    "body": sent[1]["body"].decode(),
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def run_fresh(code: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def test_importing_the_package_has_no_side_effects():
+    report = run_fresh(
+        "import json, sys\n"
+        "import calculator\n"
+        "from calculator import Calculator\n"
+        "assert Calculator().add(1, 2) == 3\n"
+        "print(json.dumps({'modules': sorted(sys.modules)}))"
+    )
+    assert "fastapi" not in report["modules"]
+    assert "calculator.api" not in report["modules"]
+    assert "yaml" not in report["modules"]
+
+
+def test_first_request_within_budget():
+    best = None
+    for _ in range(3):
+        report = run_fresh(FIRST_REQUEST)
+        assert report["status"] == 200
+        assert report["body"] == '{"result":3.0}'
+        best = report["elapsed"] if best is None else min(best, report["elapsed"])
+        if best < STARTUP_BUDGET_SECONDS:
+            break
+    assert best < STARTUP_BUDGET_SECONDS
+    assert "numpy" not in report["modules"]
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator.api import app
+from calculator.streaming import LineTooLong, iter_lines
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(lines):
+    return [
+        ("too long", line.length) if isinstance(line, LineTooLong) else line
+        async for line in lines
+    ]
+
+
+@pytest.mark.anyio
+async def test_iter_lines_across_chunks():
+    lines = iter_lines(chunked(b'{"a":', b" 1}\n\n", b"x\ny", b"z"))
+    assert await collect(lines) == [b'{"a": 1}', b"x", b"yz"]
+
+
+@pytest.mark.anyio
+async def test_iter_lines_skips_long_lines():
+    lines = iter_lines(chunked(b"ok\n" + b"x" * 10, b"x" * 10, b"x\nnext\n"), 8)
+    assert await collect(lines) == [b"ok", ("too long", 21), b"next"]
+
+
+def test_stream():
+    body = "\n".join(
+        [
+            json.dumps({"op": "add", "a": 1, "b": 2}),
+            json.dumps({"op": "divide", "a": 1, "b": 0}),
+            "not json",
+            json.dumps({"op": "sqrt", "a": 16}),
+        ]
+    )
+    with client.stream("POST", "/stream", content=body) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+    assert lines[0] == {"result": 3.0, "detail": None}
+    assert lines[1] == {"result": None, "detail": "Cannot divide by zero"}
+    assert lines[2]["result"] is None and "JSON" in lines[2]["detail"]
+    assert lines[3] == {"result": 4.0, "detail": None}
+
+
+def test_stream_chunked_request():
+    def body():
+        for i in range(1000):
+            yield f'{{"op": "multiply", "a": {i}, "b": 2}}\n'.encode()
+
+    response = client.post("/stream", content=body())
+    results = [json.loads(line)["result"] for line in response.text.splitlines()]
+    assert results == [i * 2.0 for i in range(1000)]
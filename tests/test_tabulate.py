@@ -0,0 +1,197 @@
+import functools
+import json
+import math
+
+import msgpack
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from calculator import api, tabulate
+from calculator.tabulate import Grid
+from calculator.transport import FRAME, MSGPACK, decode_frame, encode_frame
+
+client = TestClient(api.app)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_grid_with_step_excludes_stop():
+    grid = Grid.from_range(0, 1, step=0.1)
+    assert grid.count == 10
+    assert grid.points(0, 10).tolist() == [i * 0.1 for i in range(10)]
+    assert Grid.from_range(0, 1.05, step=0.1).count == 11
+    assert Grid.from_range(5, 0, step=-2).points(0, 3).tolist() == [5.0, 3.0, 1.0]
+
+
+def test_grid_with_count_includes_stop():
+    grid = Grid.from_range(0, 1, count=3)
+    assert grid.points(0, 3).tolist() == [0.0, 0.5, 1.0]
+    assert grid.endpoints.tolist() == [0.0, 1.0]
+    grid = Grid.from_range(0.1, 0.7, count=7)
+    assert grid.points(0, 7)[-1] == 0.7
+    assert Grid.from_range(3, 9, count=1).points(0, 1).tolist() == [3.0]
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"start": 0, "stop": 1}, "Exactly one of"),
+        ({"start": 0, "stop": 1, "step": 0.5, "count": 2}, "Exactly one of"),
+        ({"start": 0, "stop": math.inf, "step": 1}, "must be finite"),
+        ({"start": 0, "stop": 1, "step": 0}, "non-zero"),
+        ({"start": 0, "stop": 1, "step": -1}, "empty"),
+        ({"start": 0, "stop": 1, "count": 0}, "positive"),
+        ({"start": 0, "stop": 1, "step": 1e-9}, "maximum"),
+        ({"start": 0, "stop": 1, "count": tabulate.MAX_POINTS + 1}, "maximum"),
+    ],
+)
+def test_grid_errors(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        Grid.from_range(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "op, start, stop, operand, value",
+    [
+        ("ln", -10, 0, "a", None),
+        ("sqrt", -4, -1, "a", None),
+        ("divide", 1, 5, "a", 0),
+        ("power", -3, -1, "b", 0),
+    ],
+)
+def test_check_range_rejects_invalid_ranges(op, start, stop, operand, value):
+    grid = Grid.from_range(start, stop, count=5)
+    with pytest.raises(ValueError, match="at every point of the range"):
+        tabulate.check_range(op, grid, operand, value)
+
+
+@pytest.mark.parametrize(
+    "op, start, stop, operand, value",
+    [
+        ("ln", -10, 10, "a", None),
+        ("divide", -1, 1, "b", 1),
+        # Even roots of -8 fail at 2 and 4 but not at 3.
+        ("nth_root", 2, 4, "b", -8),
+    ],
+)
+def test_check_range_accepts_partly_valid_ranges(op, start, stop, operand, value):
+    tabulate.check_range(op, Grid.from_range(start, stop, count=3), operand, value)
+
+
+def test_evaluate_is_lazy():
+    grid = Grid.from_range(0, 1, count=tabulate.MAX_POINTS)
+    chunks = tabulate.evaluate("sqrt", grid, chunk_size=4)
+    points, result, errors = next(chunks)
+    assert len(points) == len(result) == 4
+    assert result[0] == 0.0 and not errors
+    assert next(chunks)[0][0] == grid.points(4, 5)[0]
+
+
+def test_tabulate_ndjson():
+    response = client.post(
+        "/tabulate/divide",
+        json={"start": -1, "stop": 1, "count": 3, "operand": "b", "value": 2},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert _lines(response) == [
+        {"x": -1.0, "result": -2.0, "detail": None},
+        {"x": 0.0, "result": None, "detail": "Cannot divide by zero"},
+        {"x": 1.0, "result": 2.0, "detail": None},
+    ]
+
+
+def test_tabulate_round_and_power():
+    response = client.post(
+        "/tabulate/round",
+        json={"start": 0.125, "stop": 0.5, "step": 0.125, "decimals": 2},
+    )
+    assert [line["result"] for line in _lines(response)] == [0.12, 0.25, 0.38]
+    response = client.post(
+        "/tabulate/power", json={"start": 0, "stop": 4, "step": 1, "value": 2}
+    )
+    assert [line["result"] for line in _lines(response)] == [0.0, 1.0, 4.0, 9.0]
+
+
+def test_tabulate_is_streamed_in_chunks(monkeypatch):
+    monkeypatch.setattr(
+        tabulate, "evaluate", functools.partial(tabulate.evaluate, chunk_size=3)
+    )
+    chunks = []
+    ndjson_chunks = tabulate.ndjson_chunks
+
+    def recording_chunks(evaluated):
+        for chunk in ndjson_chunks(evaluated):
+            chunks.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(tabulate, "ndjson_chunks", recording_chunks)
+    response = client.post("/tabulate/log10", json={"start": 1, "stop": 8, "step": 1})
+    assert len(_lines(response)) == 7
+    assert [chunk.count(b"\n") for chunk in chunks] == [3, 3, 1]
+
+
+def test_tabulate_frames():
+    response = client.post(
+        "/tabulate/ln",
+        json={"start": -1, "stop": 1, "count": 3},
+        headers={"Accept": "application/octet-stream"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    messages = json.loads(response.headers["x-error-details"])
+    op, columns, _ = decode_frame(response.content)
+    assert op == "ln"
+    points, result, codes = columns
+    assert points.tolist() == [-1.0, 0.0, 1.0]
+    assert np.isnan(result[:2]).all() and result[2] == 0.0
+    assert [messages[int(code) - 1] for code in codes[:2]] == [
+        "Cannot take logarithm of a non-positive number"
+    ] * 2
+    assert codes[2] == 0
+
+
+def test_tabulate_rejects_invalid_range():
+    response = client.post("/tabulate/ln", json={"start": -10, "stop": 0, "count": 5})
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "Cannot take logarithm of a non-positive number"
+        " at every point of the range"
+    }
+
+
+@pytest.mark.parametrize(
+    "op, body",
+    [
+        ("sqrt", {"start": 0, "stop": 1}),
+        ("sqrt", {"start": 1, "stop": 0, "step": 1}),
+        ("sqrt", {"start": 0, "stop": 1, "count": 0}),
+        ("sqrt", {"start": 0, "stop": 1, "count": 2, "operand": "b"}),
+        ("add", {"start": 0, "stop": 1, "count": 2}),
+        ("median", {"start": 0, "stop": 1, "count": 2}),
+    ],
+)
+def test_tabulate_request_validation(op, body):
+    assert client.post(f"/tabulate/{op}", json=body).status_code == 422
+
+
+def test_tabulate_binary_requests():
+    response = client.post(
+        "/tabulate/sqrt",
+        content=msgpack.packb({"start": 0, "stop": 9, "count": 2}),
+        headers={"Content-Type": MSGPACK},
+    )
+    assert response.status_code == 200
+    assert [line["result"] for line in _lines(response)] == [0.0, 3.0]
+    response = client.post(
+        "/tabulate/power",
+        content=encode_frame("power", [[0.0], [3.0], [1.0], [2.0]]),
+        headers={"Content-Type": FRAME, "Accept": FRAME},
+    )
+    assert response.status_code == 200
+    points, result, _ = decode_frame(response.content)[1]
+    assert points.tolist() == [0.0, 1.0, 2.0]
+    assert result.tolist() == [0.0, 1.0, 4.0]
@@ -0,0 +1,256 @@
+import json
+import math
+
+import msgpack
+import numpy as np
+import pytest
+from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from calculator.api import app
+from calculator.transport import (
+    FRAME,
+    MSGPACK,
+    NegotiatedRoute,
+    ResultResponse,
+    decode_frame,
+    encode_frame,
+    encode_result,
+)
+
+client = TestClient(app)
+
+
+def post_msgpack(path, body, **headers):
+    return client.post(
+        path,
+        content=msgpack.packb(body),
+        headers={"content-type": MSGPACK, **headers},
+    )
+
+
+def post_frame(path, op, columns, param=0, **headers):
+    return client.post(
+        path,
+        content=encode_frame(op, np.array(columns, dtype=float), param),
+        headers={"content-type": FRAME, **headers},
+    )
+
+
+def test_frame_round_trip():
+    op, columns, param = decode_frame(encode_frame("add", [[1.0, 2.0], [3.0, 4.0]], 7))
+    assert op == "add"
+    assert columns.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+    assert param == 7
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"CALC", "truncated header"),
+        (b"XXXX" + encode_frame("add", [1.0])[4:], "bad magic"),
+        (encode_frame("add", [1.0])[:-1], "payload length"),
+    ],
+)
+def test_malformed_frames(data, message):
+    with pytest.raises(ValueError, match=message):
+        decode_frame(data)
+
+
+@pytest.mark.parametrize(
+    "value", [0.0, -0.0, 1.0, 0.1 + 0.2, 1e-310, 1.7976931348623157e308, -2.5e22]
+)
+def test_encode_result_matches_json(value):
+    assert json.loads(encode_result(value)) == {"result": value}
+    assert (
+        encode_result(value)
+        == json.dumps({"result": value}, separators=(",", ":")).encode()
+    )
+
+
+def test_encode_result_non_finite():
+    assert encode_result(math.inf) == b'{"result":"Infinity"}'
+    assert encode_result(-math.inf) == b'{"result":"-Infinity"}'
+    assert encode_result(math.nan) == b'{"result":"NaN"}'
+
+
+def test_result_response_headers():
+    response = ResultResponse(2.5, headers={"X-Test": "1"})
+    assert response.body == b'{"result":2.5}'
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-length"] == "14"
+    assert response.headers["x-test"] == "1"
+
+
+def test_msgpack_non_finite_result():
+    response = post_msgpack("/multiply", {"a": 1e200, "b": 1e200})
+    assert msgpack.unpackb(response.content) == {"result": math.inf}
+    response = post_frame("/multiply", "multiply", [[1e200], [-1e200]])
+    assert decode_frame(response.content)[1].tolist() == [[-math.inf]]
+
+
+def test_binary_request_non_finite_json_result():
+    response = post_frame(
+        "/vector/multiply",
+        "multiply",
+        [[1e200, 2], [1e200, 3]],
+        accept="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json() == {"result": ["Infinity", 6.0], "errors": []}
+    response = post_msgpack(
+        "/batch",
+        {"operations": [{"op": "multiply", "a": 1e200, "b": -1e200}]},
+        accept="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json()["results"][0]["result"] == "-Infinity"
+
+
+def test_msgpack_add():
+    response = post_msgpack("/add", {"a": 2, "b": 3})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(response.content) == {"result": 5.0}
+
+
+def test_msgpack_accept_json():
+    response = post_msgpack("/add", {"a": 2, "b": 3}, accept="application/json")
+    assert response.json() == {"result": 5.0}
+
+
+def test_msgpack_domain_error():
+    response = post_msgpack("/divide", {"a": 1, "b": 0})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Cannot divide by zero"}
+
+
+def test_msgpack_validation_error():
+    response = post_msgpack("/add", {"a": 2})
+    assert response.status_code == 422
+
+
+def test_msgpack_malformed():
+    response = client.post("/add", content=b"\xc1", headers={"content-type": MSGPACK})
+    assert response.status_code == 400
+
+
+def test_msgpack_batch():
+    response = post_msgpack(
+        "/batch", {"operations": [{"op": "add", "a": 1, "b": 2}, {"op": "ln", "a": 0}]}
+    )
+    assert msgpack.unpackb(response.content) == {
+        "results": [
+            {"result": 3.0, "detail": None},
+            {
+                "result": None,
+                "detail": "Cannot take logarithm of a non-positive number",
+            },
+        ]
+    }
+
+
+def test_frame_add():
+    response = post_frame("/add", "add", [[2.0], [3.0]])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == FRAME
+    op, columns, _ = decode_frame(response.content)
+    assert op == "add"
+    assert columns.tolist() == [[5.0]]
+
+
+def test_frame_round_uses_parameter():
+    response = post_frame("/round", "round", [[3.14159]], param=2)
+    assert decode_frame(response.content)[1].tolist() == [[3.14]]
+
+
+def test_frame_vector_marks_failures():
+    response = post_frame("/vector/log10", "log10", [[100.0, -1.0, 10.0]])
+    assert response.status_code == 200
+    assert response.headers["x-error-count"] == "1"
+    result = decode_frame(response.content)[1][0]
+    assert result[0] == 2.0 and math.isnan(result[1]) and result[2] == 1.0
+
+
+def test_frame_vector_accept_msgpack():
+    response = post_frame(
+        "/vector/add", "add", [[1.0, 2.0], [3.0, 4.0]], accept=MSGPACK
+    )
+    assert msgpack.unpackb(response.content) == {"result": [4.0, 6.0], "errors": []}
+
+
+def test_frame_operation_mismatch():
+    response = post_frame("/add", "subtract", [[2.0], [3.0]])
+    assert response.status_code == 400
+
+
+def test_frame_wrong_column_count():
+    response = post_frame("/add", "add", [[2.0]])
+    assert response.status_code == 400
+
+
+def test_frame_unsupported_route():
+    response = post_frame("/batch", "batch", [[1.0]])
+    assert response.status_code == 415
+
+
+def test_frame_unknown_vector_operation():
+    response = post_frame("/vector/sin", "sin", [[1.0]])
+    assert response.status_code == 422
+
+
+class Columns(BaseModel):
+    a: list[float] = Field(max_length=2)
+
+
+def _special_params_app():
+    special = APIRouter(route_class=NegotiatedRoute)
+
+    @special.post("/columns")
+    def columns(request: Request, response: Response, req: Columns):
+        response.headers["X-Path"] = request.url.path
+        response.status_code = 201
+        return {"result": sum(req.a)}
+
+    @special.post("/scaled")
+    def scaled(req: Columns, factor: float = 1.0):
+        return {"result": factor * sum(req.a)}
+
+    special_app = FastAPI()
+    special_app.include_router(special)
+    return TestClient(special_app)
+
+
+def test_binary_body_receives_request_and_response():
+    special = _special_params_app()
+    response = special.post(
+        "/columns",
+        content=msgpack.packb({"a": [1.0, 2.0]}),
+        headers={"content-type": MSGPACK},
+    )
+    assert response.status_code == 201
+    assert response.headers["x-path"] == "/columns"
+    assert msgpack.unpackb(response.content) == {"result": 3.0}
+
+
+def test_binary_body_unsupported_with_query_params():
+    special = _special_params_app()
+    response = special.post(
+        "/scaled?factor=2",
+        content=msgpack.packb({"a": [1.0]}),
+        headers={"content-type": MSGPACK},
+    )
+    assert response.status_code == 415
+    assert special.post("/scaled?factor=2", json={"a": [1.0]}).json() == {"result": 2.0}
+
+
+def test_frame_is_validated():
+    special = _special_params_app()
+    response = special.post(
+        "/columns",
+        content=encode_frame("columns", np.array([1.0, 2.0, 3.0])),
+        headers={"content-type": FRAME},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
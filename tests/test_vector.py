@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+import pytest
+from calculator_lib import Calculator
+
+from calculator import vector
+from calculator.operations import (
+    BINARY_OPERATIONS,
+    UNARY_OPERATIONS,
+    Dispatcher,
+    error_detail,
+)
+
+A = np.array([-27.0, -2.5, -1.0, 0.0, 0.5, 2.0, 3.0, 100.0])
+B = np.array([3.0, 2.0, -3.0, 4.0, 0.5, -2.0, 0.0, 3.0])
+
+
+@pytest.fixture
+def calc():
+    return Calculator()
+
+
+@pytest.mark.parametrize("op", BINARY_OPERATIONS)
+def test_binary_matches_calculator(calc, op):
+    result, errors = vector.evaluate(op, A, B)
+    failed = {int(i) for indices in errors.values() for i in indices}
+    for i, (a, b) in enumerate(zip(A.tolist(), B.tolist())):
+        if i in failed:
+            assert math.isnan(result[i])
+            continue
+        assert result[i] == pytest.approx(getattr(calc, op)(a, b))
+
+
+@pytest.mark.parametrize("op", UNARY_OPERATIONS)
+def test_unary_matches_calculator(calc, op):
+    result, errors = vector.evaluate(op, A)
+    failed = {int(i) for indices in errors.values() for i in indices}
+    for i, a in enumerate(A.tolist()):
+        if i in failed:
+            with pytest.raises(ValueError):
+                getattr(calc, op)(a)
+            continue
+        assert result[i] == pytest.approx(getattr(calc, op)(a))
+
+
+def test_error_messages_match_calculator(calc):
+    _, errors = vector.evaluate("divide", A, B)
+    with pytest.raises(ValueError) as excinfo:
+        calc.divide(3.0, 0.0)
+    assert list(errors) == [str(excinfo.value)]
+    assert errors[str(excinfo.value)].tolist() == [6]
+
+
+def test_unknown_operation():
+    with pytest.raises(ValueError, match="Unknown operation"):
+        vector.evaluate("sin", A)
+
+
+@pytest.mark.parametrize(
+    "decimals", [-400, -309, -2, -1, 0, 1, 2, 3, 17, 30, 324, 10**6]
+)
+def test_round_matches_calculator(calc, decimals):
+    a = np.array([2.675, 1.005, 0.125, -2.5, 15.0, 123456.785, 1e20, 5e-324, 0.0])
+    result, errors = vector.evaluate("round", a, decimals=decimals)
+    assert errors == {}
+    expected = [calc.round_number(x, decimals) for x in a.tolist()]
+    assert result.tolist() == expected
+    assert np.signbit(result).tolist() == [math.copysign(1, x) < 0 for x in expected]
+
+
+def test_round_reports_overflow():
+    a = np.array([1.7976931348623157e308, 1.0])
+    result, errors = vector.evaluate("round", a, decimals=-307)
+    assert list(errors) == ["Numerical result out of range"]
+    assert errors["Numerical result out of range"].tolist() == [0]
+    assert math.isnan(result[0]) and result[1] == 0.0
+
+
+@pytest.mark.parametrize("op", UNARY_OPERATIONS + ("round",))
+def test_non_finite_inputs_match_calculator(calc, op):
+    a = np.array([math.inf, -math.inf, math.nan])
+    result, errors = vector.evaluate(op, a, decimals=2)
+    failed = {int(i): message for message, indices in errors.items() for i in indices}
+    dispatch = Dispatcher(calc)
+    for i, x in enumerate(a.tolist()):
+        if i in failed:
+            assert math.isnan(result[i])
+            with pytest.raises((ValueError, OverflowError)) as excinfo:
+                dispatch(op, x, decimals=2)
+            assert error_detail(excinfo.value) == failed[i]
+            continue
+        expected = dispatch(op, x, decimals=2)
+        assert result[i] == expected or (math.isnan(result[i]) and math.isnan(expected))
@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from calculator import api
+from calculator.api import app
+from calculator.ratelimit import TokenBucket
+from calculator.websocket import CalculationSession
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeWebSocket:
+    """WebSocket fed from a list, whose sends wait for :attr:`readable`."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.readable = asyncio.Event()
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        if not self.messages:
+            await asyncio.sleep(3600)
+        message = self.messages.pop(0)
+        if isinstance(message, Exception):
+            raise message
+        return {"type": "websocket.receive", "text": message}
+
+    async def send_text(self, text):
+        await self.readable.wait()
+        self.sent.append(text)
+
+    async def close(self, code, reason):
+        self.closed = (code, reason)
+
+
+def fake_session(websocket, idle_timeout=60):
+    async def echo(message):
+        return message
+
+    return CalculationSession(
+        websocket,
+        echo,
+        lambda message_id, detail: detail,
+        rate=1000,
+        burst=200,
+        idle_timeout=idle_timeout,
+        max_in_flight=2,
+    )
+
+
+def websocket_config(**overrides):
+    config = {"rate": 1000, "burst": 200, "idle_timeout": 60, "max_in_flight": 64}
+    return lambda: {**config, **overrides}
+
+
+def receive_all(websocket, count):
+    replies = [websocket.receive_json() for _ in range(count)]
+    return {reply["id"]: reply for reply in replies}
+
+
+def test_tagged_replies():
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"id": 1, "op": "add", "a": 2, "b": 3})
+        websocket.send_json({"id": "r", "op": "round", "a": 2.567, "decimals": 2})
+        websocket.send_json({"id": 3, "op": "sqrt", "a": 16})
+        replies = receive_all(websocket, 3)
+    assert replies == {
+        1: {"id": 1, "result": 5.0, "detail": None},
+        "r": {"id": "r", "result": 2.57, "detail": None},
+        3: {"id": 3, "result": 4.0, "detail": None},
+    }
+
+
+def test_errors_are_per_message():
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"id": 1, "op": "divide", "a": 1, "b": 0})
+        websocket.send_json({"id": 2, "op": "nope", "a": 1})
+        websocket.send_text("not json")
+        websocket.send_json({"id": 4, "op": "add", "a": 1, "b": 1})
+        replies = [websocket.receive_json() for _ in range(4)]
+    by_id = {reply["id"]: reply for reply in replies if reply["id"] is not None}
+    assert by_id[1]["detail"] == "Cannot divide by zero"
+    assert by_id[2]["detail"].startswith("op:")
+    assert by_id[4]["result"] == 2.0
+    assert sum(reply["id"] is None for reply in replies) == 1
+
+
+def test_rate_limit(monkeypatch):
+    monkeypatch.setattr(api, "get_websocket_config", websocket_config(rate=0, burst=2))
+    with client.websocket_connect("/ws") as websocket:
+        for i in range(4):
+            websocket.send_json({"id": i, "op": "absolute", "a": -i})
+        replies = receive_all(websocket, 4)
+    assert replies[0]["result"] == 0.0
+    assert replies[1]["result"] == 1.0
+    assert replies[2]["detail"] == replies[3]["detail"] == "Rate limit exceeded"
+
+
+def test_idle_timeout_closes_connection(monkeypatch):
+    monkeypatch.setattr(
+        api, "get_websocket_config", websocket_config(idle_timeout=0.05)
+    )
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"id": 1, "op": "add", "a": 1, "b": 1})
+        assert websocket.receive_json()["result"] == 2.0
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_json()
+    assert exc_info.value.code == 1000
+    assert exc_info.value.reason == "Idle timeout"
+
+
+def test_token_bucket_refills():
+    now = [0.0]
+    bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0])
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.retry_after() == pytest.approx(0.1)
+    now[0] = 0.1
+    assert bucket.try_acquire()
+    now[0] = 10.0
+    assert bucket.tokens <= 2
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+@pytest.mark.anyio
+async def test_unread_replies_stop_reading():
+    websocket = FakeWebSocket([str(i) for i in range(10)])
+    session = fake_session(websocket, idle_timeout=0.05)
+    task = asyncio.create_task(session.run())
+    await asyncio.sleep(0.05)
+    # One reply being sent, two queued, two evaluated messages waiting for
+    # room and one message read waiting for a slot.
+    assert len(websocket.messages) == 4
+    websocket.readable.set()
+    await task
+    assert sorted(websocket.sent, key=int) == [str(i) for i in range(10)]
+    assert websocket.closed == (1000, "Idle timeout")
+
+
+@pytest.mark.anyio
+async def test_failed_session_closes_with_internal_error():
+    websocket = FakeWebSocket(["1", RuntimeError("receive failed")])
+    websocket.readable.set()
+    with pytest.raises(RuntimeError):
+        await fake_session(websocket).run()
+    assert websocket.sent == ["1"]
+    assert websocket.closed == (1011, "Internal error")
+
+
+@pytest.mark.anyio
+async def test_cancelled_session_drops_unread_replies():
+    websocket = FakeWebSocket([str(i) for i in range(10)])
+    task = asyncio.create_task(fake_session(websocket).run())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert websocket.sent == [] and websocket.closed is None